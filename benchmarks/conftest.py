@@ -0,0 +1,39 @@
+"""Benchmarks comparing semimutable against the standard library ``dataclasses``.
+
+These are not part of the regular test run. They need ``pytest-benchmark``, which is pulled in on demand::
+
+    just bench
+    # or
+    uv run --with pytest-benchmark pytest benchmarks --benchmark-json=results.json
+
+``just bench`` saves every run as JSON under ``.benchmarks/``, compare two runs with
+``uv run --with pytest-benchmark pytest-benchmark compare 0001 0002``.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from models import MODELS  # noqa: E402
+
+
+@pytest.fixture(params=["dataclasses", "semimutable"])
+def impl(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "slots"])
+def slots(request: pytest.FixtureRequest) -> bool:
+    return request.param
+
+
+@pytest.fixture
+def model(impl: str, slots: bool) -> type:
+    """One of `models.MODELS`, for every combination of implementation and ``slots``."""
+    return MODELS[impl, slots]
+
+
+@pytest.fixture
+def layout(slots: bool) -> str:
+    """Suffix for ``benchmark.group``, so that each group compares the implementations under the same layout."""
+    return "slots" if slots else "dict"
@@ -0,0 +1,66 @@
+"""The record used by most benchmarks, once per implementation and layout.
+
+They live at module level so that they can be pickled. ``id`` and ``key`` are frozen on the semimutable classes and
+plain fields on the dataclasses ones. The ``SmTracked`` classes, with ``track_changes=True``, are only used by
+``test_track_changes.py``.
+"""
+
+import dataclasses
+
+import semimutable
+
+
+@dataclasses.dataclass
+class StdDict:
+    id: int
+    key: str
+    value: int = 0
+    label: str = ""
+
+
+@dataclasses.dataclass(slots=True)
+class StdSlots:
+    id: int
+    key: str
+    value: int = 0
+    label: str = ""
+
+
+@semimutable.dataclass
+class SmDict:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+    label: str = ""
+
+
+@semimutable.dataclass(slots=True)
+class SmSlots:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+    label: str = ""
+
+
+@semimutable.dataclass(track_changes=True)
+class SmTrackedDict:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+    label: str = ""
+
+
+@semimutable.dataclass(slots=True, track_changes=True)
+class SmTrackedSlots:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+    label: str = ""
+
+
+MODELS: dict[tuple[str, bool], type[StdDict | StdSlots | SmDict | SmSlots]] = {
+    ("dataclasses", False): StdDict,
+    ("dataclasses", True): StdSlots,
+    ("semimutable", False): SmDict,
+    ("semimutable", True): SmSlots,
+}
@@ -0,0 +1,50 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""A `semimutable.batch.Batch` against a list of instances, for memory and for a whole-column computation."""
+
+import tracemalloc
+
+import pytest
+from models import SmSlots
+
+from semimutable.batch import Batch
+
+N_ROWS = 10_000
+
+
+def rows():
+    return [SmSlots(i, "k", i, "l") for i in range(N_ROWS)]
+
+
+def traced_bytes(make):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = make()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("container", ["list", "batch"])
+def test_sum_column(benchmark, container):
+    benchmark.group = f"sum a frozen column of {N_ROWS} rows"
+    instances = rows()
+    if container == "list":
+        size, _ = traced_bytes(rows)
+        benchmark.extra_info["traced_bytes_per_row"] = size / N_ROWS
+        assert benchmark(lambda: sum(obj.id for obj in instances)) == sum(range(N_ROWS))
+    else:
+        # Only the batch is counted, the instances it was built from could be dropped.
+        size, batch = traced_bytes(lambda: Batch(SmSlots, instances))
+        benchmark.extra_info["traced_bytes_per_row"] = size / N_ROWS
+        assert benchmark(sum, batch.column("id")) == sum(range(N_ROWS))
+
+
+@pytest.mark.parametrize("direction", ["from_instances", "to_instances"])
+def test_conversion(benchmark, direction):
+    benchmark.group = f"convert {N_ROWS} rows"
+    instances = rows()
+    if direction == "from_instances":
+        benchmark(Batch, SmSlots, instances)
+    else:
+        benchmark(Batch(SmSlots, instances).to_instances)
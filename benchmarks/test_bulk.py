@@ -0,0 +1,64 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Turning query results into instances, as a list of 100k rows and as a stream of 10M rows.
+
+The stdlib calls the class once per row. ``from_rows`` and ``from_records`` build the whole list in one generated loop,
+with the garbage collector paused if asked to, and the streaming variants yield from that loop.
+"""
+
+import collections
+import itertools
+
+import pytest
+from models import MODELS
+
+import semimutable
+
+ROWS = [(i, "k", i, "l") for i in range(100_000)]
+RECORDS = [{"id": i, "key": "k", "value": i, "label": "l"} for i in range(100_000)]
+STREAM = 10_000_000
+
+
+def comprehension(cls, rows):
+    return [cls(*row) for row in rows]
+
+
+def comprehension_records(cls, records):
+    return [cls(**record) for record in records]
+
+
+def stream(iterator):
+    collections.deque(iterator, maxlen=0)
+
+
+def test_from_rows(benchmark, model, impl, layout):
+    benchmark.group = f"100k rows ({layout})"
+    if impl == "dataclasses":
+        benchmark(comprehension, model, ROWS)
+    else:
+        benchmark(semimutable.from_rows, model, ROWS)
+
+
+def test_from_rows_gc_paused(benchmark, layout, slots):
+    benchmark.group = f"100k rows ({layout})"
+    benchmark(semimutable.from_rows, MODELS["semimutable", slots], ROWS, pause_gc=True)
+
+
+def test_from_records(benchmark, model, impl, layout):
+    benchmark.group = f"100k records ({layout})"
+    if impl == "dataclasses":
+        benchmark(comprehension_records, model, RECORDS)
+    else:
+        benchmark(semimutable.from_records, model, RECORDS)
+
+
+@pytest.mark.parametrize("slots", [True], ids=["slots"])
+def test_stream_rows(benchmark, model, impl):
+    benchmark.group = "stream 10M rows (slots)"
+
+    def rows():
+        return ((i, "k", i, "l") for i in itertools.repeat(0, STREAM))
+
+    if impl == "dataclasses":
+        benchmark.pedantic(lambda: stream(model(*row) for row in rows()), rounds=1)
+    else:
+        benchmark.pedantic(lambda: stream(semimutable.iter_from_rows(model, rows())), rounds=1)
@@ -0,0 +1,93 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Class attribute access under each ``classvar_frozen_assignment`` mode.
+
+"patch" and "error" route every class attribute lookup through a Python-level metaclass ``__getattribute__``, while
+"replace" and "descriptor" leave it alone, so this is where the modes differ.
+"""
+
+import dataclasses
+from typing import ClassVar
+
+import pytest
+
+import semimutable
+
+REPEAT = range(1_000)
+MODES = ["patch", "error", "replace", "descriptor"]
+
+
+def make_class(impl: str, slots: bool):
+    if impl == "dataclasses":
+
+        @dataclasses.dataclass(slots=slots)
+        class Std:
+            key: int
+            CONST: ClassVar[int] = 1
+
+            @classmethod
+            def create(cls):
+                return cls(key=0)
+
+            @staticmethod
+            def helper():
+                return None
+
+        return Std
+
+    @semimutable.dataclass(slots=slots, classvar_frozen_assignment=impl)  # pyright: ignore[reportArgumentType]
+    class Sm:
+        key: int = semimutable.field(frozen=True)
+        CONST: ClassVar[int] = 1
+
+        @classmethod
+        def create(cls):
+            return cls(key=0)
+
+        @staticmethod
+        def helper():
+            return None
+
+    return Sm
+
+
+def read_class_var(cls):
+    for _ in REPEAT:
+        cls.CONST
+
+
+def read_classmethod(cls):
+    for _ in REPEAT:
+        cls.create
+
+
+def read_staticmethod(cls):
+    for _ in REPEAT:
+        cls.helper
+
+
+def read_dunder(cls):
+    for _ in REPEAT:
+        cls.__name__
+
+
+def read_frozen_name(cls):
+    for _ in REPEAT:
+        cls.key
+
+
+@pytest.mark.parametrize(
+    "reader", [read_class_var, read_classmethod, read_staticmethod, read_dunder], ids=lambda f: f.__name__
+)
+@pytest.mark.parametrize("impl", ["dataclasses", *MODES])
+def test_class_attribute_access(benchmark, impl, slots, layout, reader):
+    benchmark.group = f"class attribute access: {reader.__name__} ({layout})"
+    benchmark(reader, make_class(impl, slots))
+
+
+@pytest.mark.parametrize("impl", ["dataclasses", "patch", "replace", "descriptor"])
+def test_frozen_name_class_access(benchmark, impl, slots, layout):
+    """Read back a class variable assigned under the name of a frozen field ("error" refuses the assignment)."""
+    benchmark.group = f"class attribute access: read_frozen_name ({layout})"
+    cls = make_class(impl, slots)
+    cls.key = 1
+    benchmark(read_frozen_name, cls)
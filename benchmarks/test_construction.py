@@ -0,0 +1,14 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Instance construction. Two of the four fields are frozen on the semimutable models."""
+
+REPEAT = range(1_000)
+
+
+def construct(cls):
+    for _ in REPEAT:
+        cls(1, "k", 2, "l")
+
+
+def test_construction(benchmark, model, layout):
+    benchmark.group = f"construction ({layout})"
+    benchmark(construct, model)
@@ -0,0 +1,35 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""``asdict`` and ``astuple``, each implementation using its own module's functions."""
+
+import dataclasses
+
+import semimutable
+
+REPEAT = range(100)
+
+
+def convert(func, obj):
+    for _ in REPEAT:
+        func(obj)
+
+
+def test_asdict(benchmark, impl, model, layout):
+    benchmark.group = f"asdict ({layout})"
+    asdict = dataclasses.asdict if impl == "dataclasses" else semimutable.asdict
+    benchmark(convert, asdict, model(1, "k", 2, "l"))
+
+
+def test_astuple(benchmark, impl, model, layout):
+    benchmark.group = f"astuple ({layout})"
+    astuple = dataclasses.astuple if impl == "dataclasses" else semimutable.astuple
+    benchmark(convert, astuple, model(1, "k", 2, "l"))
+
+
+def test_iter_asdict(benchmark, impl, model, layout):
+    """Streaming a batch of records, with ``iter_asdict`` for semimutable."""
+    benchmark.group = f"asdict ({layout})"
+    objs = [model(i, "k", 2, "l") for i in REPEAT]
+    if impl == "dataclasses":
+        benchmark(lambda: list(map(dataclasses.asdict, objs)))
+    else:
+        benchmark(lambda: list(semimutable.iter_asdict(objs)))
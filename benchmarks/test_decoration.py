@@ -0,0 +1,35 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Cold-start cost: decorating many freshly created classes, as importing a large set of models does."""
+
+import dataclasses
+
+import semimutable
+
+N_CLASSES = 100
+
+
+def decorate_many(impl: str, slots: bool):
+    if impl == "dataclasses":
+        decorator = dataclasses.dataclass(slots=slots)
+        frozen_field = dataclasses.field
+    else:
+        decorator = semimutable.dataclass(slots=slots)
+
+        def frozen_field():
+            return semimutable.field(frozen=True)
+
+    for i in range(N_CLASSES):
+        namespace = {
+            "__annotations__": {"id": int, "key": str, "value": int, "label": str},
+            "id": frozen_field(),
+            "key": frozen_field(),
+            "value": 0,
+            "label": "",
+        }
+        decorator(type(f"Model{i}", (), namespace))
+
+
+def test_decorate_classes(benchmark, impl, slots, layout):
+    """Two of the four fields are frozen on the semimutable classes."""
+    benchmark.group = f"decorate {N_CLASSES} classes ({layout})"
+    benchmark(decorate_many, impl, slots)
@@ -0,0 +1,85 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Reads of a key derived from the frozen fields.
+
+The semimutable models cache it with ``frozen_cached``. On the dataclasses side, ``functools.cached_property`` can only
+be used without slots, the slotted model recomputes it in a plain property.
+"""
+
+import dataclasses
+import functools
+
+import pytest
+
+import semimutable
+
+REPEAT = range(1_000)
+
+
+@dataclasses.dataclass
+class StdDict:
+    id: int
+    key: str
+
+    @functools.cached_property
+    def derived(self) -> str:
+        return f"{self.id}:{self.key}"
+
+
+@dataclasses.dataclass(slots=True)
+class StdSlots:
+    id: int
+    key: str
+
+    @property
+    def derived(self) -> str:
+        return f"{self.id}:{self.key}"
+
+
+@semimutable.dataclass
+class SmDict:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+
+    @semimutable.frozen_cached
+    def derived(self) -> str:
+        return f"{self.id}:{self.key}"
+
+
+@semimutable.dataclass(slots=True)
+class SmSlots:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+
+    @semimutable.frozen_cached
+    def derived(self) -> str:
+        return f"{self.id}:{self.key}"
+
+
+MODELS = {
+    ("dataclasses", False): StdDict,
+    ("dataclasses", True): StdSlots,
+    ("semimutable", False): SmDict,
+    ("semimutable", True): SmSlots,
+}
+
+
+@pytest.fixture
+def cached_model(impl, slots):
+    return MODELS[impl, slots]
+
+
+def read_derived(obj):
+    for _ in REPEAT:
+        obj.derived
+
+
+def test_derived_key_read(benchmark, cached_model, layout):
+    benchmark.group = f"derived key read ({layout})"
+    obj = cached_model(1, "k")
+    assert obj.derived == "1:k"
+    benchmark(read_derived, obj)
+
+
+def test_derived_key_first_read(benchmark, cached_model, layout):
+    benchmark.group = f"derived key, first read ({layout})"
+    benchmark(lambda: cached_model(1, "k").derived)
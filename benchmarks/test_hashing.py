@@ -0,0 +1,49 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false, reportUnhashable = false
+"""Looking records up in a dict, keyed by their identifying fields.
+
+Records with mutable fields can't be dict keys with the stdlib, so a key tuple is built for every lookup. With
+``frozen_hash=True``, the records are the keys, hashed by their frozen fields once.
+"""
+
+import dataclasses
+
+import pytest
+
+import semimutable
+
+REPEAT = range(1_000)
+
+
+@dataclasses.dataclass(slots=True)
+class StdRecord:
+    id: int
+    key: str
+    value: int = 0
+
+
+@semimutable.dataclass(slots=True, frozen_hash=True)
+class SmRecord:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+
+
+def lookup_by_tuple(index, obj):
+    for _ in REPEAT:
+        index[obj.id, obj.key]
+
+
+def lookup_by_instance(index, obj):
+    for _ in REPEAT:
+        index[obj]
+
+
+@pytest.mark.parametrize("impl", ["dataclasses", "semimutable"])
+def test_dict_lookup(benchmark, impl):
+    benchmark.group = "dict lookup by identifying fields"
+    if impl == "dataclasses":
+        obj = StdRecord(1, "k")
+        benchmark(lookup_by_tuple, {(obj.id, obj.key): obj}, obj)
+    else:
+        obj = SmRecord(1, "k")
+        benchmark(lookup_by_instance, {obj: obj}, obj)
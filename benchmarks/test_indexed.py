@@ -0,0 +1,44 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Finding records by a frozen field among 100k, scanning a list or through `semimutable.indexed.IndexedCollection`."""
+
+import pytest
+from models import SmSlots
+
+from semimutable.indexed import IndexedCollection
+
+N_ROWS = 100_000
+INSTANCES = [SmSlots(i, f"key {i % 1_000}", i, "l") for i in range(N_ROWS)]
+COLLECTION = IndexedCollection(SmSlots, INSTANCES, index=["key"], sorted_index=["id"])
+
+
+def scan_key(objs, key):
+    return [obj for obj in objs if obj.key == key]
+
+
+def scan_range(objs, start, stop):
+    return [obj for obj in objs if start <= obj.id < stop]
+
+
+@pytest.mark.parametrize("impl", ["scan", "indexed"])
+def test_lookup(benchmark, impl):
+    benchmark.group = f"find the 100 records with one key among {N_ROWS}"
+    if impl == "scan":
+        result = benchmark(scan_key, INSTANCES, "key 7")
+    else:
+        result = benchmark(COLLECTION.lookup, "key", "key 7")
+    assert len(result) == 100
+
+
+@pytest.mark.parametrize("impl", ["scan", "indexed"])
+def test_range(benchmark, impl):
+    benchmark.group = f"find the 100 records with ids in a range among {N_ROWS}"
+    if impl == "scan":
+        result = benchmark(scan_range, INSTANCES, 500, 600)
+    else:
+        result = benchmark(COLLECTION.range, "id", 500, 600)
+    assert len(result) == 100
+
+
+def test_build(benchmark):
+    benchmark.group = f"index {N_ROWS} records"
+    benchmark.pedantic(IndexedCollection, (SmSlots, INSTANCES), {"index": ["key"], "sorted_index": ["id"]}, rounds=5)
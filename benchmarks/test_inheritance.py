@@ -0,0 +1,48 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Class attribute access on the leaf of a chain of semimutable dataclasses, from 1 to 10 levels deep."""
+
+import dataclasses
+from typing import ClassVar
+
+import pytest
+
+import semimutable
+
+REPEAT = range(1_000)
+
+
+def make_chain(impl: str, depth: int):
+    if impl == "dataclasses":
+
+        @dataclasses.dataclass
+        class Std:
+            f0: int
+            CONST: ClassVar[int] = 1
+
+        cls = Std
+        for level in range(1, depth):
+            cls = dataclasses.make_dataclass(f"Std{level}", [(f"f{level}", int, 0)], bases=(cls,))
+        return cls
+
+    @semimutable.dataclass(classvar_frozen_assignment=impl)  # pyright: ignore[reportArgumentType]
+    class Sm:
+        f0: int = semimutable.field(frozen=True)
+        CONST: ClassVar[int] = 1
+
+    cls = Sm
+    for level in range(1, depth):
+        namespace = {"__annotations__": {f"f{level}": int}, f"f{level}": 0}
+        cls = semimutable.dataclass(classvar_frozen_assignment=impl)(type(f"Sm{level}", (cls,), namespace))  # pyright: ignore[reportArgumentType, reportCallIssue]
+    return cls
+
+
+def read_class_var(cls):
+    for _ in REPEAT:
+        cls.CONST
+
+
+@pytest.mark.parametrize("depth", [1, 2, 5, 10])
+@pytest.mark.parametrize("impl", ["dataclasses", "patch", "error", "descriptor"])
+def test_class_access_by_depth(benchmark, impl, depth):
+    benchmark.group = f"class attribute access: {impl}"
+    benchmark(read_class_var, make_chain(impl, depth))
@@ -0,0 +1,49 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Constructing records that repeat the same identifying fields, as when the same entities keep arriving off the wire.
+
+The stdlib constructs a new instance every time, or hands out a shared one from a dict keyed by a tuple of the
+identifying fields. ``intern=True`` does the latter inside the constructor, with weak references.
+"""
+
+import dataclasses
+
+import pytest
+
+import semimutable
+
+KEYS = [(i % 100, "k") for i in range(1_000)]
+
+
+@dataclasses.dataclass(slots=True, weakref_slot=True)
+class StdRecord:
+    id: int
+    key: str
+    value: int = 0
+
+
+@semimutable.dataclass(slots=True, weakref_slot=True, intern=True)
+class SmRecord:
+    id: int = semimutable.field(frozen=True)
+    key: str = semimutable.field(frozen=True)
+    value: int = 0
+
+
+def construct(cls):
+    return [cls(id, key) for id, key in KEYS]
+
+
+def construct_shared(cls):
+    shared = {}
+    return [shared.get((id, key)) or shared.setdefault((id, key), cls(id, key)) for id, key in KEYS]
+
+
+@pytest.mark.parametrize("impl", ["dataclasses", "dataclasses + dict", "semimutable"])
+def test_repeated_construction(benchmark, impl):
+    benchmark.group = "construct 1000 records of 100 entities"
+    if impl == "dataclasses":
+        objs = benchmark(construct, StdRecord)
+    elif impl == "dataclasses + dict":
+        objs = benchmark(construct_shared, StdRecord)
+    else:
+        objs = benchmark(construct, SmRecord)
+    benchmark.extra_info["distinct instances"] = len(set(map(id, objs)))
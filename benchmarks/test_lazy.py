@@ -0,0 +1,46 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Constructing records with a derived field that is expensive to compute and rarely read.
+
+The stdlib computes it in ``__post_init__`` for every instance. A lazy semimutable field is computed on first read.
+"""
+
+import dataclasses
+import hashlib
+
+import pytest
+
+import semimutable
+
+REPEAT = range(1_000)
+
+
+def digest(record) -> str:
+    return hashlib.sha256(record.payload).hexdigest()
+
+
+@dataclasses.dataclass(slots=True)
+class StdRecord:
+    payload: bytes
+    digest: str = dataclasses.field(init=False)
+
+    def __post_init__(self) -> None:
+        self.digest = digest(self)
+
+
+@semimutable.dataclass(slots=True)
+class SmRecord:
+    payload: bytes = semimutable.field(frozen=True)
+    digest: str = semimutable.field(frozen=True, lazy=digest)
+
+
+def construct(cls, payload):
+    for _ in REPEAT:
+        cls(payload)
+
+
+@pytest.mark.parametrize("impl", ["dataclasses", "semimutable"])
+def test_construction(benchmark, impl):
+    benchmark.group = "construction with a derived field"
+    cls = StdRecord if impl == "dataclasses" else SmRecord
+    assert cls(b"x" * 1024).digest == hashlib.sha256(b"x" * 1024).hexdigest()
+    benchmark(construct, cls, b"x" * 1024)
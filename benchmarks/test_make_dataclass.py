@@ -0,0 +1,41 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Generating classes at runtime from schemas, one call per class or in a single batch."""
+
+import dataclasses
+
+import pytest
+
+import semimutable
+
+N_CLASSES = 1_000
+N_LAYOUTS = 20
+
+
+def make_schemas(impl: str):
+    frozen_field = dataclasses.field if impl == "dataclasses" else lambda: semimutable.field(frozen=True)
+    # Schemas generated from files tend to repeat a limited number of shapes under many class names.
+    return [
+        (f"Record{i}", [("id", int, frozen_field()), *((f"col{j}", str) for j in range(i % N_LAYOUTS + 1))])
+        for i in range(N_CLASSES)
+    ]
+
+
+def one_by_one(impl: str):
+    make = dataclasses.make_dataclass if impl == "dataclasses" else semimutable.make_dataclass
+    for name, fields in make_schemas(impl):
+        make(name, fields)
+
+
+def batch():
+    semimutable.make_dataclasses(make_schemas("semimutable"))
+
+
+@pytest.mark.parametrize("impl", ["dataclasses", "semimutable"])
+def test_make_dataclass(benchmark, impl):
+    benchmark.group = f"make {N_CLASSES} dataclasses"
+    benchmark.pedantic(one_by_one, args=(impl,), rounds=5)
+
+
+def test_make_dataclasses(benchmark):
+    benchmark.group = f"make {N_CLASSES} dataclasses"
+    benchmark.pedantic(batch, rounds=5)
@@ -0,0 +1,26 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Per-instance memory, recorded in the ``extra_info`` of the results next to the time it takes to allocate them."""
+
+import sys
+import tracemalloc
+
+N_INSTANCES = 1_000
+
+
+def allocate(cls):
+    return [cls(i, "k", i, "l") for i in range(N_INSTANCES)]
+
+
+def test_instance_memory(benchmark, model, layout):
+    benchmark.group = f"allocate {N_INSTANCES} instances ({layout})"
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        instances = allocate(model)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list holding the instances is counted too, it is the same for every model.
+    benchmark.extra_info["traced_bytes_per_instance"] = (after - before) / len(instances)
+    benchmark.extra_info["getsizeof"] = sys.getsizeof(instances[0])
+    benchmark(allocate, model)
@@ -0,0 +1,42 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Pickling round trips with protocol 5, and shallow and deep copies."""
+
+import copy
+import pickle
+
+import pytest
+
+REPEAT = range(100)
+
+
+def round_trip(obj):
+    for _ in REPEAT:
+        pickle.loads(pickle.dumps(obj, 5))
+
+
+def copies(copier, obj):
+    for _ in REPEAT:
+        copier(obj)
+
+
+def test_pickle_round_trip(benchmark, model, layout):
+    benchmark.group = f"pickle round trip ({layout})"
+    obj = model(1, "k", 2, "l")
+    assert pickle.loads(pickle.dumps(obj, 5)) == obj
+    benchmark.extra_info["bytes"] = len(pickle.dumps(obj, 5))
+    benchmark(round_trip, obj)
+
+
+def test_pickle_list(benchmark, model, layout):
+    benchmark.group = f"pickle 1000 objects ({layout})"
+    objs = [model(i, "k", i, "l") for i in range(1000)]
+    benchmark.extra_info["bytes"] = len(pickle.dumps(objs, 5))
+    benchmark(pickle.dumps, objs, 5)
+
+
+@pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy], ids=["copy", "deepcopy"])
+def test_copy(benchmark, model, layout, copier):
+    benchmark.group = f"{copier.__name__} ({layout})"
+    obj = model(1, "k", [2], "l")
+    assert copier(obj) == obj
+    benchmark(copies, copier, obj)
@@ -0,0 +1,26 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Instance attribute reads. ``key`` is frozen on the semimutable models, ``value`` is mutable on both."""
+
+# Reading a field is a few nanoseconds, so every round does a batch of reads to keep the call overhead of the
+# benchmark harness out of the measurement.
+REPEAT = range(1_000)
+
+
+def read_key(obj):
+    for _ in REPEAT:
+        obj.key
+
+
+def read_value(obj):
+    for _ in REPEAT:
+        obj.value
+
+
+def test_frozen_field_read(benchmark, model, layout):
+    benchmark.group = f"frozen field read ({layout})"
+    benchmark(read_key, model(1, "k"))
+
+
+def test_mutable_field_read(benchmark, model, layout):
+    benchmark.group = f"mutable field read ({layout})"
+    benchmark(read_value, model(1, "k"))
@@ -0,0 +1,73 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Handing 100k records to another process, pickled as a list of instances or as `semimutable.records.SharedRecords`.
+
+The pickle round trip in the same process stands for what a ``ProcessPoolExecutor`` does with a task argument. Shared
+records only pickle the name of their block, and each process maps the block once, so the unpickling is a lookup.
+Loading the same records from a file, with pickle or `semimutable.records.open`, is compared as well.
+"""
+
+import pickle
+from pathlib import Path
+
+import pytest
+from models import SmSlots
+
+from semimutable import records as sm_records
+from semimutable.records import SharedRecords
+
+N_ROWS = 100_000
+INSTANCES = [SmSlots(i, f"key {i}", i, "l") for i in range(N_ROWS)]
+
+
+def round_trip(obj):
+    return pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+
+def read_ids(records):
+    return sum(record.id for record in records)
+
+
+@pytest.fixture(params=["list", "shared"])
+def payload(request: pytest.FixtureRequest):
+    if request.param == "list":
+        yield INSTANCES
+    else:
+        with SharedRecords(SmSlots, INSTANCES) as records:
+            yield records
+
+
+def test_send(benchmark, payload):
+    benchmark.group = f"pickle round trip of {N_ROWS} records"
+    benchmark.extra_info["pickled_bytes"] = len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+    benchmark(round_trip, payload)
+
+
+def test_scan(benchmark, payload):
+    benchmark.group = f"sum a frozen field over {N_ROWS} records"
+    assert benchmark(read_ids, payload) == sum(range(N_ROWS))
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory: pytest.TempPathFactory) -> dict[str, Path]:
+    directory = tmp_path_factory.mktemp("records")
+    files = {"pickle": directory / "records.pickle", "mapped": directory / "records.bin"}
+    files["pickle"].write_bytes(pickle.dumps(INSTANCES, pickle.HIGHEST_PROTOCOL))
+    sm_records.dump(SmSlots, INSTANCES, files["mapped"])
+    return files
+
+
+def load_pickle(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def load_mapped(path):
+    with sm_records.open(SmSlots, path) as records:
+        return records[len(records) - 1].id
+
+
+@pytest.mark.parametrize("format", ["pickle", "mapped"])
+def test_load(benchmark, files, format):
+    benchmark.group = f"load {N_ROWS} records from a file and read the last one"
+    benchmark.extra_info["file_bytes"] = files[format].stat().st_size
+    benchmark(load_pickle if format == "pickle" else load_mapped, files[format])
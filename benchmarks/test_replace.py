@@ -0,0 +1,29 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""``replace`` of a mutable field, each implementation using its own module's function."""
+
+import dataclasses
+
+import semimutable
+
+REPEAT = range(100)
+
+
+def replace_value(replace, obj):
+    for i in REPEAT:
+        replace(obj, value=i)
+
+
+def test_replace(benchmark, impl, model, layout):
+    benchmark.group = f"replace ({layout})"
+    replace = dataclasses.replace if impl == "dataclasses" else semimutable.replace
+    benchmark(replace_value, replace, model(1, "k", 2, "l"))
+
+
+def test_replace_many(benchmark, impl, model, layout):
+    """A batch of the same size as ``test_replace``, with ``replace_many`` for semimutable."""
+    benchmark.group = f"replace ({layout})"
+    objs = [model(i, "k", 2, "l") for i in REPEAT]
+    if impl == "dataclasses":
+        benchmark(lambda: [dataclasses.replace(obj, value=0) for obj in objs])
+    else:
+        benchmark(semimutable.replace_many, objs, value=0)
@@ -0,0 +1,52 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Reads and constructions spread over several threads, each thread doing the same amount of work.
+
+On a free-threaded build (``python3.13t``), the time should stay about flat as threads are added, since nothing in
+semimutable takes a lock on these paths. With the GIL it grows linearly, for the stdlib as well.
+"""
+
+import sys
+import threading
+
+import pytest
+
+WORK = range(20_000)
+
+
+def in_threads(count, work, *args):
+    threads = [threading.Thread(target=work, args=args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def reads(obj):
+    for _ in WORK:
+        obj.id
+        obj.key
+        obj.value
+
+
+def construct(cls):
+    for _ in WORK:
+        cls(1, "k", 2, "l")
+
+
+@pytest.fixture(params=[1, 2, 4, 8])
+def threads(request: pytest.FixtureRequest, benchmark) -> int:
+    # sys._is_gil_enabled() only exists on 3.13+.
+    benchmark.extra_info["gil"] = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return request.param
+
+
+@pytest.mark.parametrize("slots", [True], ids=["slots"])
+def test_reads(benchmark, model, impl, threads):
+    benchmark.group = f"read 3 fields 20k times in each of {threads} threads"
+    benchmark(in_threads, threads, reads, model(1, "k", 2, "l"))
+
+
+@pytest.mark.parametrize("slots", [True], ids=["slots"])
+def test_construction(benchmark, model, impl, threads):
+    benchmark.group = f"construct 20k times in each of {threads} threads"
+    benchmark(in_threads, threads, construct, model)
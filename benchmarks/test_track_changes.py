@@ -0,0 +1,56 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""``track_changes=True``, which records assignments to mutable fields in a bitmask, against untracked classes.
+
+Every attribute assignment goes through the ``__setattr__`` the option adds, while ``__init__`` stores the fields past it.
+"""
+
+import pytest
+from models import SmDict, SmSlots, SmTrackedDict, SmTrackedSlots
+
+import semimutable
+
+REPEAT = range(1_000)
+CLASSES = {
+    ("untracked", False): SmDict,
+    ("untracked", True): SmSlots,
+    ("tracked", False): SmTrackedDict,
+    ("tracked", True): SmTrackedSlots,
+}
+
+
+@pytest.fixture(params=["untracked", "tracked"])
+def cls(request: pytest.FixtureRequest, slots) -> type:
+    return CLASSES[request.param, slots]
+
+
+def write_value(obj):
+    for i in REPEAT:
+        obj.value = i
+
+
+def construct(cls):
+    for i in REPEAT:
+        cls(i, "k", i, "l")
+
+
+def save(obj):
+    # What a write-back layer does on each save: find the changed fields and start over.
+    for i in REPEAT:
+        obj.value = i
+        semimutable.clear_changes(obj)
+
+
+def test_mutable_write(benchmark, cls, layout):
+    benchmark.group = f"write a mutable field 1000 times ({layout})"
+    benchmark(write_value, cls(1, "k"))
+
+
+def test_construction(benchmark, cls, layout):
+    benchmark.group = f"construct 1000 instances ({layout})"
+    benchmark(construct, cls)
+
+
+@pytest.mark.parametrize("slots", [True], ids=["slots"])
+def test_write_and_clear(benchmark, layout):
+    benchmark.group = f"write a mutable field and clear the changes 1000 times ({layout})"
+    benchmark(save, SmTrackedSlots(1, "k"))
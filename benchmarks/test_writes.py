@@ -0,0 +1,14 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false
+"""Instance attribute writes to a mutable field. Frozen fields cannot be written after construction."""
+
+REPEAT = range(1_000)
+
+
+def write_value(obj):
+    for i in REPEAT:
+        obj.value = i
+
+
+def test_mutable_field_write(benchmark, model, layout):
+    benchmark.group = f"mutable field write ({layout})"
+    benchmark(write_value, model(1, "k"))
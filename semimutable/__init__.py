@@ -1,38 +1,95 @@
 """Utilities for partially-frozen dataclasses.
 
-Portions of the `freeze_fields` function are adapted from Python's standard library `dataclasses` module, which is
-licensed under the Python Software Foundation License.
+Portions of the `freeze_fields`, `_init_fn` and `make_dataclass` functions are adapted from Python's standard library `dataclasses`
+module, which is licensed under the Python Software Foundation License.
 """
 
+import collections
+import contextlib
+import copy
+import copyreg
+import dis
+import functools
+import gc
+import inspect
 import itertools
+import keyword
+import os
+import sys
+import threading
+import time
+import types
+import weakref
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from dataclasses import (
     KW_ONLY,
     MISSING,
     Field,
     FrozenInstanceError,
     InitVar,
-    asdict,
-    astuple,
     fields,
     is_dataclass,
-    make_dataclass,
-    replace,
 )
+from dataclasses import asdict as std_asdict
+from dataclasses import astuple as std_astuple
 from dataclasses import dataclass as std_dataclass
 from dataclasses import field as std_field
-from typing import TYPE_CHECKING, Any, Callable, Final, Literal, Never, Self, dataclass_transform, overload, override
+from dataclasses import replace as std_replace
+from operator import attrgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Final,
+    Literal,
+    NamedTuple,
+    Never,
+    Self,
+    dataclass_transform,
+    overload,
+    override,
+)
 
 # Type checkers hate private imports, even though this is technically legal. So we lie to them.
 if TYPE_CHECKING:
     from collections.abc import Generator
 
     _MISSING_TYPE = Never
+    _FIELD: Final[object] = object()
+    _FIELD_CLASSVAR: Final[object] = object()
+    _FIELD_INITVAR: Final[object] = object()
+    _HAS_DEFAULT_FACTORY: Final[object] = object()
+    _ATOMIC_TYPES: Final[frozenset[type]] = frozenset()
+
+    def _asdict_inner(obj: object, dict_factory: Callable[[list[tuple[str, Any]]], Any]) -> Any:
+        raise RuntimeError
+
+    def _astuple_inner(obj: object, tuple_factory: Callable[[list[Any]], Any]) -> Any:
+        raise RuntimeError
 
     # The type hints should match the actual implementation.
     def _get_slots(cls: type) -> Generator[str, None, None]:
         raise RuntimeError
+
+    def _reconstruct(x: object, memo: dict[int, Any] | None, func: Callable[..., Any], args: Any, *rest: Any) -> Any:
+        raise RuntimeError
+
+    def _remove_dead_weakref(d: dict[Any, Any], key: Any, /) -> None:
+        raise RuntimeError
 else:
-    from dataclasses import _MISSING_TYPE, _get_slots
+    from _weakref import _remove_dead_weakref
+    from copy import _reconstruct
+    from dataclasses import (
+        _ATOMIC_TYPES,
+        _FIELD,
+        _FIELD_CLASSVAR,
+        _FIELD_INITVAR,
+        _HAS_DEFAULT_FACTORY,
+        _MISSING_TYPE,
+        _asdict_inner,
+        _astuple_inner,
+        _get_slots,
+    )
 
 __version__ = "0.2.0"
 
@@ -55,10 +112,48 @@ def _get_slots(cls: type) -> Generator[str, None, None]:
 ]
 
 # Extra items for our module.
-__all__ += ["FrozenField", "FrozenFieldPlaceholder", "FrozenFieldError"]
+__all__ += ["FrozenField", "FrozenFieldPlaceholder", "FrozenFieldError", "make_dataclasses", "replace_many"]
+__all__ += ["iter_asdict", "iter_astuple"]
+__all__ += ["FrozenCached", "frozen_cached"]
+__all__ += ["InternInfo", "intern_info", "intern_clear", "intern_instance"]
+__all__ += ["from_rows", "iter_from_rows", "from_records", "iter_from_records"]
+__all__ += ["CallStats", "Instrumentation", "instrument"]
+__all__ += ["configure"]
+__all__ += ["changed_fields", "clear_changes"]
 
 # Note: This prefix CANNOT be dunder, because we used dynamic class creation it would cause name mangling issues.
 FROZEN_PREFIX: Final = "_frozen_"
+# Where the value of a frozen_cached attribute is kept once computed.
+CACHED_PREFIX: Final = "_cached_"
+# Where frozen_hash=True keeps the hash once computed.
+_HASH_CACHE: Final = CACHED_PREFIX + "__hash__"
+# Where track_changes=True keeps the bitmask of the mutable fields assigned since the last `clear_changes`.
+_CHANGES: Final = "__semimutable_changes__"
+# First item of the tuple states of `_getstate_fn`, which tells them from the ``(None, {name: value})`` pairs of slotted
+# instances pickled by earlier versions.
+_STATE_VERSION: Final = 1
+
+# Whether @semimutable.dataclass enforces frozen fields, see `configure`. Read when a class is decorated.
+_enforce = os.environ.get("SEMIMUTABLE_ENFORCE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def configure(*, enforce: bool | None = None) -> dict[str, Any]:
+    """Change the global settings of semimutable, returning the previous ones so that ``configure(**previous)`` restores them.
+
+    Args:
+        enforce: Whether frozen fields are enforced. With False, classes decorated from then on are plain stdlib
+            dataclasses: frozen fields are stored and assigned like any other field, without `FrozenField` descriptors,
+            metaclass hooks or ``_frozen_<name>`` backing attributes, so they cost nothing. ``fields()`` and their
+            metadata, ``__frozen_dataclass_descriptors__`` and features like ``frozen_hash``, ``intern``, lazy fields
+            and `frozen_cached` are unchanged. Meant for production, once tests have run with enforcement on. Defaults
+            to the ``SEMIMUTABLE_ENFORCE`` environment variable, where ``0``, ``false``, ``no`` and ``off`` turn it off.
+            Classes that were already decorated are not affected.
+    """
+    global _enforce
+    previous = {"enforce": _enforce}
+    if enforce is not None:
+        _enforce = enforce
+    return previous
 
 
 class FrozenFieldError(TypeError):
@@ -68,31 +163,59 @@ def __init__(self, field_name: str) -> None:
         super().__init__(f"Cannot modify frozen field '{field_name}'.")
 
 
-class FrozenField[T]:
-    """A descriptor that makes an attribute immutable after it has been set."""
+class FrozenField[T](property):
+    """A descriptor that makes an attribute immutable after it has been set.
 
-    __slots__ = ("_private_name",)
+    The value lives in a hidden ``_frozen_<name>`` slot or ``__dict__`` entry. Reads are served by :class:`property`
+    with an :func:`operator.attrgetter` getter, both implemented in C, so reading a frozen field never enters a Python
+    frame. Only writes, which are rare after construction, call back into Python to enforce the write-once rule.
+    The value of a ``lazy`` field is computed on first read and can never be assigned.
+    """
 
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, *, lazy: bool = False) -> None:
         self._private_name = FROZEN_PREFIX + name
+        setter = self._set_lazy if lazy else self._set_once
+        super().__init__(attrgetter(self._private_name), setter, doc=f"Frozen field {name!r}.")
+        _register_property(self)
 
-    @overload
-    def __get__(self, instance: None, owner: type[object]) -> Self: ...
+    if TYPE_CHECKING:
+        # property.__get__ and property.__set__ are what actually run, these only refine the types for type checkers.
+        @overload
+        def __get__(self, instance: None, owner: type[object], /) -> Self: ...
 
-    @overload
-    def __get__(self, instance: object, owner: type[object]) -> T: ...
+        @overload
+        def __get__(self, instance: object, owner: type[object] | None = None, /) -> T: ...
 
-    def __get__(self, instance: object | None, owner: type[object] | None = None) -> T | Self:
-        if instance is None:
-            return self
-        value = getattr(instance, self._private_name)
-        return value
+        @override
+        def __get__(self, instance: object | None, owner: type[object] | None = None, /) -> T | Self: ...
+
+        @override
+        def __set__(self, instance: object, value: T, /) -> None: ...
+
+    def _set_once(self, instance: object, value: T) -> None:
+        # Checking and writing under the lock of the instance, two threads can't both find the field unset. The check
+        # reads the storage itself, as a missing value must not fall back to a __getattr__.
+        with _write_lock(instance):
+            try:
+                object.__getattribute__(instance, self._private_name)
+            except AttributeError:
+                object.__setattr__(instance, self._private_name, value)
+                return
+        raise FrozenFieldError(self._private_name[len(FROZEN_PREFIX) :])
+
+    def _set_lazy(self, instance: object, value: T) -> None:
+        raise FrozenFieldError(self._private_name[len(FROZEN_PREFIX) :])
+
+
+# Locks for the writes of frozen fields and cached values that happen after construction. Objects are spread over them
+# by address, so that threads writing to different objects rarely wait for each other, without a lock per object.
+_WRITE_LOCKS: Final = tuple(threading.Lock() for _ in range(64))
 
-    def __set__(self, instance: object, value: T) -> None:
-        if hasattr(instance, self._private_name):
-            raise FrozenFieldError(self._private_name[len(FROZEN_PREFIX) :]) from None
 
-        setattr(instance, self._private_name, value)
+def _write_lock(obj: object) -> threading.Lock:
+    """The lock of `_WRITE_LOCKS` guarding the write-once attributes of ``obj``."""
+    # Objects are at least 16-byte aligned, the low bits of their address carry no information.
+    return _WRITE_LOCKS[(id(obj) >> 4) % len(_WRITE_LOCKS)]
 
 
 error = RuntimeError(
@@ -117,6 +240,53 @@ def __getattribute__(self, name: str, /) -> Never:
         raise error
 
 
+class FrozenCached[T](property):
+    """A read-only attribute computed from the frozen fields of an instance on first access, created by `frozen_cached`.
+
+    Like `FrozenField`, it is a :class:`property` whose getter is an :func:`operator.attrgetter` of a hidden
+    ``_cached_<name>`` slot or ``__dict__`` entry, so once the value is cached, reading it never enters a Python frame.
+    Before that, the lookup of the hidden attribute falls back to the ``__getattr__`` that @semimutable.dataclass
+    installs, which computes and stores the value.
+    """
+
+    def __init__(self, func: Callable[[Any], T]) -> None:
+        self.func = func
+        self._name = func.__name__
+        super().__init__(attrgetter(CACHED_PREFIX + self._name), self._set, doc=func.__doc__)
+        _register_property(self)
+
+    if TYPE_CHECKING:
+
+        @overload
+        def __get__(self, instance: None, owner: type[object], /) -> Self: ...
+
+        @overload
+        def __get__(self, instance: object, owner: type[object] | None = None, /) -> T: ...
+
+        @override
+        def __get__(self, instance: object | None, owner: type[object] | None = None, /) -> T | Self: ...
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        if name != self._name:
+            raise TypeError(f"frozen_cached {self._name!r} cannot be assigned to a different name ({name!r})")
+
+    def _set(self, instance: object, value: T) -> None:
+        raise FrozenFieldError(self._name)
+
+
+def frozen_cached[T](func: Callable[[Any], T]) -> FrozenCached[T]:
+    """Turn a method into an attribute that is computed once per instance, the first time it is read.
+
+    The function may only read frozen fields of ``self``, since those are the only ones that cannot change after the
+    value is cached. @semimutable.dataclass checks the plain ``self.<name>`` reads of the function, and raises TypeError
+    if one of them is a mutable field. Only those reads are checked: a mutable field read with ``getattr(self, name)``,
+    through another method or property, or by a function ``self`` is passed to goes unnoticed, and the cached value
+    then does not follow later assignments to that field. For slotted classes, a slot is reserved for the cached value. Like a frozen
+    field, the attribute cannot be assigned. `replace` computes it again for the new instance when needed.
+    """
+    return FrozenCached(func)
+
+
 @overload
 def field[_T](
     *,
@@ -162,6 +332,21 @@ def field(
 ) -> Any: ...
 
 
+@overload
+def field[_T](
+    *,
+    default: _MISSING_TYPE = MISSING,  # type: ignore
+    default_factory: _MISSING_TYPE = MISSING,  # type: ignore
+    repr: bool = True,
+    hash: bool | None = None,
+    compare: bool = True,
+    frozen: Literal[True],
+    lazy: Callable[[Any], _T],
+    metadata: dict[str, Any] | None = None,
+    kw_only: _MISSING_TYPE = MISSING,  # type: ignore
+) -> _T: ...
+
+
 def field(
     *,
     default: Any = MISSING,
@@ -171,13 +356,26 @@ def field(
     hash: bool | None = None,
     compare: bool = True,
     frozen: bool = False,
+    lazy: Callable[[Any], Any] | None = None,
     metadata: dict[str, Any] | None = None,
     kw_only: bool | _MISSING_TYPE = MISSING,  # type: ignore
 ) -> Any:
-    """Like :func:`dataclasses.field` but marks the field as frozen when requested."""
+    """Like :func:`dataclasses.field` but marks the field as frozen when requested.
+
+    A frozen field can be ``lazy``: it is then not a parameter of ``__init__``, and ``lazy(self)`` computes its value the
+    first time it is read. From then on it is stored and immutable like any other frozen field.
+    """
 
+    if lazy is not None:
+        if not frozen:
+            raise ValueError("lazy requires frozen=True")
+        if default is not MISSING or default_factory is not MISSING:
+            raise ValueError("cannot specify both lazy and a default")
+        init = False
     if frozen:
         metadata = (metadata or {}) | {"frozen": True}
+        if lazy is not None:
+            metadata["lazy"] = lazy
         return FrozenFieldPlaceholder(
             default=default,
             default_factory=default_factory,
@@ -202,19 +400,34 @@ def field(
 
 
 def _freeze_fields[T](
-    cls: type[T], *, classvar_frozen_assignment: Literal["patch", "replace", "error"] = "patch"
+    cls: type[T],
+    *,
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    slots: bool = False,
+    weakref_slot: bool = False,
+    frozen_hash: bool = False,
+    intern: bool = False,
+    track_changes: bool = False,
+    enforce: bool = True,
 ) -> type[T]:
     """
     A decorator that makes fields of a dataclass immutable, if they have the `frozen` metadata set to True.
 
-    This is done by replacing the fields with FrozenField descriptors.
+    This is done by replacing the fields with FrozenField descriptors. The class is rebuilt at most once, with its final
+    metaclass and slot layout, so `cls` should be created by `dataclasses.dataclass` with ``slots=False``.
 
     Args:
         cls: The class to make immutable, must be a dataclass.
         classvar_frozen_assignment: The behaviour of frozen fields when you try to assign to the same name in the class body.
+        slots: Whether to add ``__slots__``, as the ``slots`` parameter of `dataclasses.dataclass` does.
+        weakref_slot: Whether to add a ``__weakref__`` slot, as the ``weakref_slot`` parameter of `dataclasses.dataclass` does.
+        frozen_hash: Whether to add a slot for the hash cached by ``frozen_hash=True``, if ``slots`` is True.
+        intern: Whether to give the class a metaclass that lets ``intern=True`` return existing instances.
+        track_changes: Whether to record assignments to mutable fields, with the ``__setattr__`` of `_tracking_setattr`.
+        enforce: Whether to enforce frozen fields at all. If False, they are left as plain fields, see `configure`.
 
     Raises:
-        TypeError: If cls is not a dataclass
+        TypeError: If cls is not a dataclass, or if ``slots`` is True and cls already specifies __slots__.
 
     See Also:
         - `semimutable.dataclass`: Elaborates on what classvar_frozen_assignment does.
@@ -225,167 +438,1685 @@ def _freeze_fields[T](
         raise TypeError(f"{cls} is not a dataclass")
 
     params = getattr(cls, "__dataclass_params__")
+    cached = {name: value for name, value in cls.__dict__.items() if isinstance(value, FrozenCached)}
     # _DataclassParams(init=True,repr=True,eq=True,order=True,unsafe_hash=False,
     #                   frozen=True,match_args=True,kw_only=False,slots=False,
     #                   weakref_slot=False)
     if params.frozen:
+        if cached:
+            raise TypeError(f"{cls.__name__} is frozen, use functools.cached_property instead of frozen_cached")
+        if any("lazy" in f.metadata for f in cls_fields.values()):
+            raise TypeError(f"{cls.__name__} is frozen, use functools.cached_property instead of a lazy field")
         return cls
 
-    if classvar_frozen_assignment == "replace":  # We don't need to do anything special, just return the class.
-        new_cls = cls
-    else:
+    # Frozen fields are those with "frozen" in their metadata, as set by field(frozen=True).
+    cls_field_list = fields(cls)  # pyright: ignore[reportArgumentType]  # cls must be a dataclass
+    frozen_names = {f.name for f in cls_field_list if "frozen" in f.metadata}
+    mutable_names = {f.name for f in cls_field_list} - frozen_names
+    for name, value in cached.items():
+        if mutable := sorted(_self_attribute_reads(value.func) & mutable_names):
+            raise TypeError(f"frozen_cached {name!r} of {cls.__name__} reads the mutable field {mutable[0]!r}")
+
+    # The frozen fields that get a FrozenField descriptor and a `_frozen_<name>` backing attribute.
+    stored_names = frozen_names if enforce else set[str]()
+    metacls: type[type[T]] = cls.__class__  # type: ignore  # typeshed bug, should be type[object] but it is annotated as property
+    if classvar_frozen_assignment == "replace" or not stored_names:
+        # We don't need a new metaclass, the class can keep its own. Without frozen fields there is nothing to hook,
+        # subclasses that add some get their metaclass when they are decorated.
+        new_meta: type[type[T]] = metacls
+    elif classvar_frozen_assignment == "descriptor":
+        # Data descriptors on the metaclass take precedence over the class's own attributes, so a property per frozen
+        # field is enough to redirect `cls.name` to the hidden variable, without touching any other attribute access.
+        # A subclass only needs properties for the frozen fields its parents' metaclasses do not cover yet, which keeps
+        # the metaclass of a subclass that adds no frozen field identical to the one of its parent.
+        missing = frozenset(frozen_names).difference(
+            *(vars(meta) for meta in metacls.__mro__ if _GENERATED_METACLASSES.get(meta) == "descriptor")
+        )
+        new_meta = _descriptor_metaclass(metacls, missing) if missing else metacls
+    elif classvar_frozen_assignment in ("patch", "error"):
         # For "patch" and "error", we need to replace the metaclass's __getattribute__ and __setattr__ methods to hook
         # into the class variable assignment and retrieval for frozen fields. Either to patch the class variable assignment
         # to a hidden variable, or to raise an error if the field is frozen and the class variable is assigned to.
-        metacls: type[type[T]] = cls.__class__  # type: ignore  # typeshed bug, should be type[object] but it is annotated as property
-        # The following two methods are unbound methods despite what pyright says.
-        orig_meta_getattribute = metacls.__getattribute__
-        orig_meta_setattr = metacls.__setattr__
-
-        if classvar_frozen_assignment == "patch":
-
-            def meta_getattribute(cls: type[T], name: str) -> Any:
-                try:
-                    descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
-                    if name in descriptor_vars:
-                        return orig_meta_getattribute(cls, "__cls_var_" + name)
-                except AttributeError:
-                    # If the class does not have __frozen_dataclass_descriptors__, we can just return the original attribute
-                    pass
-                return orig_meta_getattribute(cls, name)
-
-            def meta_setattr(cls: type[T], name: str, value: Any) -> None:
-                # If the name is a frozen field, we need to set it on another attribute
-                try:
-                    descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
-                    if name in descriptor_vars:
-                        return orig_meta_setattr(cls, "__cls_var_" + name, value)
-                except AttributeError:
-                    # If the class does not have __frozen_dataclass_descriptors__, we can just set on the original attribute
-                    pass
-                return orig_meta_setattr(cls, name, value)
-
-        elif classvar_frozen_assignment == "error":
-
-            def meta_getattribute(cls: type[T], name: str) -> Any:
-                try:
-                    descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
-                    if name in descriptor_vars:
-                        raise FrozenFieldError(name)
-                except AttributeError:
-                    # If the class does not have __frozen_dataclass_descriptors__, we can just return the original attribute
-                    pass
-                return orig_meta_getattribute(cls, name)
-
-            def meta_setattr(cls: type[T], name: str, value: Any) -> None:
-                # If the name is a frozen field, we need to set it on another attribute
-                try:
-                    descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
-                    if name in descriptor_vars:
-                        raise FrozenFieldError(name)
-                except AttributeError:
-                    # If the class does not have __frozen_dataclass_descriptors__, we can just set on the original attribute
-                    pass
-                return orig_meta_setattr(cls, name, value)
-
-        else:
-            raise ValueError(f"Invalid classvar_frozen_assignment value: {classvar_frozen_assignment!r}")
-
-        # Create a new metaclass that overrides __getattribute__ to allow setting class variables on frozen fields descriptors
-        # We cannot just set metacls.__getattribute__ because it would override the original __getattribute__ of the class,
-        # changing the behavior of all classes that use this metaclass.
-        # It would be very bad if we patched type.__getattribute__ by accident.
-        #
-        # Even if we patched it in a way where it only modifies the behaviour if and only if the object is one of the registered
-        # frozen dataclasses, it would likely cause slowdowns in the interpreter, as it would have to check every time any
-        # object attribute is accessed whether it is a frozen dataclass or not, and the function is changed from a fast C function
-        # to a Python function.
-        #
-        # Caveat: This would trigger the metaclass's __init_subclass__ method, which is not ideal, but it should not be common
-        # to have a metaclass with __init_subclass__. Even if it has one, it is probably less surprising to have it triggered without
-        # the user knowing here, than to patch it temporarily and then patch it back.
-        new_meta: type[type[T]] = type(
-            "FreezableDataclassMeta", (metacls,), {"__getattribute__": meta_getattribute, "__setattr__": meta_setattr}
-        )  # pyright: ignore[reportAssignmentType] # pyright does not understand subclass relationships well in this usage of type()
-
-        # If either of the following is true, we need to create a new class:
-        #
-        # 1. If slots are used, we need create a new class with more entries in __slots__ to allow the FrozenField
-        # descriptors to work properly. This is because we need private instance variables for the FrozenField descriptors
-        # to work.
-        #
-        # 2. If the class does not have a custom metaclass, we need to create a new class with a custom metaclass that
-        # overrides __getattribute__ to allow setting class variables on frozen fields descriptors.
-        # This seems to be because `type` is an immutable class.
-        needs_new_class = False
+        new_meta = _hooked_metaclass(metacls, classvar_frozen_assignment)
+    else:
+        raise ValueError(f"Invalid classvar_frozen_assignment value: {classvar_frozen_assignment!r}")
+    if intern:
+        # Only the metaclass can return an existing instance from `cls(...)` without running __init__ on it again.
+        new_meta = _interning_metaclass(new_meta)
+
+    # A class whose metaclass is `type` is immutable, so its metaclass can never be swapped. With slots, the class is
+    # rebuilt anyway.
+    if new_meta is not metacls and metacls is not type and not slots and classvar_frozen_assignment != "descriptor":
         # See if we can just directly swap the class's metaclass, if so we can avoid creating a new class.
         try:
             cls.__class__ = new_meta  # pyright: ignore[reportAttributeAccessIssue]
         except TypeError:
-            # TypeError: __class__ assignment only supported for mutable types or ModuleType subclasses
-            # Not sure what this means, but creating a new class is the only way to go.
-            needs_new_class = True
+            # TypeError: __class__ assignment only supported for mutable types or ModuleType subclasses, or the
+            # layouts of the metaclasses differ. Creating a new class with the new metaclass is the only way to go.
+            pass
 
-        cls_dict = dict(cls.__dict__)
-        # This if block is mostly copied from dataclasses._process_class, but with extra handling for frozen fields.
-        # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    # This has 2 purposes:
+    # 1. It caches the name of the frozen fields, so we can access them later in the metaclass's __getattribute__ and
+    # __setattr__ methods. Avoiding an isinstance check on every attribute access.
+    # 2. It allows external code to check if a class is a freezable dataclass, by checking if it has the
+    # __frozen_dataclass_descriptors__ attribute.
+    # The FrozenField descriptors replace the frozen fields. Like __frozen_dataclass_descriptors__, they go straight into
+    # the namespace of the new class, because assigning them afterwards would be intercepted by the metaclass hooks of
+    # "patch" and "descriptor".
+    namespace: dict[str, Any] = {
+        name: FrozenField(name, lazy="lazy" in cls_fields[name].metadata) for name in stored_names
+    }
+    namespace["__frozen_dataclass_descriptors__"] = frozen_names
+    namespace["__semimutable_enforced__"] = enforce
+    if cached or any("lazy" in f.metadata for f in cls_field_list):
+        namespace["__getattr__"] = _lazy_getattr(cls, stored_names)
+    if track_changes:
+        change_bits = {f.name: 1 << i for i, f in enumerate(f for f in cls_field_list if f.name in mutable_names)}
+        namespace["__semimutable_change_bits__"] = change_bits
+        namespace["__setattr__"] = _tracking_setattr(cls, change_bits)
+
+    # If slots are used, we need to create a new class, as __slots__ cannot be changed after class creation. The same
+    # goes for a new metaclass that could not be swapped in.
+    if not slots and new_meta is cls.__class__:
+        # If we don't need a new class, we can just use the original class
+        for name, value in namespace.items():
+            type.__setattr__(cls, name, value)
+        return cls
+
+    cls_dict = dict(cls.__dict__)
+    # The FrozenField descriptor takes over the name of a frozen field, so its value is kept in a `_frozen_<name>` slot
+    # instead. Mutable fields keep their own slot, so the layout has exactly as many slots as the stdlib one.
+    #
+    # This if block is mostly copied from dataclasses._process_class, but with extra handling for frozen fields.
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    if slots:
+        # Make sure __slots__ isn't already set.
         if "__slots__" in cls.__dict__:
-            needs_new_class = True
-            field_names = tuple(f.name for f in fields(cls))  # pyright: ignore[reportArgumentType]  # cls must be a dataclass
-            # Make sure slots don't overlap with those in base classes.
-            inherited_slots = set(itertools.chain.from_iterable(map(_get_slots, cls.__mro__[1:-1])))
-            # The slots for our class.  Remove slots from our base classes.  Add
-            # '__weakref__' if weakref_slot was given, unless it is already present.
-            cls_dict["__slots__"] = tuple(
-                itertools.filterfalse(
-                    inherited_slots.__contains__,
-                    itertools.chain(
-                        # gh-93521: '__weakref__' also needs to be filtered out if
-                        # already present in inherited_slots
-                        field_names,
-                        ("__weakref__",) if params.weakref_slot else (),
-                    ),
+            raise TypeError(f"{cls.__name__} already specifies __slots__")
+
+        field_names = tuple(f.name for f in cls_field_list)
+        # Make sure slots don't overlap with those in base classes.
+        inherited_slots = set(itertools.chain.from_iterable(map(_get_slots, cls.__mro__[1:-1])))
+        # The slots for our class.  Remove slots from our base classes.  Add
+        # '__weakref__' if weakref_slot was given, unless it is already present.
+        cls_dict["__slots__"] = tuple(
+            itertools.filterfalse(
+                inherited_slots.__contains__,
+                itertools.chain(
+                    # gh-93521: '__weakref__' also needs to be filtered out if
+                    # already present in inherited_slots
+                    (FROZEN_PREFIX + name if name in stored_names else name for name in field_names),
+                    (CACHED_PREFIX + name for name in cached),
+                    (_HASH_CACHE,) if frozen_hash else (),
+                    (_CHANGES,) if track_changes else (),
+                    ("__weakref__",) if weakref_slot else (),
                 ),
+            ),
+        )
+
+        for field_name in field_names:
+            # Remove our attributes, if present. They'll still be available in _MARKER.
+            cls_dict.pop(field_name, None)
+
+    # Remove __dict__ itself.
+    cls_dict.pop("__dict__", None)
+
+    # Clear existing `__weakref__` descriptor, it belongs to a previous type:
+    cls_dict.pop("__weakref__", None)  # gh-102069
+    # End of copied block from dataclasses._process_class
+
+    # And finally create the class.
+    qualname = getattr(cls, "__qualname__", None)
+    new_cls = new_meta(cls.__name__, cls.__bases__, cls_dict | namespace)  # pyright: ignore[reportCallIssue]
+    if qualname is not None:
+        new_cls.__qualname__ = qualname
+    if slots:
+        params.slots = True
+        params.weakref_slot = weakref_slot
+    return new_cls
+
+
+def _tracking_setattr(cls: type, change_bits: dict[str, int]) -> Callable[[Any, str, Any], None]:
+    """The ``__setattr__`` of a ``track_changes=True`` class, setting the bit of a mutable field when it is assigned.
+
+    The bit is set after the value is stored, so a `clear_changes` that misses the bit leaves it for the next one. Bits
+    that are already set are left alone without taking `_write_lock`, so only the first assignment of a field since the
+    last `clear_changes` waits for the lock, which keeps threads assigning different fields of an instance at the same
+    time from losing each other's bits.
+    """
+    get_bit = change_bits.get
+    object_setattr = object.__setattr__
+
+    def __setattr__(self: Any, name: str, value: Any) -> None:
+        object_setattr(self, name, value)
+        bit = get_bit(name)
+        if bit is not None and not getattr(self, _CHANGES, 0) & bit:
+            with _write_lock(self):
+                object_setattr(self, _CHANGES, getattr(self, _CHANGES, 0) | bit)
+
+    __setattr__.__qualname__ = f"{cls.__qualname__}.__setattr__"
+    return __setattr__
+
+
+def _change_bits(cls: type) -> dict[str, int] | None:
+    """The bit of each mutable field of a ``track_changes=True`` class in its bitmask, or None for other classes."""
+    return next(
+        (
+            vars(base)["__semimutable_change_bits__"]
+            for base in cls.__mro__
+            if "__semimutable_change_bits__" in vars(base)
+        ),
+        None,
+    )
+
+
+def _self_attribute_reads(func: Callable[..., Any]) -> set[str]:
+    """The names of the attributes ``func`` reads as ``<first argument>.<name>``, in nested functions too."""
+    code = func.__code__
+    if not code.co_argcount:
+        raise TypeError(f"frozen_cached {func.__name__!r} must take the instance as its first argument")
+    self_name = code.co_varnames[0]
+    names: set[str] = set()
+
+    def scan(code: types.CodeType) -> None:
+        loads_self = False
+        for instruction in dis.get_instructions(code):
+            if instruction.opname == "LOAD_ATTR" and loads_self:
+                names.add(instruction.argval)
+            # Since 3.13, self may be loaded together with another local by one instruction, whose argval is the pair of
+            # names. The opname of that instruction varies between versions, its argval does not.
+            last_loaded = instruction.argval[-1] if isinstance(instruction.argval, tuple) else instruction.argval
+            loads_self = instruction.opname.startswith(("LOAD_FAST", "LOAD_DEREF")) and last_loaded == self_name
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                scan(const)
+
+    scan(code)
+    return names
+
+
+def _lazy_getattr(cls: type, stored_names: set[str]) -> Callable[[Any, str], Any]:
+    """The ``__getattr__`` that computes and stores the `FrozenCached` attributes and lazy fields of ``cls``.
+
+    The getter of a `FrozenCached` reads its ``_cached_<name>`` storage, and that of a lazy `FrozenField` its
+    ``_frozen_<name>`` storage, or the field itself if it is not in ``stored_names``. The lookup of an empty slot or a
+    missing ``__dict__`` entry falls back to ``__getattr__`` with that storage name. That is where the value is computed,
+    so it is returned to the getter as if it had been there all along, without raising anything. Other names go to the
+    ``__getattr__`` ``cls`` already had, if any.
+    """
+    funcs = {
+        CACHED_PREFIX + name: value.func
+        for base in reversed(cls.__mro__)
+        for name, value in vars(base).items()
+        if isinstance(value, FrozenCached)
+    }
+    funcs.update(
+        (FROZEN_PREFIX + f.name if f.name in stored_names else f.name, f.metadata["lazy"])
+        for f in fields(cls)  # pyright: ignore[reportArgumentType]
+        if "lazy" in f.metadata
+    )
+    previous: Callable[[Any, str], Any] | None = getattr(cls, "__getattr__", None)
+
+    def __getattr__(self: Any, name: str) -> Any:
+        func = funcs.get(name)
+        if func is None:
+            if previous is not None:
+                return previous(self, name)
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}", name=name, obj=self)
+        # Computed outside of the lock, like __post_init__ for intern=True, so that the function can't deadlock. If
+        # another thread stored a value meanwhile, that one is kept, so every reader sees the same value.
+        value = func(self)
+        with _write_lock(self):
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                object.__setattr__(self, name, value)
+        return value
+
+    __getattr__.__qualname__ = f"{cls.__qualname__}.__getattr__"
+    return __getattr__
+
+
+def _class_var_property(name: str) -> property:
+    """A metaclass property that redirects the class variable ``name`` to ``__cls_var_<name>``, like "patch" does.
+
+    Being a data descriptor of the metaclass, the property takes precedence over the ``__dict__`` of the class and its
+    bases. So without a class variable set, reads walk the MRO themselves, like the plain lookup "patch" falls back to:
+    the first class that has ``name`` in its ``__dict__``, other than as a `FrozenField`, provides the value. That is
+    how a subclass that redefines ``name`` as a mutable field with a default reads that default. Without any, the read
+    returns the first `FrozenField`, as it does with "patch".
+    """
+    hidden_name = "__cls_var_" + name
+    get_hidden = attrgetter(hidden_name)
+
+    def fget(cls: type) -> Any:
+        try:
+            return get_hidden(cls)
+        except AttributeError:
+            pass
+        frozen_field: FrozenField[Any] | None = None
+        for base in cls.__mro__:
+            base_vars = vars(base)
+            if name not in base_vars:
+                continue
+            value = base_vars[name]
+            if not isinstance(value, FrozenField):
+                get = getattr(type(value), "__get__", None)
+                return value if get is None else get(value, None, cls)
+            frozen_field = frozen_field or value
+        if frozen_field is not None:
+            return frozen_field
+        raise AttributeError(f"type object {cls.__name__!r} has no attribute {name!r}", name=name, obj=cls)
+
+    def fset(cls: type, value: Any) -> None:
+        setattr(cls, hidden_name, value)
+
+    def fdel(cls: type) -> None:
+        delattr(cls, hidden_name)
+
+    return property(fget, fset, fdel)
+
+
+# Maps every metaclass generated by this module to the classvar_frozen_assignment mode it implements, or to "intern".
+# Generated metaclasses are cached and never freed, so plain references are fine here.
+_GENERATED_METACLASSES: dict[type, str] = {}
+# Held while a metaclass is generated. Reentrant, as creating one runs the __init_subclass__ of its base.
+_METACLASS_LOCK: Final = threading.RLock()
+
+
+def _metaclass_cache[**P, R](factory: Callable[P, R]) -> Callable[P, R]:
+    """Cache ``factory`` like :func:`functools.cache`, but never run it twice for the same arguments.
+
+    `functools.cache` doesn't hold a lock while the function runs, so threads decorating classes at the same time could
+    each generate a metaclass for the same arguments, and a class inheriting from two of their classes would then fail
+    with a metaclass conflict. Only class creation takes the lock, the metaclasses themselves run without it.
+    """
+    cached = functools.cache(factory)
+
+    @functools.wraps(factory)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with _METACLASS_LOCK:
+            return cached(*args, **kwargs)
+
+    return wrapper
+
+
+@_metaclass_cache
+def _descriptor_metaclass[M: type](metacls: type[M], frozen_names: frozenset[str]) -> type[M]:
+    """Create the metaclass used by ``classvar_frozen_assignment="descriptor"``.
+
+    Cached, so that all classes with the same metaclass and frozen field names share a single generated metaclass.
+    """
+    namespace = {name: _class_var_property(name) for name in frozen_names}
+    new_meta = type("FreezableDataclassMeta", (metacls,), namespace)
+    _register_metaclass(new_meta, "descriptor")
+    return new_meta  # pyright: ignore[reportReturnType]
+
+
+@_metaclass_cache
+def _hooked_metaclass[M: type](metacls: type[M], mode: str) -> type[M]:
+    """Create the metaclass used by ``classvar_frozen_assignment="patch"`` and ``"error"``.
+
+    The hooks read the frozen field names from the class itself, so one metaclass per (metaclass, mode) pair serves
+    every class. If ``metacls`` was already generated for ``mode``, e.g. for the parent of a subclass, it is returned
+    as is. Otherwise the hooks call straight into the first metaclass in the MRO that was not generated here, so a
+    class attribute lookup goes through at most one Python-level hook however deep the class hierarchy is.
+
+    The hooks keep no state: they read the frozen field names, which never change once the class is decorated, and
+    make a single attribute read or write. So concurrent class attribute accesses need no lock, on free-threaded builds
+    too.
+    """
+    if _GENERATED_METACLASSES.get(metacls) == mode:
+        return metacls
+
+    root_meta = next(meta for meta in inspect.getmro(metacls) if meta not in _GENERATED_METACLASSES)
+    # The following two methods are unbound methods despite what pyright says.
+    orig_meta_getattribute: Callable[[type, str], Any] = root_meta.__getattribute__  # pyright: ignore[reportAssignmentType]
+    orig_meta_setattr: Callable[[type, str, Any], None] = root_meta.__setattr__  # pyright: ignore[reportAssignmentType]
+
+    if mode == "patch":
+
+        def meta_getattribute(cls: type, name: str) -> Any:
+            try:
+                descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
+                if name in descriptor_vars:
+                    return orig_meta_getattribute(cls, "__cls_var_" + name)
+            except AttributeError:
+                # If the class does not have __frozen_dataclass_descriptors__, we can just return the original attribute
+                pass
+            return orig_meta_getattribute(cls, name)
+
+        def meta_setattr(cls: type, name: str, value: Any) -> None:
+            # If the name is a frozen field, we need to set it on another attribute
+            try:
+                descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
+                if name in descriptor_vars:
+                    return orig_meta_setattr(cls, "__cls_var_" + name, value)
+            except AttributeError:
+                # If the class does not have __frozen_dataclass_descriptors__, we can just set on the original attribute
+                pass
+            return orig_meta_setattr(cls, name, value)
+
+    elif mode == "error":
+
+        def meta_getattribute(cls: type, name: str) -> Any:
+            try:
+                descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
+                if name in descriptor_vars:
+                    raise FrozenFieldError(name)
+            except AttributeError:
+                # If the class does not have __frozen_dataclass_descriptors__, we can just return the original attribute
+                pass
+            return orig_meta_getattribute(cls, name)
+
+        def meta_setattr(cls: type, name: str, value: Any) -> None:
+            # If the name is a frozen field, we need to set it on another attribute
+            try:
+                descriptor_vars = orig_meta_getattribute(cls, "__frozen_dataclass_descriptors__")
+                if name in descriptor_vars:
+                    raise FrozenFieldError(name)
+            except AttributeError:
+                # If the class does not have __frozen_dataclass_descriptors__, we can just set on the original attribute
+                pass
+            return orig_meta_setattr(cls, name, value)
+
+    else:
+        raise ValueError(f"Invalid classvar_frozen_assignment value: {mode!r}")
+
+    # Create a new metaclass that overrides __getattribute__ to allow setting class variables on frozen fields descriptors
+    # We cannot just set metacls.__getattribute__ because it would override the original __getattribute__ of the class,
+    # changing the behavior of all classes that use this metaclass.
+    # It would be very bad if we patched type.__getattribute__ by accident.
+    #
+    # Even if we patched it in a way where it only modifies the behaviour if and only if the object is one of the registered
+    # frozen dataclasses, it would likely cause slowdowns in the interpreter, as it would have to check every time any
+    # object attribute is accessed whether it is a frozen dataclass or not, and the function is changed from a fast C function
+    # to a Python function.
+    #
+    # The new metaclass still subclasses metacls rather than root_meta, as the metaclass of a subclass must derive from
+    # the metaclasses of all its bases.
+    #
+    # Caveat: This would trigger the metaclass's __init_subclass__ method, which is not ideal, but it should not be common
+    # to have a metaclass with __init_subclass__. Even if it has one, it is probably less surprising to have it triggered without
+    # the user knowing here, than to patch it temporarily and then patch it back.
+    new_meta = type(
+        "FreezableDataclassMeta", (metacls,), {"__getattribute__": meta_getattribute, "__setattr__": meta_setattr}
+    )
+    _register_metaclass(new_meta, mode)
+    return new_meta  # pyright: ignore[reportReturnType]
+
+
+@_metaclass_cache
+def _interning_metaclass[M: type](metacls: type[M]) -> type[M]:
+    """Create the metaclass used by ``intern=True``, whose ``__call__`` hands construction over to the class's interner.
+
+    Like `_hooked_metaclass`, one metaclass per metaclass serves every class, and ``metacls`` is returned as is if it
+    already derives from one. Subclasses inherit the metaclass and the interner, but the interner only serves the class
+    it was made for, so that a subclass is only interned if it asked for it, with its own cache.
+    """
+    if any(_GENERATED_METACLASSES.get(meta) == "intern" for meta in inspect.getmro(metacls)):
+        return metacls
+
+    root_meta = next(meta for meta in inspect.getmro(metacls) if meta not in _GENERATED_METACLASSES)
+    orig_meta_call: Callable[..., Any] = root_meta.__call__
+    # Skips the metaclass hooks of "patch" and "error". Every class with this metaclass inherits an interner.
+    type_getattribute = type.__getattribute__
+
+    def meta_call(cls: type, /, *args: Any, **kwargs: Any) -> Any:
+        interner: _Interner = type_getattribute(cls, "__semimutable_interner__")
+        if interner.cls is not cls:
+            return orig_meta_call(cls, *args, **kwargs)
+        return interner.call(cls, *args, **kwargs)
+
+    new_meta = type("FreezableDataclassMeta", (metacls,), {"__call__": meta_call})
+    _register_metaclass(new_meta, "intern")
+    return new_meta  # pyright: ignore[reportReturnType]
+
+
+class CallStats(NamedTuple):
+    """How many times an operation ran on one class, and for how long in total, as reported by `Instrumentation`."""
+
+    calls: int
+    seconds: float
+
+
+class Instrumentation:
+    """Counts the Python-level work semimutable does, per class, while started. Created by `instrument`.
+
+    The events are:
+
+    - ``"get"`` and ``"set"``: reads and writes of a frozen field on an instance.
+    - ``"class_get"`` and ``"class_set"``: class attribute reads and writes intercepted by the metaclass of
+      ``classvar_frozen_assignment="patch"`` or ``"error"``. Every class attribute access of such a class is one.
+    - ``"error"``: a `FrozenFieldError` raised by one of the above, or by assigning to a `frozen_cached` attribute.
+
+    With ``timing``, the time spent in each operation is added up as well, including the ``time.perf_counter`` calls
+    that measure it. Events of every thread are counted.
+
+    Instrumentation costs nothing while stopped: starting it swaps instrumented versions into the existing
+    descriptors and metaclasses, and stopping it swaps the originals back. Only one instrumentation can run at a time.
+    """
+
+    __slots__ = ("timing", "_local", "_tables", "_lock", "_restore")
+
+    def __init__(self, *, timing: bool = False) -> None:
+        self.timing = timing
+        self._local = threading.local()
+        # One table per thread, so that counting needs no lock.
+        self._tables: list[dict[tuple[type, str], list[Any]]] = []
+        self._lock = threading.Lock()
+        self._restore: list[Callable[[], None]] = []
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start counting. Raises RuntimeError if an instrumentation is already running."""
+        global _instrumentation
+        with _INSTRUMENTATION_LOCK:
+            if _instrumentation is not None:
+                raise RuntimeError("semimutable is already instrumented")
+            _instrumentation = self
+            for prop in list(_INSTRUMENTABLE_PROPERTIES):
+                _instrument_property(self, prop)
+            for meta, mode in list(_GENERATED_METACLASSES.items()):
+                if mode in ("patch", "error"):
+                    _instrument_metaclass(self, meta)
+
+    def stop(self) -> None:
+        """Stop counting, and restore the uninstrumented descriptors and metaclasses. The counts are kept."""
+        global _instrumentation
+        with _INSTRUMENTATION_LOCK:
+            if _instrumentation is not self:
+                return
+            _instrumentation = None
+            while self._restore:
+                self._restore.pop()()
+
+    def snapshot(self) -> dict[type, dict[str, CallStats]]:
+        """The counts so far, by class and then by event. Can be called while running."""
+        totals: dict[type, dict[str, CallStats]] = {}
+        with self._lock:
+            tables = [dict(table) for table in self._tables]
+        for table in tables:
+            for (cls, event), (calls, seconds) in table.items():
+                previous = totals.setdefault(cls, {}).get(event, CallStats(0, 0.0))
+                totals[cls][event] = CallStats(previous.calls + calls, previous.seconds + seconds)
+        return totals
+
+    def _record(self, cls: type, event: str, seconds: float = 0.0) -> None:
+        """Count one ``event`` on ``cls``, that took ``seconds``."""
+        try:
+            table = self._local.table
+        except AttributeError:
+            table = self._local.table = {}
+            with self._lock:
+                self._tables.append(table)
+        entry = table.get((cls, event))
+        if entry is None:
+            table[cls, event] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+
+def instrument(*, timing: bool = False) -> Instrumentation:
+    """Count frozen field reads and writes, metaclass hooks and `FrozenFieldError` raises per class.
+
+    Use the result as a context manager, or call its ``start`` and ``stop`` methods, and read the counts with its
+    ``snapshot`` method. With ``timing``, also add up the time spent in each operation.
+
+    >>> with semimutable.instrument(timing=True) as instrumentation:
+    ...     run_workload()
+    >>> instrumentation.snapshot()[Order]["class_get"]
+    CallStats(calls=1200, seconds=0.0004)
+    """
+    return Instrumentation(timing=timing)
+
+
+# The running Instrumentation, if any, and the properties it instruments. Both are only changed with the lock held.
+_instrumentation: Instrumentation | None = None
+_INSTRUMENTATION_LOCK: Final = threading.Lock()
+_INSTRUMENTABLE_PROPERTIES: Final[weakref.WeakSet[property]] = weakref.WeakSet()
+
+
+def _register_property(prop: property) -> None:
+    """Have `FrozenField` or `FrozenCached` ``prop`` instrumented by the current and future instrumentations."""
+    with _INSTRUMENTATION_LOCK:
+        _INSTRUMENTABLE_PROPERTIES.add(prop)
+        if _instrumentation is not None:
+            _instrument_property(_instrumentation, prop)
+
+
+def _register_metaclass(meta: type, mode: str) -> None:
+    """Record the generated ``meta`` in `_GENERATED_METACLASSES`, and instrument it if it has hooks."""
+    with _INSTRUMENTATION_LOCK:
+        _GENERATED_METACLASSES[meta] = mode
+        if _instrumentation is not None and mode in ("patch", "error"):
+            _instrument_metaclass(_instrumentation, meta)
+
+
+def _instrument_property(instrumentation: Instrumentation, prop: property) -> None:
+    # A property can be initialized again in place, which is the only way to change its getter and setter. The class
+    # holding it can't always be assigned to, e.g. with the metaclass of "descriptor".
+    fget, fset, fdel, doc = prop.fget, prop.fset, prop.fdel, prop.__doc__
+    assert fget is not None and fset is not None
+    record = instrumentation._record  # pyright: ignore[reportPrivateUsage]
+    perf_counter = time.perf_counter
+    if not isinstance(prop, FrozenField):
+        # A FrozenCached is read like any other attribute once computed, only its errors are semimutable's doing.
+        def set_cached(obj: Any, value: Any) -> None:
+            try:
+                fset(obj, value)
+            except FrozenFieldError:
+                record(type(obj), "error")
+                raise
+
+        property.__init__(prop, fget, set_cached, fdel, doc)
+    elif instrumentation.timing:
+
+        def timed_get(obj: Any) -> Any:
+            start = perf_counter()
+            try:
+                return fget(obj)
+            finally:
+                record(type(obj), "get", perf_counter() - start)
+
+        def timed_set(obj: Any, value: Any) -> None:
+            start = perf_counter()
+            try:
+                fset(obj, value)
+            except FrozenFieldError:
+                record(type(obj), "error")
+                raise
+            finally:
+                record(type(obj), "set", perf_counter() - start)
+
+        property.__init__(prop, timed_get, timed_set, fdel, doc)
+    else:
+
+        def counted_get(obj: Any) -> Any:
+            record(type(obj), "get")
+            return fget(obj)
+
+        def counted_set(obj: Any, value: Any) -> None:
+            record(type(obj), "set")
+            try:
+                fset(obj, value)
+            except FrozenFieldError:
+                record(type(obj), "error")
+                raise
+
+        property.__init__(prop, counted_get, counted_set, fdel, doc)
+    instrumentation._restore.append(lambda: property.__init__(prop, fget, fset, fdel, doc))  # pyright: ignore[reportPrivateUsage]
+
+
+def _instrument_metaclass(instrumentation: Instrumentation, meta: type) -> None:
+    # The hooks are set on the generated metaclass itself, which only classes decorated by this module use.
+    getattribute: Callable[[type, str], Any] = vars(meta)["__getattribute__"]
+    setattr_: Callable[[type, str, Any], None] = vars(meta)["__setattr__"]
+    record = instrumentation._record  # pyright: ignore[reportPrivateUsage]
+    perf_counter = time.perf_counter
+    timing = instrumentation.timing
+
+    def meta_getattribute(cls: type, name: str) -> Any:
+        start = perf_counter() if timing else 0.0
+        try:
+            return getattribute(cls, name)
+        except FrozenFieldError:
+            record(cls, "error")
+            raise
+        finally:
+            record(cls, "class_get", perf_counter() - start if timing else 0.0)
+
+    def meta_setattr(cls: type, name: str, value: Any) -> None:
+        start = perf_counter() if timing else 0.0
+        try:
+            setattr_(cls, name, value)
+        except FrozenFieldError:
+            record(cls, "error")
+            raise
+        finally:
+            record(cls, "class_set", perf_counter() - start if timing else 0.0)
+
+    type.__setattr__(meta, "__getattribute__", meta_getattribute)
+    type.__setattr__(meta, "__setattr__", meta_setattr)
+
+    def restore() -> None:
+        type.__setattr__(meta, "__getattribute__", getattribute)
+        type.__setattr__(meta, "__setattr__", setattr_)
+
+    instrumentation._restore.append(restore)  # pyright: ignore[reportPrivateUsage]
+
+
+def _frozen_storage(cls: type) -> set[str]:
+    """The frozen fields of ``cls`` whose values live in a ``_frozen_<name>`` backing attribute behind a `FrozenField`.
+
+    That is all of them, unless ``cls`` was decorated with enforcement turned off, see `configure`.
+    """
+    if getattr(cls, "__semimutable_enforced__"):
+        return getattr(cls, "__frozen_dataclass_descriptors__")
+    return set()
+
+
+def _field_attrs(cls: type) -> dict[str, str]:
+    """The attribute generated code reads each field of an instance of ``cls`` from, by field name.
+
+    That is the ``_frozen_<name>`` backing attribute of a frozen field, or the attribute of the field itself. ClassVar
+    and InitVar pseudo-fields are left out.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    stored_names = _frozen_storage(cls)
+    return {
+        f.name: FROZEN_PREFIX + f.name if f.name in stored_names else f.name
+        for f in cls_fields.values()
+        if getattr(f, "_field_type") is _FIELD
+    }
+
+
+def _init_fn(cls: type, frozen_names: set[str], methods: Sequence[str] = ()) -> dict[str, Callable[..., Any]]:
+    """Generate an ``__init__`` for a semimutable dataclass, and the ``__repr__`` and ``__eq__`` named in ``methods``.
+
+    This mirrors ``dataclasses._init_fn``, with one difference: frozen fields are assigned straight to their
+    ``_frozen_<name>`` backing attribute instead of going through the FrozenField descriptor. An object under
+    construction cannot have been seen by anyone else yet, so there is nothing for the write-once check to protect, and
+    skipping it saves a Python call plus a failed ``hasattr`` per frozen field.
+
+    ``__repr__`` and ``__eq__`` are the stdlib's, generated here instead of by `dataclasses.dataclass` so that all three
+    come from one source. That source only depends on the field layout, so `_compile_generated` compiles it once for all
+    the classes with the same fields, which is most of what creating many classes from a few shapes costs.
+    """
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    # Include InitVars and regular fields (so, not ClassVars).
+    all_init_fields = [f for f in cls_fields.values() if getattr(f, "_field_type") in (_FIELD, _FIELD_INITVAR)]
+    std_init_fields = [f for f in all_init_fields if f.init and not f.kw_only]
+    kw_only_init_fields = [f for f in all_init_fields if f.init and f.kw_only]
+
+    # Make sure we don't have fields without defaults following fields with defaults. The stdlib normally checks this
+    # for us, but we asked it not to generate __init__.
+    seen_default = False
+    for f in std_init_fields:
+        if not (f.default is MISSING and f.default_factory is MISSING):
+            seen_default = True
+        elif seen_default:
+            raise TypeError(f"non-default argument {f.name!r} follows default argument")
+
+    # The name to use for the "self" param in __init__. Use "self" if possible.
+    self_name = "__dataclass_self__" if "self" in cls_fields else "self"
+    local_vars: dict[str, Any] = {f"__dataclass_type_{f.name}__": f.type for f in all_init_fields}
+    local_vars["__dataclass_return_type__"] = None
+    body_lines = [f"  {line}" for line in _init_body(cls, frozen_names, self_name, local_vars)]
+
+    def init_param(f: Field[Any]) -> str:
+        if f.default is not MISSING:
+            return f"{f.name}:__dataclass_type_{f.name}__=__dataclass_dflt_{f.name}__"
+        if f.default_factory is not MISSING:
+            return f"{f.name}:__dataclass_type_{f.name}__=__dataclass_HAS_DEFAULT_FACTORY__"
+        return f"{f.name}:__dataclass_type_{f.name}__"
+
+    init_params = [self_name, *map(init_param, std_init_fields)]
+    if kw_only_init_fields:
+        init_params += ["*", *map(init_param, kw_only_init_fields)]
+
+    # Free variables in exec are resolved in the global namespace, which is the user's module so that annotations can
+    # be resolved against it. We can't modify it, so our names are passed in as arguments of an enclosing function.
+    body = "\n".join(body_lines) if body_lines else "  pass"
+    lines = [
+        f"def __create_fn__({', '.join(local_vars)}):",
+        f" def __init__({','.join(init_params)})->__dataclass_return_type__:",
+        body,
+    ]
+    field_list = [f for f in cls_fields.values() if getattr(f, "_field_type") is _FIELD]
+    if "__repr__" in methods:
+        fields_repr = ", ".join(f"{f.name}={{self.{f.name}!r}}" for f in field_list if f.repr)
+        lines += [" def __repr__(self):", f'  return f"{{self.__class__.__qualname__}}({fields_repr})"']
+    if "__eq__" in methods:
+        compared = [f.name for f in field_list if f.compare]
+        lines.append(" def __eq__(self,other):")
+        if sys.version_info >= (3, 13):
+            lines += ["  if self is other:", "   return True"]
+            comparison = " and ".join(f"self.{name}==other.{name}" for name in compared) or "True"
+        else:
+            # Before 3.13, the stdlib compares tuples of the fields.
+            comparison = "({})==({})".format(
+                *("".join(f"{obj}.{name}," for name in compared) for obj in ("self", "other"))
             )
+        lines += ["  if other.__class__ is self.__class__:", f"   return {comparison}", "  return NotImplemented"]
+    generated = ("__init__", *(name for name in ("__repr__", "__eq__") if name in methods))
+    lines.append(f" return {','.join(generated)},")
+    module = sys.modules.get(cls.__module__)
+    ns: dict[str, Any] = {}
+    exec(_compile_generated("\n".join(lines)), module.__dict__ if module is not None else {}, ns)
+    result = dict(zip(generated, ns["__create_fn__"](**local_vars)))
+    for name, fn in result.items():
+        fn.__qualname__ = f"{cls.__qualname__}.{name}"
+    if "__repr__" in result:
+        result["__repr__"] = _recursive_repr(result["__repr__"])
+    return result
+
+
+def _recursive_repr(user_function: Callable[[Any], str]) -> Callable[[Any], str]:
+    """Wrap a ``__repr__`` so that an instance containing itself is shown as ``...``, like the stdlib's dataclasses."""
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    repr_running: set[tuple[int, int]] = set()
+
+    @functools.wraps(user_function)
+    def wrapper(self: Any) -> str:
+        key = id(self), threading.get_ident()
+        if key in repr_running:
+            return "..."
+        repr_running.add(key)
+        try:
+            return user_function(self)
+        finally:
+            repr_running.discard(key)
+
+    return wrapper
+
+
+def _signature_text(init: Callable[..., Any]) -> str:
+    """``str(inspect.signature(cls))`` without its return annotation, for the docstring the stdlib gives dataclasses.
+
+    ``init`` is a generated ``__init__``, a plain function without ``*args`` or ``**kwargs``, so its parameters are read
+    straight from its code and formatted the way `inspect.Parameter` does, several times faster than building the
+    `inspect.Signature` of the class, which also goes through the metaclass hooks for every attribute it looks at.
+    """
+    code: types.CodeType = getattr(init, "__code__")
+    annotations: dict[str, Any] = getattr(init, "__annotations__")
+    positional = code.co_varnames[1 : code.co_argcount]
+    defaults: tuple[Any, ...] = getattr(init, "__defaults__") or ()
+    kw_defaults: dict[str, Any] = getattr(init, "__kwdefaults__") or {}
+    all_defaults = dict(zip(positional[len(positional) - len(defaults) :], defaults)) | kw_defaults
 
-            # Add our frozen fields to the slots, so they can be used by descriptors.
-            cls_dict["__slots__"] += tuple(FROZEN_PREFIX + field_name for field_name in field_names)
+    def param(name: str) -> str:
+        text = f"{name}: {inspect.formatannotation(annotations[name])}"
+        return f"{text} = {all_defaults[name]!r}" if name in all_defaults else text
 
-            for field_name in field_names:
-                # Remove our attributes, if present. They'll still be available in _MARKER.
-                cls_dict.pop(field_name, None)
+    params = list(map(param, positional))
+    if code.co_kwonlyargcount:
+        params += ["*", *map(param, code.co_varnames[code.co_argcount : code.co_argcount + code.co_kwonlyargcount])]
+    return f"({', '.join(params)})"
 
-            # Remove __dict__ itself.
-            cls_dict.pop("__dict__", None)
 
-            # Clear existing `__weakref__` descriptor, it belongs to a previous type:
-            cls_dict.pop("__weakref__", None)  # gh-102069
-        # End of copied block from dataclasses._process_class
+def _init_body(cls: type, frozen_names: set[str], self_name: str, local_vars: dict[str, Any]) -> list[str]:
+    """The statements of the ``__init__`` generated by `_init_fn`, storing the fields and calling ``__post_init__``.
 
-        if needs_new_class:
-            qualname = getattr(cls, "__qualname__", None)
-            new_cls = new_meta(cls.__name__, cls.__bases__, cls_dict)  # pyright: ignore[reportCallIssue]
-            if qualname is not None:
-                new_cls.__qualname__ = qualname
+    They expect the arguments of ``__init__`` in local variables named after the fields, and the object in ``self_name``.
+    The defaults they refer to are added to ``local_vars``, along with ``__dataclass_HAS_DEFAULT_FACTORY__``.
+    """
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    params = getattr(cls, "__dataclass_params__")
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    all_init_fields = [f for f in cls_fields.values() if getattr(f, "_field_type") in (_FIELD, _FIELD_INITVAR)]
+    local_vars["__dataclass_HAS_DEFAULT_FACTORY__"] = _HAS_DEFAULT_FACTORY
+
+    # With track_changes, every attribute is stored past the __setattr__ that records assignments, which would be a
+    # Python call each.
+    change_bits = _change_bits(cls)
+    if change_bits is not None:
+        local_vars["__dataclass_object_setattr__"] = object.__setattr__
+
+    def store(attr_name: str, value: str) -> str:
+        if change_bits is not None:
+            return f"__dataclass_object_setattr__({self_name},{attr_name!r},{value})"
+        return f"{self_name}.{attr_name}={value}"
+
+    body_lines: list[str] = []
+    for f in all_init_fields:
+        default_name = f"__dataclass_dflt_{f.name}__"
+        if f.default_factory is not MISSING:
+            local_vars[default_name] = f.default_factory
+            if f.init:
+                value = f"{default_name}() if {f.name} is __dataclass_HAS_DEFAULT_FACTORY__ else {f.name}"
+            else:
+                value = f"{default_name}()"
+        elif f.init:
+            if f.default is not MISSING:
+                local_vars[default_name] = f.default
+            value = f.name
+        elif f.default is not MISSING and (params.slots or f.name in frozen_names):
+            # Non-slotted classes can leave this to the class attribute holding the default, but for frozen fields
+            # that class attribute is the FrozenField, so the default must be stored on the instance.
+            local_vars[default_name] = f.default
+            value = default_name
         else:
-            # If we don't need a new class, we can just use the original class
-            new_cls = cls
+            continue
 
-    descriptor_vars = set()
-    # Now we can iterate over the fields and replace the frozen fields (those with "frozen" in their metadata, as set by field(frozen=True))
-    # with FrozenField descriptors.
-    for f in fields(cls):  # pyright: ignore[reportArgumentType]  # cls must be a dataclass
-        if "frozen" in f.metadata:
-            setattr(new_cls, f.name, FrozenField(f.name))
-            descriptor_vars.add(f.name)
+        if getattr(f, "_field_type") is _FIELD_INITVAR:
+            continue
+        attr_name = FROZEN_PREFIX + f.name if f.name in frozen_names else f.name
+        body_lines.append(store(attr_name, value))
 
-    # This has 2 purposes:
-    # 1. It caches the name of the frozen fields, so we can access them later in the metaclass's __getattribute__ and
-    # __setattr__ methods. Avoiding an isinstance check on every attribute access.
-    # 2. It allows external code to check if a class is a freezable dataclass, by checking if it has the
-    # __frozen_dataclass_descriptors__ attribute.
-    new_cls.__frozen_dataclass_descriptors__ = descriptor_vars  # pyright: ignore[reportAttributeAccessIssue]
-    return new_cls
+    if hasattr(cls, "__post_init__"):
+        initvar_names = ",".join(f.name for f in all_init_fields if getattr(f, "_field_type") is _FIELD_INITVAR)
+        body_lines.append(f"{self_name}.__post_init__({initvar_names})")
+    if change_bits is not None:
+        # A new instance has no changes, not even those __post_init__ made.
+        body_lines.append(store(_CHANGES, "0"))
+    return body_lines
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_generated(txt: str) -> types.CodeType:
+    """Compile the source generated by `_init_fn` or `_replace_fn`.
+
+    The source only depends on the field layout, not on the defaults or types, which are passed in as arguments. Classes
+    generated from the same schema therefore share one code object, and compiling is most of the cost of generating
+    a method.
+    """
+    return compile(txt, "<string>", "exec")
+
+
+def _replace_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__replace__`` of a semimutable dataclass whose ``__init__`` was generated by `_init_fn`.
+
+    When that ``__init__`` does nothing but store its arguments, the copy is made with ``object.__new__`` and every field
+    is copied straight from the storage of the original, frozen ones from their ``_frozen_<name>`` backing attribute.
+    Neither the FrozenField write-once check nor the keyword argument parsing of ``__init__`` run, and unchanged fields
+    are never passed around. Otherwise, with a ``__post_init__``, an InitVar or init=False field, a custom ``__new__`` or
+    a metaclass ``__call__``, it defers to `dataclasses.replace`, which goes through ``__init__``.
+
+    The copy of an ``intern=True`` instance is never interned: ``obj`` itself is returned when there are no changes,
+    and a new instance otherwise, made without the interner, see `intern_instance`.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    field_list = [f for f in cls_fields.values() if getattr(f, "_field_type") is not _FIELD_CLASSVAR]
+    interner: _Interner | None = vars(cls).get("__semimutable_interner__")
+    if interner is None:
+        meta_call = type(cls).__call__
+    else:
+        # The metaclass call that constructs instances, past the one of _interning_metaclass.
+        meta_call = next(meta for meta in inspect.getmro(type(cls)) if meta not in _GENERATED_METACLASSES).__call__
+    if interner is not None and (
+        not interner.own_init
+        or hasattr(cls, "__post_init__")
+        or cls.__new__ is not object.__new__
+        or meta_call is not type.__call__
+        or any(not f.init or getattr(f, "_field_type") is _FIELD_INITVAR for f in field_list)
+    ):
+
+        def __replace__(self: Any, /, **changes: Any) -> Any:
+            if self.__class__ is not cls:
+                return std_replace(self, **changes)
+            if not changes:
+                return self
+            # What dataclasses.replace does, except for constructing the copy past the interner.
+            for f in field_list:
+                if not f.init:
+                    if f.name in changes:
+                        raise ValueError(
+                            f"field {f.name} is declared with init=False, it cannot be specified with replace()"
+                        )
+                elif f.name not in changes:
+                    if getattr(f, "_field_type") is _FIELD_INITVAR and f.default is MISSING:
+                        raise ValueError(f"InitVar {f.name!r} must be specified with replace()")
+                    changes[f.name] = getattr(self, f.name)
+            return meta_call(cls, **changes)
+
+    elif (
+        hasattr(cls, "__post_init__")
+        or cls.__new__ is not object.__new__
+        or meta_call is not type.__call__
+        or any(not f.init or getattr(f, "_field_type") is _FIELD_INITVAR for f in field_list)
+    ):
+
+        def __replace__(self: Any, /, **changes: Any) -> Any:
+            return std_replace(self, **changes)
+
+    else:
+        # Subclasses that were not decorated themselves inherit this __replace__, but may have their own __init__.
+        body_lines = [
+            "  if __dataclass_self__.__class__ is not __dataclass_cls__:",
+            "   return __dataclass_std_replace__(__dataclass_self__,**__dataclass_changes__)",
+        ]
+        if interner is not None:
+            body_lines += ["  if not __dataclass_changes__:", "   return __dataclass_self__"]
+        body_lines.append("  __dataclass_new_obj__=__dataclass_new__(__dataclass_cls__)")
+        attrs = _field_attrs(cls)
+        for f in field_list:
+            body_lines.append(
+                f"  __dataclass_new_obj__.{attrs[f.name]}=__dataclass_changes__.pop({f.name!r})"
+                f" if {f.name!r} in __dataclass_changes__ else __dataclass_self__.{attrs[f.name]}"
+            )
+        body_lines += [f"  {line}" for line in _clear_changes_lines(cls, "__dataclass_new_obj__")]
+        # Same error as the one __init__ raises for an unknown keyword argument.
+        body_lines += [
+            "  if __dataclass_changes__:",
+            "   raise TypeError(f'{__dataclass_cls__.__qualname__}.__init__() got an unexpected keyword argument '",
+            "                   f'{next(iter(__dataclass_changes__))!r}')",
+            "  return __dataclass_new_obj__",
+        ]
+        body = "\n".join(body_lines)
+        txt = (
+            "def __create_fn__(__dataclass_cls__,__dataclass_new__,__dataclass_std_replace__):\n"
+            " def __replace__(__dataclass_self__,/,**__dataclass_changes__):\n"
+            f"{body}\n"
+            " return __replace__"
+        )
+        ns: dict[str, Any] = {}
+        exec(_compile_generated(txt), {}, ns)
+        __replace__ = ns["__create_fn__"](cls, object.__new__, std_replace)
+
+    __replace__.__qualname__ = f"{cls.__qualname__}.__replace__"
+    return __replace__
+
+
+def _from_rows_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__semimutable_from_rows__(rows, stream)`` behind `from_rows` and `iter_from_rows`.
+
+    Each row is unpacked into one local variable per positional ``__init__`` parameter, and the statements of
+    ``__init__`` from `_init_body` run inline on an object made with ``object.__new__``. Defaults, ``default_factory`` and
+    ``__post_init__`` behave exactly the same, but all rows are handled in a single Python frame. Rows of another length
+    go through ``cls(*row)``, as does every row of a class with a required keyword-only parameter. Rows other than lists
+    and tuples, e.g. generators, are copied into a tuple first, since unpacking one of another length would consume it.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    init_fields = [f for f in cls_fields.values() if getattr(f, "_field_type") in (_FIELD, _FIELD_INITVAR) and f.init]
+    kw_only_fields = [f for f in init_fields if f.kw_only]
+    fallback = "__dataclass_emit__(__dataclass_cls__(*__dataclass_item__))"
+    if any(f.default is MISSING and f.default_factory is MISSING for f in kw_only_fields):
+        return _bulk_fn(cls, "__semimutable_from_rows__", fallback, None, [])
+    local_vars: dict[str, Any] = {"__dataclass_tuple__": tuple, "__dataclass_builtin_list__": list}
+    lines = [
+        "if __dataclass_item__.__class__ is not __dataclass_tuple__ and "
+        "__dataclass_item__.__class__ is not __dataclass_builtin_list__:",
+        " __dataclass_item__=__dataclass_tuple__(__dataclass_item__)",
+        "try:",
+        f" [{','.join(f.name for f in init_fields if not f.kw_only)}]=__dataclass_item__",
+        "except ValueError:",
+        f" {fallback}",
+        " continue",
+    ]
+    for f in kw_only_fields:
+        if f.default is not MISSING:
+            lines.append(f"{f.name}=__dataclass_dflt_{f.name}__")
+        else:
+            lines.append(f"{f.name}=__dataclass_HAS_DEFAULT_FACTORY__")
+    lines += _bulk_body(cls, local_vars)
+    return _bulk_fn(cls, "__semimutable_from_rows__", fallback, local_vars, lines)
+
+
+def _from_records_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__semimutable_from_records__(records, stream)`` behind `from_records` and `iter_from_records`.
+
+    Like `_from_rows_fn`, for mappings with exactly one key per ``__init__`` parameter. Any other mapping goes through
+    ``cls(**record)``.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    init_fields = [f for f in cls_fields.values() if getattr(f, "_field_type") in (_FIELD, _FIELD_INITVAR) and f.init]
+    fallback = "__dataclass_emit__(__dataclass_cls__(**__dataclass_item__))"
+    local_vars: dict[str, Any] = {}
+    lines = [
+        f"if len(__dataclass_item__)=={len(init_fields)}:",
+        " try:",
+        *(f"  {f.name}=__dataclass_item__[{f.name!r}]" for f in init_fields),
+        " except KeyError:",
+        "  pass",
+        " else:",
+        *(f"  {line}" for line in _bulk_body(cls, local_vars)),
+        "  continue",
+        fallback,
+    ]
+    return _bulk_fn(cls, "__semimutable_from_records__", fallback, local_vars, lines)
+
+
+def _bulk_body(cls: type, local_vars: dict[str, Any]) -> list[str]:
+    """The lines creating an instance, running the body of ``__init__`` on it and emitting it."""
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    self_name = "__dataclass_self__" if "self" in cls_fields else "self"
+    body = _init_body(cls, _frozen_storage(cls), self_name, local_vars)
+    return [f"{self_name}=__dataclass_new__(__dataclass_cls__)", *body, f"__dataclass_emit__({self_name})"]
+
+
+def _bulk_fn(
+    cls: type, name: str, fallback: str, local_vars: dict[str, Any] | None, lines: list[str]
+) -> Callable[..., Any]:
+    """Compile `_from_rows_fn` or `_from_records_fn` from the ``lines`` of the loop over the items.
+
+    ``__dataclass_emit__(obj)`` in the lines becomes a ``yield`` in the streaming version, and an ``append`` to the
+    result in the list version. With ``local_vars`` None, or if instances are not constructed by ``object.__new__`` and
+    ``type.__call__`` alone, e.g. with ``intern=True``, the loop is just the ``fallback`` line, which calls the class.
+    """
+    if local_vars is None or cls.__new__ is not object.__new__ or type(cls).__call__ is not type.__call__:
+        local_vars = {}
+        lines = [fallback]
+    loop = "\n".join(f"   {line}" for line in lines)
+    txt = (
+        f"def __create_fn__(__dataclass_cls__,__dataclass_new__,{','.join(local_vars)}):\n"
+        " def __dataclass_iter__(__dataclass_items__):\n"
+        "  for __dataclass_item__ in __dataclass_items__:\n"
+        f"{loop.replace('__dataclass_emit__', 'yield ')}\n"
+        " def __dataclass_list__(__dataclass_items__):\n"
+        "  __dataclass_result__=[]\n"
+        "  __dataclass_append__=__dataclass_result__.append\n"
+        "  for __dataclass_item__ in __dataclass_items__:\n"
+        f"{loop.replace('__dataclass_emit__', '__dataclass_append__')}\n"
+        "  return __dataclass_result__\n"
+        f" def {name}(__dataclass_items__,__dataclass_stream__):\n"
+        "  if __dataclass_stream__:\n"
+        "   return __dataclass_iter__(__dataclass_items__)\n"
+        "  return __dataclass_list__(__dataclass_items__)\n"
+        f" return {name}"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"](cls, object.__new__, **local_vars)
+    fn.__qualname__ = f"{cls.__qualname__}.{name}"
+    return fn
+
+
+def _astuple_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__semimutable_astuple__(self, tuple_factory)`` that `astuple` uses for instances of ``cls``.
+
+    Unlike `dataclasses.astuple`, there is no loop over `fields` and no ``getattr`` by name: each field is read with a
+    plain attribute access, frozen ones straight from their ``_frozen_<name>`` backing attribute. Values of atomic types
+    (int, str, ...) are used as is, anything else goes through the stdlib's own recursion, so nested dataclasses,
+    containers and the ``copy.deepcopy`` of other objects behave exactly like `dataclasses.astuple`.
+    """
+    values = ",".join(_field_value_exprs(cls, "__dataclass_astuple_inner__", "tuple_factory"))
+    body_lines = [
+        "  if tuple_factory is tuple:",
+        f"   return ({values},)",
+        f"  return tuple_factory([{values}])",
+    ]
+    return _serializer_fn(cls, "__semimutable_astuple__", "tuple_factory", body_lines, std_astuple)
+
+
+def _asdict_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__semimutable_asdict__(self, dict_factory)`` that `asdict` uses for instances of ``cls``.
+
+    See `_astuple_fn`.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    names = [f.name for f in cls_fields.values() if getattr(f, "_field_type") is _FIELD]
+    values = _field_value_exprs(cls, "__dataclass_asdict_inner__", "dict_factory")
+    body_lines = [
+        "  if dict_factory is dict:",
+        f"   return {{{','.join(f'{name!r}:{value}' for name, value in zip(names, values))}}}",
+        f"  return dict_factory([{','.join(f'({name!r},{value})' for name, value in zip(names, values))}])",
+    ]
+    return _serializer_fn(cls, "__semimutable_asdict__", "dict_factory", body_lines, std_asdict)
+
+
+def _field_value_exprs(cls: type, inner_name: str, factory_name: str) -> list[str]:
+    """Expressions converting each field of ``self`` the way the stdlib's ``_asdict_inner``/``_astuple_inner`` would."""
+    exprs: list[str] = []
+    for attr_name in _field_attrs(cls).values():
+        # The walrus reads the attribute once, the condition of a conditional expression is evaluated first.
+        exprs.append(
+            f"(__dataclass_v__ if type(__dataclass_v__:=self.{attr_name}) in __dataclass_ATOMIC_TYPES__"
+            f" else {inner_name}(__dataclass_v__,{factory_name}))"
+        )
+    return exprs
+
+
+def _serializer_fn(
+    cls: type, name: str, factory_name: str, body_lines: list[str], std_fn: Callable[..., Any]
+) -> Callable[..., Any]:
+    """Compile a per-class `asdict`/`astuple` implementation, falling back to ``std_fn`` for undecorated subclasses."""
+    txt = (
+        "def __create_fn__(__dataclass_cls__,__dataclass_ATOMIC_TYPES__,__dataclass_asdict_inner__,"
+        "__dataclass_astuple_inner__,__dataclass_std_fn__):\n"
+        f" def {name}(self,{factory_name}):\n"
+        # Subclasses that were not decorated themselves inherit this, but may have extra fields.
+        "  if self.__class__ is not __dataclass_cls__:\n"
+        f"   return __dataclass_std_fn__(self,{factory_name}={factory_name})\n"
+        + "\n".join(body_lines)
+        + f"\n return {name}"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"](cls, _ATOMIC_TYPES, _asdict_inner, _astuple_inner, std_fn)
+    fn.__qualname__ = f"{cls.__qualname__}.{name}"
+    return fn
+
+
+# Classes whose pickle and copy methods were generated here, so that their subclasses don't take them for custom ones.
+_GENERATED_PICKLING: "weakref.WeakSet[type]" = weakref.WeakSet()
+
+_PICKLE_METHODS: Final = (
+    "__getstate__",
+    "__setstate__",
+    "__reduce__",
+    "__reduce_ex__",
+    "__getnewargs__",
+    "__getnewargs_ex__",
+    "__copy__",
+    "__deepcopy__",
+)
+
+
+def _pickle_storage(cls: type) -> tuple[str, ...] | None:
+    """`_field_storage` of ``cls``, unless it defines or inherits a pickling or copying method of its own."""
+    for base in cls.__mro__[:-1]:
+        if base not in _GENERATED_PICKLING and any(name in base.__dict__ for name in _PICKLE_METHODS):
+            return None
+    return _field_storage(cls)
+
+
+def _field_storage(cls: type) -> tuple[str, ...] | None:
+    """Backing attributes of the fields of a semimutable dataclass, if those are all its instances can hold.
+
+    That is what lets generated code read and write the whole state of an instance by name, like the pickle and copy
+    methods do. Returns None for classes with other slots or a ``__dict__`` next to the field slots, and for classes
+    without any field.
+    """
+    storage = tuple(_field_attrs(cls).values())
+    # The values of frozen_cached and the cached hash of frozen_hash are derived from the fields, they can be left behind,
+    # and so can the bitmask of track_changes, which copies start without.
+    slots = {
+        slot
+        for base in cls.__mro__[:-1]
+        for slot in _get_slots(base)
+        if slot not in ("__dict__", "__weakref__", _CHANGES) and (slot in storage or not slot.startswith(CACHED_PREFIX))
+    }
+    if not storage or slots != (set() if cls.__dictoffset__ else set(storage)):
+        return None
+    return storage
+
+
+def _getstate_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__getstate__`` of a class for which `_field_storage` is not None.
+
+    The state is a tuple of `_STATE_VERSION` then the field values in definition order, frozen ones read straight from
+    their ``_frozen_<name>`` backing attribute, instead of the ``(None, {name: value})`` pair of a slotted class or the
+    instance ``__dict__``. That is smaller on the wire and needs no attribute name on either side. An instance that does
+    not hold exactly its fields, because one was deleted or, without slots, an attribute was added, is pickled with a
+    dict state.
+    """
+    storage = _field_storage(cls)
+    assert storage is not None
+    if cls.__dictoffset__:
+        # Hashes of str and bytes differ from one process to the next, so a cached hash must not be pickled. Neither is
+        # the bitmask of track_changes.
+        left_out = (_HASH_CACHE, _CHANGES) if _change_bits(cls) else (_HASH_CACHE,)
+        body_lines = [
+            "  d=self.__dict__",
+            f"  if len(d)-{'-'.join(f'({name!r} in d)' for name in left_out)}=={len(storage)}:",
+            "   try:",
+            f"    return ({_STATE_VERSION},{','.join(f'd[{name!r}]' for name in storage)})",
+            "   except KeyError:",
+            "    pass",
+            f"  return {{k:v for k,v in d.items() if k not in {left_out!r}}}"
+            f" if {' or '.join(f'{name!r} in d' for name in left_out)} else d",
+        ]
+    else:
+        body_lines = [
+            "  try:",
+            f"   return ({_STATE_VERSION},{','.join(f'self.{name}' for name in storage)})",
+            "  except AttributeError:",
+            "   return {name:getattr(self,name) for name in __dataclass_storage__ if hasattr(self,name)}",
+        ]
+    # Subclasses that were not decorated themselves inherit this, but may have attributes of their own.
+    body_lines[:0] = [
+        "  if self.__class__ is not __dataclass_cls__:",
+        "   return __dataclass_object_getstate__(self)",
+    ]
+    return _pickle_fn(cls, storage, "__getstate__", "self", body_lines)
+
+
+def _setstate_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__setstate__`` of a class for which `_field_storage` is not None, see `_getstate_fn`.
+
+    With slots the values are stored with plain attribute assignments, which like pickle's own BUILD opcode go through
+    a custom ``__setattr__``. Without slots they are stored in the instance ``__dict__`` directly, as pickle would too.
+    Any other state, such as the ``(None, {name: value})`` pair of an instance pickled by an earlier version, is
+    restored like ``object.__setstate__`` would.
+    """
+    storage = _field_storage(cls)
+    assert storage is not None
+    if cls.__dictoffset__:
+        targets = ",".join(f"d[{name!r}]" for name in storage)
+        store = ["   d=self.__dict__", f"   _,{targets}=state"]
+    else:
+        store = [f"   _,{','.join(f'self.{name}' for name in storage)}=state"]
+    body_lines = [
+        f"  if self.__class__ is __dataclass_cls__ and type(state) is tuple and state[0]=={_STATE_VERSION}:",
+        *store,
+        "  else:",
+        "   __dataclass_set_default_state__(self,state)",
+        *(f"  {line}" for line in _clear_changes_lines(cls, "self")),
+    ]
+    return _pickle_fn(cls, storage, "__setstate__", "self,state", body_lines)
+
+
+def _reduce_ex_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__reduce_ex__`` of a class for which `_field_storage` is not None, see `_getstate_fn`.
+
+    It returns what ``object.__reduce_ex__`` would for protocol 2 and up, but without the lookups of
+    ``__getnewargs_ex__``, ``__getnewargs__`` and ``__getstate__`` it does on every call. ``copyreg.__newobj__`` also
+    works with protocols 0 and 1, so the same reduction is used for those, which the stdlib refuses for slotted classes.
+    """
+    storage = _field_storage(cls)
+    assert storage is not None
+    body_lines = [
+        "  if self.__class__ is not __dataclass_cls__:",
+        "   return __dataclass_object_reduce_ex__(self,protocol)",
+        "  return (__dataclass_newobj__,(__dataclass_cls__,),self.__getstate__())",
+    ]
+    return _pickle_fn(cls, storage, "__reduce_ex__", "self,protocol", body_lines)
+
+
+def _copy_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__copy__`` of a class for which `_field_storage` is not None.
+
+    `copy.copy` would otherwise go through ``__reduce_ex__``, ``__getstate__`` and ``__setstate__``. Here the copy is
+    made with ``cls.__new__(cls)``, as unpickling would, and the storage copied over attribute by attribute, or with a
+    single ``dict.update``.
+    """
+    storage = _field_storage(cls)
+    assert storage is not None
+    body_lines = [
+        "  if self.__class__ is __dataclass_cls__:",
+        "   new=__dataclass_new__(__dataclass_cls__)",
+    ]
+    if cls.__dictoffset__:
+        body_lines += [
+            "   new.__dict__.update(self.__dict__)",
+            *(f"   {line}" for line in _clear_changes_lines(cls, "new")),
+            "   return new",
+        ]
+    else:
+        body_lines += [
+            "   try:",
+            *(f"    new.{name}=self.{name}" for name in storage),
+            *(f"    {line}" for line in _clear_changes_lines(cls, "new")),
+            "    return new",
+            "   except AttributeError:",
+            "    pass",
+        ]
+    body_lines.append("  return __dataclass_reconstruct__(self,None,*self.__reduce_ex__(4))")
+    return _pickle_fn(cls, storage, "__copy__", "self", body_lines)
+
+
+def _deepcopy_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__deepcopy__`` of a class for which `_field_storage` is not None, see `_copy_fn`.
+
+    Values of atomic types (int, str, ...), which `copy.deepcopy` would return as is anyway, are not passed to it.
+    """
+    storage = _field_storage(cls)
+    assert storage is not None
+    body_lines = [
+        "  if self.__class__ is __dataclass_cls__:",
+        "   new=__dataclass_new__(__dataclass_cls__)",
+        # Registered before copying the values, for those that refer back to self.
+        "   memo[id(self)]=new",
+    ]
+    if cls.__dictoffset__:
+        body_lines += [
+            "   new.__dict__.update({k:v if type(v) in __dataclass_ATOMIC_TYPES__ else __dataclass_deepcopy__(v,memo)"
+            " for k,v in self.__dict__.items()})",
+            *(f"   {line}" for line in _clear_changes_lines(cls, "new")),
+            "   return new",
+        ]
+    else:
+        body_lines += [
+            "   try:",
+            *(
+                f"    new.{name}=v if type(v:=self.{name}) in __dataclass_ATOMIC_TYPES__"
+                " else __dataclass_deepcopy__(v,memo)"
+                for name in storage
+            ),
+            *(f"    {line}" for line in _clear_changes_lines(cls, "new")),
+            "    return new",
+            "   except AttributeError:",
+            "    del memo[id(self)]",
+        ]
+    body_lines.append("  return __dataclass_reconstruct__(self,memo,*self.__reduce_ex__(4))")
+    return _pickle_fn(cls, storage, "__deepcopy__", "self,memo", body_lines)
+
+
+def _clear_changes_lines(cls: type, obj_name: str) -> list[str]:
+    """Statements clearing the bitmask of a new instance of ``cls``, if it is a ``track_changes=True`` class.
+
+    Generated methods that copy or restore an instance store the mutable fields with plain assignments, which set the
+    bits of the fields, while a copy or an unpickled instance starts without changes, like a new one.
+    """
+    return [f"object.__setattr__({obj_name},{_CHANGES!r},0)"] if _change_bits(cls) else []
+
+
+def _pickle_fn(
+    cls: type, storage: tuple[str, ...], name: str, params: str, body_lines: list[str]
+) -> Callable[..., Any]:
+    """Compile one of the pickle and copy methods generated by `_getstate_fn` and the like."""
+    txt = (
+        "def __create_fn__(__dataclass_cls__,__dataclass_storage__,__dataclass_new__,__dataclass_object_getstate__,"
+        "__dataclass_object_reduce_ex__,__dataclass_newobj__,__dataclass_set_default_state__,__dataclass_reconstruct__,"
+        "__dataclass_deepcopy__,__dataclass_ATOMIC_TYPES__):\n"
+        f" def {name}({params}):\n" + "\n".join(body_lines) + f"\n return {name}"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"](
+        cls,
+        storage,
+        cls.__new__,
+        object.__getstate__,
+        object.__reduce_ex__,
+        copyreg.__newobj__,  # pyright: ignore[reportAttributeAccessIssue]
+        _set_default_state,
+        _reconstruct,
+        copy.deepcopy,
+        _ATOMIC_TYPES,
+    )
+    fn.__qualname__ = f"{cls.__qualname__}.{name}"
+    return fn
+
+
+def _set_default_state(obj: object, state: Any) -> None:
+    """Restore a state in one of the formats of ``object.__getstate__``, the way pickle's BUILD opcode would."""
+    dict_state: dict[str, Any] | None = state
+    slot_state: dict[str, Any] | None = None
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+    # The cached hash of frozen_hash, from an instance pickled by another process with other hashes of str and bytes.
+    if dict_state and _HASH_CACHE in dict_state:
+        dict_state = {name: value for name, value in dict_state.items() if name != _HASH_CACHE}
+    if slot_state and _HASH_CACHE in slot_state:
+        slot_state = {name: value for name, value in slot_state.items() if name != _HASH_CACHE}
+    if dict_state:
+        inst_dict: dict[str, Any] | None = getattr(obj, "__dict__", None)
+        if inst_dict is None:
+            # The dict state _getstate_fn falls back to for a slotted instance.
+            slot_state = dict_state | (slot_state or {})
+        else:
+            inst_dict.update(dict_state)
+    if slot_state:
+        for name, value in slot_state.items():
+            setattr(obj, name, value)
+
+
+def _check_frozen_hash_and_eq(
+    cls: type, eq: bool, unsafe_hash: bool, frozen: bool, frozen_hash: bool, frozen_eq: bool
+) -> None:
+    """Raise if ``frozen_hash`` or ``frozen_eq`` cannot be used on ``cls`` with the other options of the decorator."""
+    if frozen:
+        raise TypeError("frozen_hash and frozen_eq can't be used with frozen=True, where every field is frozen")
+    if frozen_eq and not eq:
+        raise ValueError("eq must be true if frozen_eq is true")
+    if frozen_hash and unsafe_hash:
+        raise ValueError("frozen_hash and unsafe_hash can't both be true")
+    # Like in the stdlib, a __hash__ of None is implied by an __eq__ in the class body, it wasn't written by the user.
+    class_hash = cls.__dict__.get("__hash__", MISSING)
+    if frozen_hash and not (class_hash is MISSING or (class_hash is None and "__eq__" in cls.__dict__)):
+        raise TypeError(f"Cannot overwrite attribute __hash__ in class {cls.__name__}")
+    if frozen_eq and "__eq__" in cls.__dict__:
+        raise TypeError(f"Cannot overwrite attribute __eq__ in class {cls.__name__}")
+
+
+def _hash_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__hash__`` of ``frozen_hash=True``, which hashes the frozen fields once and caches the result.
+
+    The cache is read through its slot descriptor, or from the instance ``__dict__`` without slots, never by attribute
+    lookup: a missing cache would otherwise end up in ``__getattr__``, which may be user-defined.
+    """
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    frozen_names: set[str] = getattr(cls, "__frozen_dataclass_descriptors__")
+    attrs = _field_attrs(cls)
+    values = "".join(
+        f"self.{attrs[f.name]},"
+        for f in cls_fields.values()
+        if f.name in frozen_names and (f.compare if f.hash is None else f.hash)
+    )
+    slot = next((vars(base)[_HASH_CACHE] for base in cls.__mro__ if _HASH_CACHE in vars(base)), None)
+    if slot is not None:
+        body_lines = [
+            "  try:",
+            "   return __dataclass_get_hash__(self)",
+            "  except AttributeError:",
+            f"   h=hash(({values}))",
+            "   __dataclass_set_hash__(self,h)",
+            "   return h",
+        ]
+    else:
+        body_lines = [
+            "  d=self.__dict__",
+            f"  h=d.get({_HASH_CACHE!r})",
+            "  if h is None:",
+            f"   h=d[{_HASH_CACHE!r}]=hash(({values}))",
+            "  return h",
+        ]
+    txt = (
+        "def __create_fn__(__dataclass_get_hash__,__dataclass_set_hash__):\n"
+        " def __hash__(self):\n" + "\n".join(body_lines) + "\n return __hash__"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"](*((slot.__get__, slot.__set__) if slot is not None else (None, None)))
+    fn.__qualname__ = f"{cls.__qualname__}.__hash__"
+    return fn
+
+
+def _eq_fn(cls: type) -> Callable[..., Any]:
+    """Generate the ``__eq__`` of ``frozen_eq=True``, the stdlib's ``__eq__`` restricted to the frozen fields."""
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    frozen_names: set[str] = getattr(cls, "__frozen_dataclass_descriptors__")
+    attrs = _field_attrs(cls)
+    attr_names = [attrs[f.name] for f in cls_fields.values() if f.name in frozen_names and f.compare]
+    terms = [f"self.{attr_name}==other.{attr_name}" for attr_name in attr_names]
+    txt = (
+        "def __create_fn__():\n"
+        " def __eq__(self,other):\n"
+        "  if self is other:\n"
+        "   return True\n"
+        "  if other.__class__ is self.__class__:\n"
+        f"   return {' and '.join(terms) or 'True'}\n"
+        "  return NotImplemented\n"
+        " return __eq__"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"]()
+    fn.__qualname__ = f"{cls.__qualname__}.__eq__"
+    return fn
+
+
+class InternInfo(NamedTuple):
+    """Statistics of the instance cache of an ``intern=True`` class, as returned by `intern_info`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _Interner:
+    """The cache of the live instances of an ``intern=True`` class, keyed by the tuple of their frozen field values.
+
+    Instances are held by weak references, so an instance stays in the cache as long as it is alive anywhere else. The
+    ``maxsize`` most recently used instances are also kept alive by the cache itself. Insertions hold a lock, but
+    instances are constructed outside of it, so that ``__post_init__`` can't deadlock: two threads missing the same key
+    both construct an instance, and both get the one that was inserted first. Without ``maxsize``, a hit is a single
+    dict lookup that doesn't take the lock, and like for ``functools.lru_cache(maxsize=None)``, concurrent hits may be
+    undercounted.
+
+    ``call(cls, *args, **kwargs)`` is what constructing ``cls`` runs, see `_intern_fn`.
+    """
+
+    __slots__ = ("cls", "maxsize", "own_init", "call", "hits", "misses", "live", "recent", "_remove", "_lock")
+
+    def __init__(self, cls: type, maxsize: int, own_init: bool) -> None:
+        live: dict[tuple[Any, ...], weakref.KeyedRef[tuple[Any, ...], Any]] = {}
+
+        def remove(ref: weakref.KeyedRef[tuple[Any, ...], Any], live: dict[Any, Any] = live) -> None:
+            # Atomically removes the entry only if it still holds a dead reference, it may hold a new instance by now.
+            _remove_dead_weakref(live, ref.key)
+
+        self.cls = cls
+        self.maxsize = maxsize
+        self.own_init = own_init
+        self.call: Callable[..., Any] = self._generate_call
+        self.hits = 0
+        self.misses = 0
+        self.live = live
+        self.recent: collections.OrderedDict[tuple[Any, ...], Any] | None = (
+            collections.OrderedDict() if maxsize else None
+        )
+        self._remove = remove
+        self._lock = threading.Lock()
+
+    def _generate_call(self, cls: type, /, *args: Any, **kwargs: Any) -> Any:
+        # Generated on first use, like the other per-class methods. Racing threads generate equivalent functions.
+        self.call = _intern_fn(self)
+        return self.call(cls, *args, **kwargs)
+
+    def hit(self, key: tuple[Any, ...], obj: Any) -> Any:
+        """Count a hit on ``obj`` and return it. Only called with ``maxsize``, the other hits are counted inline."""
+        with self._lock:
+            self.hits += 1
+            self._keep(key, obj)
+        return obj
+
+    def insert(self, key: tuple[Any, ...], obj: Any) -> Any:
+        """Intern the new instance ``obj``, unless another thread interned one with the same ``key`` meanwhile."""
+        with self._lock:
+            ref = self.live.get(key)
+            if ref is not None and (interned := ref()) is not None:
+                self.hits += 1
+            else:
+                interned = obj
+                self.live[key] = weakref.KeyedRef(obj, self._remove, key)
+                self.misses += 1
+            self._keep(key, interned)
+        return interned
+
+    def intern(self, obj: Any) -> Any:
+        """Return the interned instance with the frozen field values of ``obj``, interning ``obj`` if there is none."""
+        attrs = _field_attrs(self.cls)
+        return self.insert(tuple(getattr(obj, attrs[f.name]) for f in _intern_key_fields(self.cls)), obj)
+
+    def _keep(self, key: tuple[Any, ...], obj: Any) -> None:
+        """Mark ``obj`` as the most recently used instance, evicting the least recently used one past ``maxsize``."""
+        recent = self.recent
+        if recent is not None:
+            recent[key] = obj
+            recent.move_to_end(key)
+            if len(recent) > self.maxsize:
+                recent.popitem(last=False)
+
+    def info(self) -> InternInfo:
+        with self._lock:
+            return InternInfo(self.hits, self.misses, self.maxsize, len(self.live))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.live.clear()
+            if self.recent is not None:
+                self.recent.clear()
+            self.hits = self.misses = 0
+
+
+def _intern_key_fields(cls: type) -> list[Field[Any]]:
+    """The fields whose values form the key of an instance of the ``intern=True`` ``cls``, in order."""
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    frozen_names: set[str] = getattr(cls, "__frozen_dataclass_descriptors__")
+    # Lazy fields are left out, computing them for the key would defeat their purpose.
+    return [f for f in cls_fields.values() if f.name in frozen_names and "lazy" not in f.metadata]
+
+
+def _intern_fn(interner: _Interner) -> Callable[..., Any]:
+    """Generate the ``call(cls, *args, **kwargs)`` of ``interner``, which returns the interned instance.
+
+    If ``__init__`` was generated by `_init_fn` and every frozen field is one of its arguments, the function takes the
+    same arguments as ``__init__``, under the same qualified name so that argument errors read the same, and looks the
+    key up before constructing anything. A hit is then a tuple, a dict lookup and a weak reference call. Frozen fields
+    with a ``default_factory`` are resolved once and passed to ``__init__``, so that the key is that of the instance.
+
+    Otherwise the instance has to be constructed first, and it is replaced by the interned one if there is one.
+    """
+    cls = interner.cls
+    cls_fields: dict[str, Field[Any]] = getattr(cls, "__dataclass_fields__")
+    frozen_fields = _intern_key_fields(cls)
+    # The metaclass call that constructs instances, past the one of _interning_metaclass.
+    root_meta = next(meta for meta in inspect.getmro(type(cls)) if meta not in _GENERATED_METACLASSES)
+    local_vars: dict[str, Any] = {
+        "__dataclass_interner__": interner,
+        "__dataclass_live__": interner.live,
+        "__dataclass_construct__": root_meta.__call__,
+        "__dataclass_HAS_DEFAULT_FACTORY__": _HAS_DEFAULT_FACTORY,
+    }
+    if interner.own_init and all(f.init for f in frozen_fields):
+        init_fields = [
+            f for f in cls_fields.values() if getattr(f, "_field_type") in (_FIELD, _FIELD_INITVAR) and f.init
+        ]
+
+        def param(f: Field[Any]) -> str:
+            if f.default is not MISSING:
+                local_vars[f"__dataclass_dflt_{f.name}__"] = f.default
+                return f"{f.name}=__dataclass_dflt_{f.name}__"
+            if f.default_factory is not MISSING:
+                local_vars[f"__dataclass_dflt_{f.name}__"] = f.default_factory
+                return f"{f.name}=__dataclass_HAS_DEFAULT_FACTORY__"
+            return f.name
+
+        std_fields = [f for f in init_fields if not f.kw_only]
+        kw_only_fields = [f for f in init_fields if f.kw_only]
+        params = ["__dataclass_cls__", *map(param, std_fields)]
+        if kw_only_fields:
+            params += ["*", *map(param, kw_only_fields)]
+        args = [f.name for f in std_fields] + [f"{f.name}={f.name}" for f in kw_only_fields]
+        body_lines = [
+            f"  if {f.name} is __dataclass_HAS_DEFAULT_FACTORY__:\n   {f.name}=__dataclass_dflt_{f.name}__()"
+            for f in frozen_fields
+            if f.default_factory is not MISSING
+        ]
+        body_lines += [
+            f"  __dataclass_key__=({''.join(f'{f.name},' for f in frozen_fields)})",
+            "  __dataclass_ref__=__dataclass_live__.get(__dataclass_key__)",
+            "  if __dataclass_ref__ is not None and (__dataclass_obj__:=__dataclass_ref__()) is not None:",
+        ]
+        if interner.maxsize:
+            body_lines.append("   return __dataclass_interner__.hit(__dataclass_key__,__dataclass_obj__)")
+        else:
+            body_lines += ["   __dataclass_interner__.hits+=1", "   return __dataclass_obj__"]
+        body_lines.append(
+            "  return __dataclass_interner__.insert(__dataclass_key__,"
+            f"__dataclass_construct__({','.join(['__dataclass_cls__', *args])}))"
+        )
+        name = "__init__"
+    else:
+        params = ["__dataclass_cls__", "/", "*__dataclass_args__", "**__dataclass_kwargs__"]
+        attrs = _field_attrs(cls)
+        storage = [attrs[f.name] for f in frozen_fields]
+        body_lines = [
+            "  __dataclass_obj__=__dataclass_construct__(__dataclass_cls__,*__dataclass_args__,**__dataclass_kwargs__)",
+            f"  __dataclass_key__=({''.join(f'__dataclass_obj__.{name},' for name in storage)})",
+            "  return __dataclass_interner__.insert(__dataclass_key__,__dataclass_obj__)",
+        ]
+        name = "__call__"
+    txt = (
+        f"def __create_fn__({','.join(local_vars)}):\n"
+        f" def {name}({','.join(params)}):\n" + "\n".join(body_lines) + f"\n return {name}"
+    )
+    ns: dict[str, Any] = {}
+    exec(_compile_generated(txt), {}, ns)
+    fn = ns["__create_fn__"](**local_vars)
+    fn.__qualname__ = f"{cls.__qualname__}.{name}"
+    return fn
+
+
+def _lazy_method(cls: type, name: str, generate: Callable[[type], Callable[..., Any]]) -> Callable[..., Any]:
+    """A method that generates the real one with ``generate(cls)`` on first use, and installs it on ``cls``.
+
+    Most classes are never copied or serialized, so this keeps the cost of generating those methods out of decoration.
+    """
+    method: Callable[..., Any] | None = None
+
+    def lazy(self: Any, /, *args: Any, **kwargs: Any) -> Any:
+        nonlocal method
+        if method is None:
+            method = generate(cls)
+            type.__setattr__(cls, name, method)
+        return method(self, *args, **kwargs)
+
+    lazy.__name__ = name
+    lazy.__qualname__ = f"{cls.__qualname__}.{name}"
+    return lazy
 
 
 def replace_frozen_field_placeholders_with_dataclass_fields_inplace(cls: type) -> None:
@@ -418,7 +2149,12 @@ def dataclass[_T](
     kw_only: bool = False,
     slots: bool = False,
     weakref_slot: bool = False,
-    classvar_frozen_assignment: Literal["patch", "replace", "error"] = "patch",
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    frozen_hash: bool = False,
+    frozen_eq: bool = False,
+    intern: bool = False,
+    intern_maxsize: int = 0,
+    track_changes: bool = False,
 ) -> type[_T]: ...
 
 
@@ -437,7 +2173,12 @@ def dataclass[_T](
     kw_only: bool = False,
     slots: bool = False,
     weakref_slot: bool = False,
-    classvar_frozen_assignment: Literal["patch", "replace", "error"] = "patch",
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    frozen_hash: bool = False,
+    frozen_eq: bool = False,
+    intern: bool = False,
+    intern_maxsize: int = 0,
+    track_changes: bool = False,
 ) -> Callable[[type[_T]], type[_T]]: ...
 
 
@@ -456,44 +2197,176 @@ def dataclass[_T](
     kw_only: bool = False,
     slots: bool = False,
     weakref_slot: bool = False,
-    classvar_frozen_assignment: Literal["patch", "replace", "error"] = "patch",
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    frozen_hash: bool = False,
+    frozen_eq: bool = False,
+    intern: bool = False,
+    intern_maxsize: int = 0,
+    track_changes: bool = False,
 ) -> Any:
     """Just like @dataclass, but if you use ``field(frozen=True)`` in the class, it will make that field immutable.
 
     Additional kwargs not supported @dataclass:
-        classvar_frozen_assignment (Literal["patch", "replace"] | None):
+        classvar_frozen_assignment (Literal["patch", "replace", "error", "descriptor"]):
             The behaviour of frozen fields when you try to assign to the same name in the class body.
             - "patch" will transparently assign/fetch the class variable to/from a hidden variable, making it behave
-                exactly like a normal class variable at the cost of a small(?) performance penalty every time you access
-                any class variable. Default is "patch".
+                exactly like a normal class variable at the cost of a Python-level hook every time you access any class
+                attribute, roughly 0.3µs per access, 10-20x slower than a plain class (see benchmarks/). Instance
+                attribute access is not affected. Default is "patch".
             - "replace" will replace the FrozenField descriptor with a normal class variable, allowing you to assign to it.
                 Warning: this will break the immutability of the field.
             - "error" will raise an error if you try to assign to a frozen field in the class body. This has the same
                 performance penalty as "patch", but it will not allow you to assign to the field in the class body. This
                 is useful for ensuring that you do not accidentally mutate the class variable, before switching to "replace".
                 Otherwise, it is recommended to use "patch" or "replace" instead.
+            - "descriptor" behaves exactly like "patch", but instead of wrapping the metaclass's __getattribute__ and
+                __setattr__, it puts one property per frozen field on the metaclass. Access to the frozen field names on
+                the class costs about as much as a property, and every other class attribute access runs at full speed.
+        frozen_hash (bool):
+            Hash instances by their frozen fields only, instead of making them unhashable as ``eq=True`` does. Since
+            those fields never change, the hash is computed once and cached in a hidden slot, and instances stay usable
+            as dict keys and set members while their mutable fields change. Fields with ``hash=False``, or with
+            ``compare=False`` and no ``hash``, are left out like for the stdlib ``__hash__``. Default is False.
+        frozen_eq (bool):
+            Compare instances by their frozen fields only, instead of by every field. Default is False.
+        intern (bool):
+            Intern instances by their frozen fields, except lazy ones: constructing an instance whose frozen fields equal those of a live
+            one returns that live instance, without running ``__init__`` again, so the arguments of its mutable fields
+            are ignored. The cache only holds weak references, so with ``slots=True`` this needs ``weakref_slot=True``.
+            It is thread-safe, and `intern_info` and `intern_clear` give its statistics and empty it. Only construction
+            is interned: `replace` returns ``obj`` itself when given no changes and a new instance otherwise, and
+            copies and unpickled instances are new too, until passed to `intern_instance`. Default is False.
+        intern_maxsize (int):
+            How many of the most recently used instances the cache of ``intern=True`` keeps alive by itself, so that
+            they are reused even when nothing else refers to them. Default is 0.
+        track_changes (bool):
+            Record which mutable fields were assigned since the instance was created or `clear_changes` was called,
+            as one bit per field in a hidden slot, which `changed_fields` reads. Frozen fields can't change, so they
+            have no bit. The class gets a ``__setattr__``, so it can't have or inherit another, and assigning any
+            attribute of an instance costs a Python call. Copies, unpickled instances and those made with `replace`
+            start without changes. Subclasses decorated with @semimutable.dataclass are tracked too, other subclasses
+            can't add mutable fields. Default is False.
     """
 
     def wrap(cls: type[_T]):
         replace_frozen_field_placeholders_with_dataclass_fields_inplace(cls)
-        if classvar_frozen_assignment not in ("patch", "replace", "error"):  # pragma: no cover
+        # Read once, so that configure() running in another thread can't change it halfway.
+        enforce = _enforce
+        if classvar_frozen_assignment not in ("patch", "replace", "error", "descriptor"):  # pragma: no cover
             raise ValueError(
                 f"Invalid value for classvar_frozen_assignment: {classvar_frozen_assignment}. "
-                "Expected 'patch', 'replace', or 'error'."
+                "Expected 'patch', 'replace', 'error', or 'descriptor'."
             )
+        # For frozen=True the stdlib __init__ is already what we want. Otherwise we generate __init__ ourselves after the
+        # class is finished, see _init_fn.
+        own_init = init and not frozen and "__init__" not in cls.__dict__
+        has_doc = bool(cls.__dict__.get("__doc__"))
+        has_replace = "__replace__" in cls.__dict__
+        if weakref_slot and not slots:
+            raise TypeError("weakref_slot is True but slots is False")
+        if frozen_hash or frozen_eq:
+            _check_frozen_hash_and_eq(cls, eq, unsafe_hash, frozen, frozen_hash, frozen_eq)
+        if intern_maxsize and not intern:
+            raise ValueError("intern must be true if intern_maxsize is set")
+        if intern_maxsize < 0:
+            raise ValueError("intern_maxsize must be non-negative")
+        if intern and frozen:
+            raise TypeError("intern can't be used with frozen=True, where every field is frozen")
+        # A subclass of a tracked class is tracked too, or the mutable fields it adds would never be recorded.
+        tracked = track_changes or (not frozen and _change_bits(cls) is not None)
+        if track_changes and frozen:
+            raise TypeError("track_changes can't be used with frozen=True, where no field can change")
+        if tracked and any(
+            "__setattr__" in vars(base) and "__semimutable_change_bits__" not in vars(base) for base in cls.__mro__[:-1]
+        ):
+            raise TypeError(f"track_changes would replace the __setattr__ that {cls.__name__} has or inherits")
+        if own_init and not has_doc:
+            # The stdlib would compute a docstring from the signature of a class that has no __init__ yet. We have to
+            # redo it once our __init__ is in place, so keep it from spending an inspect.signature call for nothing.
+            cls.__doc__ = cls.__name__
+        # With our own __init__, __repr__ and __eq__ are generated along with it, see _init_fn. Ordering methods are
+        # left to the stdlib, which refuses them without eq, and frozen_eq has its own __eq__.
+        own_methods = [
+            name
+            for name, wanted in (("__repr__", repr), ("__eq__", eq and not order and not frozen_eq))
+            if own_init and wanted and name not in cls.__dict__
+        ]
+        if "__eq__" in own_methods:
+            # What the stdlib does to __hash__ for eq=True and frozen=False, which it can't do without eq.
+            class_hash = cls.__dict__.get("__hash__", MISSING)
+            if not unsafe_hash and (class_hash is MISSING or (class_hash is None and "__eq__" in cls.__dict__)):
+                cls.__hash__ = None  # pyright: ignore[reportAttributeAccessIssue]
+        # Unless frozen=True, _freeze_fields rebuilds the class anyway, so it adds the slots in the same pass instead of
+        # letting the stdlib build a slotted class that would be thrown away.
         klass = std_dataclass(
-            init=init,
-            repr=repr,
-            eq=eq,
+            init=init and not own_init,
+            repr=repr and "__repr__" not in own_methods,
+            eq=eq and "__eq__" not in own_methods,
             order=order,
             unsafe_hash=unsafe_hash,
             frozen=frozen,
             match_args=match_args,
             kw_only=kw_only,
+            slots=slots and frozen,
+            weakref_slot=weakref_slot and frozen,
+        )(cls)
+        klass = _freeze_fields(
+            klass,
+            classvar_frozen_assignment=classvar_frozen_assignment,
             slots=slots,
             weakref_slot=weakref_slot,
-        )(cls)
-        return _freeze_fields(klass, classvar_frozen_assignment=classvar_frozen_assignment)
+            frozen_hash=frozen_hash,
+            intern=intern,
+            track_changes=tracked,
+            enforce=enforce,
+        )
+        if (frozen_hash or frozen_eq) and not getattr(klass, "__frozen_dataclass_descriptors__"):
+            raise TypeError(f"{klass.__name__} has no frozen field for frozen_hash or frozen_eq to use")
+        if intern:
+            if not getattr(klass, "__frozen_dataclass_descriptors__"):
+                raise TypeError(f"{klass.__name__} has no frozen field to intern its instances by")
+            if not klass.__weakrefoffset__:
+                raise TypeError(
+                    f"{klass.__name__} instances can't be weakly referenced, use weakref_slot=True to intern them"
+                )
+            type.__setattr__(klass, "__semimutable_interner__", _Interner(klass, intern_maxsize, own_init))
+            if not has_replace and not own_init:
+                # Set below for a generated __init__. Here too, so that replace() doesn't return the interned instance.
+                klass.__replace__ = _lazy_method(klass, "__replace__", _replace_fn)  # pyright: ignore[reportAttributeAccessIssue]
+        if frozen_hash:
+            type.__setattr__(klass, "__hash__", _lazy_method(klass, "__hash__", _hash_fn))
+        if frozen_eq:
+            type.__setattr__(klass, "__eq__", _lazy_method(klass, "__eq__", _eq_fn))
+        if own_init:
+            params = getattr(klass, "__dataclass_params__")
+            params.init, params.repr, params.eq = True, repr, eq
+            for name, method in _init_fn(klass, _frozen_storage(klass), own_methods).items():
+                type.__setattr__(klass, name, method)
+            if not has_doc:
+                klass.__doc__ = klass.__name__ + _signature_text(vars(klass)["__init__"])
+            if not has_replace:
+                # Also picked up by copy.replace() on Python 3.13+.
+                klass.__replace__ = _lazy_method(klass, "__replace__", _replace_fn)  # pyright: ignore[reportAttributeAccessIssue]
+            # Looked up in the class __dict__ only, subclasses may have another __init__.
+            for name, generate in (
+                ("__semimutable_from_rows__", _from_rows_fn),
+                ("__semimutable_from_records__", _from_records_fn),
+            ):
+                type.__setattr__(klass, name, _lazy_method(klass, name, generate))
+        if not frozen:
+            klass.__semimutable_asdict__ = _lazy_method(klass, "__semimutable_asdict__", _asdict_fn)  # pyright: ignore[reportAttributeAccessIssue]
+            klass.__semimutable_astuple__ = _lazy_method(klass, "__semimutable_astuple__", _astuple_fn)  # pyright: ignore[reportAttributeAccessIssue]
+            if _pickle_storage(klass) is not None:
+                _GENERATED_PICKLING.add(klass)
+                for name, generate in (
+                    ("__getstate__", _getstate_fn),
+                    ("__setstate__", _setstate_fn),
+                    ("__reduce_ex__", _reduce_ex_fn),
+                    ("__copy__", _copy_fn),
+                    ("__deepcopy__", _deepcopy_fn),
+                ):
+                    type.__setattr__(klass, name, _lazy_method(klass, name, generate))
+        return klass
 
     # See if we're being called as @dataclass or @dataclass().
     if cls is None:
@@ -502,3 +2375,433 @@ def wrap(cls: type[_T]):
 
     # We're called as @dataclass without parens.
     return wrap(cls)
+
+
+type _FieldSpec = str | tuple[str, Any] | tuple[str, Any, Any]
+
+
+def make_dataclass(
+    cls_name: str,
+    fields: Iterable[_FieldSpec],
+    *,
+    bases: tuple[type, ...] = (),
+    namespace: dict[str, Any] | None = None,
+    init: bool = True,
+    repr: bool = True,
+    eq: bool = True,
+    order: bool = False,
+    unsafe_hash: bool = False,
+    frozen: bool = False,
+    match_args: bool = True,
+    kw_only: bool = False,
+    slots: bool = False,
+    weakref_slot: bool = False,
+    module: str | None = None,
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    frozen_hash: bool = False,
+    frozen_eq: bool = False,
+    intern: bool = False,
+    intern_maxsize: int = 0,
+    track_changes: bool = False,
+) -> type:
+    """Just like :func:`dataclasses.make_dataclass`, but the class is created with @semimutable.dataclass.
+
+    Use ``field(frozen=True)`` as the third item of a field to make it immutable::
+
+      C = make_dataclass("C", ["x", ("y", int, field(frozen=True)), ("z", int, field(default=0))])
+
+    is equivalent to::
+
+      @dataclass
+      class C:
+          x: "typing.Any"
+          y: int = field(frozen=True)
+          z: int = field(default=0)
+
+    The other parameters are passed to :func:`dataclass`.
+    """
+    if module is None:
+        module = _caller_module_name()
+    return dataclass(
+        _new_class(cls_name, fields, bases, namespace, module),
+        init=init,
+        repr=repr,
+        eq=eq,
+        order=order,
+        unsafe_hash=unsafe_hash,
+        frozen=frozen,
+        match_args=match_args,
+        kw_only=kw_only,
+        slots=slots,
+        weakref_slot=weakref_slot,
+        classvar_frozen_assignment=classvar_frozen_assignment,
+        frozen_hash=frozen_hash,
+        frozen_eq=frozen_eq,
+        intern=intern,
+        intern_maxsize=intern_maxsize,
+        track_changes=track_changes,
+    )
+
+
+def make_dataclasses(
+    specs: Iterable[tuple[str, Iterable[_FieldSpec]]],
+    *,
+    bases: tuple[type, ...] = (),
+    namespace: dict[str, Any] | None = None,
+    init: bool = True,
+    repr: bool = True,
+    eq: bool = True,
+    order: bool = False,
+    unsafe_hash: bool = False,
+    frozen: bool = False,
+    match_args: bool = True,
+    kw_only: bool = False,
+    slots: bool = False,
+    weakref_slot: bool = False,
+    module: str | None = None,
+    classvar_frozen_assignment: Literal["patch", "replace", "error", "descriptor"] = "patch",
+    frozen_hash: bool = False,
+    frozen_eq: bool = False,
+    intern: bool = False,
+    intern_maxsize: int = 0,
+    track_changes: bool = False,
+) -> list[type]:
+    """Create many dataclasses at once, e.g. from a set of schema files.
+
+    Each spec is a ``(cls_name, fields)`` pair, where ``fields`` is as in :func:`make_dataclass`. Every other parameter
+    applies to all the classes. This is equivalent to calling :func:`make_dataclass` once per spec, but the caller's
+    module and the decorator are only resolved once. Classes with the same field layout share one compiled source for
+    their ``__init__``, ``__repr__`` and ``__eq__``, see `_init_fn`, and like any semimutable dataclasses, their
+    metaclass, whether they are created here or one by one.
+    """
+    if module is None:
+        module = _caller_module_name()
+    decorate = dataclass(
+        init=init,
+        repr=repr,
+        eq=eq,
+        order=order,
+        unsafe_hash=unsafe_hash,
+        frozen=frozen,
+        match_args=match_args,
+        kw_only=kw_only,
+        slots=slots,
+        weakref_slot=weakref_slot,
+        classvar_frozen_assignment=classvar_frozen_assignment,
+        frozen_hash=frozen_hash,
+        frozen_eq=frozen_eq,
+        intern=intern,
+        intern_maxsize=intern_maxsize,
+        track_changes=track_changes,
+    )
+    return [decorate(_new_class(cls_name, fields, bases, namespace, module)) for cls_name, fields in specs]
+
+
+def _caller_module_name() -> str | None:
+    """The name of the module calling the function that calls this, so that pickle can find the classes it creates."""
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    try:
+        return sys._getframemodulename(2) or "__main__"  # pyright: ignore[reportPrivateUsage]
+    except AttributeError:
+        try:
+            return sys._getframe(2).f_globals.get("__name__", "__main__")  # pyright: ignore[reportPrivateUsage]
+        except (AttributeError, ValueError):
+            return None
+
+
+def _new_class(
+    cls_name: str,
+    fields: Iterable[_FieldSpec],
+    bases: tuple[type, ...],
+    namespace: dict[str, Any] | None,
+    module: str | None,
+) -> type:
+    """Create the undecorated class for `make_dataclass`."""
+    # Copyright (c) 2001-2025 Python Software Foundation; All Rights Reserved
+    # While we're looking through the field names, validate that they are identifiers, are not keywords, and not
+    # duplicates.
+    seen: set[str] = set()
+    annotations: dict[str, Any] = {}
+    defaults: dict[str, Any] = {}
+    for item in fields:
+        if isinstance(item, str):
+            name = item
+            tp = "typing.Any"
+        elif len(item) == 2:
+            name, tp = item
+        elif len(item) == 3:
+            name, tp, spec = item
+            defaults[name] = spec
+        else:
+            raise TypeError(f"Invalid field: {item!r}")
+
+        if not isinstance(name, str) or not name.isidentifier():  # pyright: ignore[reportUnnecessaryIsInstance]
+            raise TypeError(f"Field names must be valid identifiers: {name!r}")
+        if keyword.iskeyword(name):
+            raise TypeError(f"Field names must not be keywords: {name!r}")
+        if name in seen:
+            raise TypeError(f"Field name duplicated: {name!r}")
+
+        seen.add(name)
+        annotations[name] = tp
+
+    # Update 'ns' with the user-supplied namespace plus our calculated values.
+    def exec_body_callback(ns: dict[str, Any]) -> None:
+        ns.update(namespace or {})
+        ns.update(defaults)
+        ns["__annotations__"] = annotations
+
+    # We use `types.new_class()` instead of simply `type()` to allow dynamic creation of generic dataclasses.
+    cls = types.new_class(cls_name, bases, {}, exec_body_callback)
+    # For pickling to work, the __module__ variable needs to be set to the frame where the dataclass is created.
+    if module is not None:
+        cls.__module__ = module
+    return cls
+
+
+def replace[T](obj: T, /, **changes: Any) -> T:
+    """Like :func:`dataclasses.replace`, but copies semimutable dataclasses without going through ``__init__``.
+
+    Dataclasses decorated with @semimutable.dataclass get a generated ``__replace__`` that copies the storage of ``obj``
+    directly, see `_replace_fn`. If the class defines ``__replace__`` itself, that is what gets called, just like
+    :func:`copy.replace` on Python 3.13+. Any other dataclass instance goes to :func:`dataclasses.replace`.
+    """
+    if isinstance(obj, type) or not hasattr(obj, "__dataclass_fields__"):
+        raise TypeError("replace() should be called on dataclass instances")
+    # Looked up on the instance, as going through the class would hit the metaclass hooks of "patch" and "error".
+    replace_fn: Callable[..., T] | None = getattr(obj, "__replace__", None)
+    if replace_fn is None:
+        return std_replace(obj, **changes)  # pyright: ignore[reportArgumentType]  # obj is a dataclass instance
+    return replace_fn(**changes)
+
+
+def replace_many[T](objs: Iterable[T], /, **changes: Any) -> list[T]:
+    """Apply the same changes to every object in ``objs``, returning the copies in order.
+
+    Equivalent to ``[replace(obj, **changes) for obj in objs]``, but ``__replace__`` is only looked up when the class
+    changes from one object to the next.
+    """
+    result: list[T] = []
+    cls: type | None = None
+    replace_fn: Callable[..., T] | None = None
+    for obj in objs:
+        if obj.__class__ is not cls:
+            # replace() validates obj and generates a lazy __replace__, so the one looked up afterwards is final.
+            result.append(replace(obj, **changes))
+            cls = obj.__class__
+            replace_fn = getattr(cls, "__replace__", None)
+        elif replace_fn is None:
+            result.append(std_replace(obj, **changes))  # pyright: ignore[reportArgumentType]
+        else:
+            result.append(replace_fn(obj, **changes))
+    return result
+
+
+def asdict(obj: Any, *, dict_factory: Callable[[list[tuple[str, Any]]], Any] = dict) -> Any:
+    """Like :func:`dataclasses.asdict`, but uses a serializer generated for each semimutable dataclass.
+
+    The result is the same, see `_astuple_fn` for how it is faster. Other dataclasses go to :func:`dataclasses.asdict`.
+    """
+    if isinstance(obj, type) or not hasattr(obj, "__dataclass_fields__"):
+        raise TypeError("asdict() should be called on dataclass instances")
+    # Looked up on the instance, as going through the class would hit the metaclass hooks of "patch" and "error".
+    asdict_fn: Callable[[Any], Any] | None = getattr(obj, "__semimutable_asdict__", None)
+    if asdict_fn is None:
+        return std_asdict(obj, dict_factory=dict_factory)
+    return asdict_fn(dict_factory)
+
+
+def astuple(obj: Any, *, tuple_factory: Callable[[list[Any]], Any] = tuple) -> Any:
+    """Like :func:`dataclasses.astuple`, but uses a serializer generated for each semimutable dataclass.
+
+    The result is the same, see `_astuple_fn` for how it is faster. Other dataclasses go to :func:`dataclasses.astuple`.
+    """
+    if isinstance(obj, type) or not hasattr(obj, "__dataclass_fields__"):
+        raise TypeError("astuple() should be called on dataclass instances")
+    astuple_fn: Callable[[Any], Any] | None = getattr(obj, "__semimutable_astuple__", None)
+    if astuple_fn is None:
+        return std_astuple(obj, tuple_factory=tuple_factory)
+    return astuple_fn(tuple_factory)
+
+
+def iter_asdict(objs: Iterable[Any], *, dict_factory: Callable[[list[tuple[str, Any]]], Any] = dict) -> Iterator[Any]:
+    """Lazily yield ``asdict(obj, dict_factory=dict_factory)`` for each object in ``objs``.
+
+    Meant for streaming a large iterable of records to a sink without building a list of them. The serializer is only
+    looked up when the class changes from one object to the next.
+    """
+    return _iter_serialized(objs, asdict, "__semimutable_asdict__", dict_factory=dict_factory)
+
+
+def iter_astuple(objs: Iterable[Any], *, tuple_factory: Callable[[list[Any]], Any] = tuple) -> Iterator[Any]:
+    """Lazily yield ``astuple(obj, tuple_factory=tuple_factory)`` for each object in ``objs``.
+
+    See `iter_asdict`.
+    """
+    return _iter_serialized(objs, astuple, "__semimutable_astuple__", tuple_factory=tuple_factory)
+
+
+def from_rows[T](cls: type[T], rows: Iterable[Sequence[Any]], /, *, pause_gc: bool = False) -> list[T]:
+    """Construct one instance of ``cls`` per row, like ``[cls(*row) for row in rows]`` but faster.
+
+    For a semimutable dataclass with a generated ``__init__``, each row is stored straight into the fields of a new
+    instance, without calling ``__init__`` or parsing its arguments: ``__post_init__`` and default factories still run.
+    Any other class is called once per row.
+
+    The cyclic garbage collector runs every few hundred new instances, and for large lists that costs about as much as
+    constructing them. With ``pause_gc=True`` it is disabled until the list is complete, for the whole process: other
+    threads run without it too, and no reference cycle is collected while ``rows`` is consumed, however long that takes.
+    It is enabled again afterwards if it was enabled before, even if another thread disabled it in the meantime.
+    """
+    from_rows_fn = _own_bulk_fn(cls, "__semimutable_from_rows__")
+    with _gc_paused() if pause_gc else contextlib.nullcontext():
+        if from_rows_fn is None:
+            return [cls(*row) for row in rows]
+        return from_rows_fn(rows, False)
+
+
+def iter_from_rows[T](cls: type[T], rows: Iterable[Sequence[Any]], /) -> Iterator[T]:
+    """Lazily yield ``cls(*row)`` for each row, for streaming e.g. a database cursor.
+
+    Like `from_rows`, without the option to pause the garbage collector, since the caller runs between instances.
+    """
+    from_rows_fn = _own_bulk_fn(cls, "__semimutable_from_rows__")
+    if from_rows_fn is None:
+        return (cls(*row) for row in rows)
+    return from_rows_fn(rows, True)
+
+
+def from_records[T](cls: type[T], records: Iterable[Mapping[str, Any]], /, *, pause_gc: bool = False) -> list[T]:
+    """Construct one instance of ``cls`` per mapping, like ``[cls(**record) for record in records]`` but faster.
+
+    A record holding exactly the parameters of ``__init__`` is stored straight into a new instance. See `from_rows`,
+    also for ``pause_gc``, which disables the garbage collector of the whole process while the list is built.
+    """
+    from_records_fn = _own_bulk_fn(cls, "__semimutable_from_records__")
+    with _gc_paused() if pause_gc else contextlib.nullcontext():
+        if from_records_fn is None:
+            return [cls(**record) for record in records]
+        return from_records_fn(records, False)
+
+
+def iter_from_records[T](cls: type[T], records: Iterable[Mapping[str, Any]], /) -> Iterator[T]:
+    """Lazily yield ``cls(**record)`` for each record, for streaming e.g. a ``csv.DictReader``. See `iter_from_rows`."""
+    from_records_fn = _own_bulk_fn(cls, "__semimutable_from_records__")
+    if from_records_fn is None:
+        return (cls(**record) for record in records)
+    return from_records_fn(records, True)
+
+
+def _own_bulk_fn(cls: type, name: str) -> Callable[[Iterable[Any], bool], Any] | None:
+    """The `_from_rows_fn` or `_from_records_fn` of ``cls`` itself, not one inherited from a base class.
+
+    A subclass that was not decorated itself may have its own ``__init__``.
+    """
+    return vars(cls).get(name)
+
+
+@contextlib.contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Disable the cyclic garbage collector for the duration of the block, unless it is already disabled."""
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def _iter_serialized(
+    objs: Iterable[Any], serialize: Callable[..., Any], name: str, **factory_kwarg: Callable[..., Any]
+) -> Iterator[Any]:
+    """Shared implementation of `iter_asdict` and `iter_astuple`, ``factory_kwarg`` is the keyword of ``serialize``."""
+    (factory,) = factory_kwarg.values()
+    cls: type | None = None
+    serialize_fn: Callable[..., Any] | None = None
+    for obj in objs:
+        if obj.__class__ is not cls:
+            # serialize() validates obj and generates a lazy serializer, so the one looked up afterwards is final.
+            yield serialize(obj, **factory_kwarg)
+            cls = obj.__class__
+            serialize_fn = getattr(cls, name, None)
+        elif serialize_fn is None:
+            yield serialize(obj, **factory_kwarg)
+        else:
+            yield serialize_fn(obj, factory)
+
+
+def intern_info(cls: type) -> InternInfo:
+    """The hits, misses, ``intern_maxsize`` and number of live instances of the cache of the ``intern=True`` ``cls``.
+
+    A hit is a construction that returned an existing instance, a miss one that returned a new instance.
+    """
+    return _interner(cls).info()
+
+
+def intern_clear(cls: type) -> None:
+    """Empty the cache of the ``intern=True`` ``cls`` and reset its statistics.
+
+    Live instances are not affected, but constructing one of them again creates a new instance.
+    """
+    _interner(cls).clear()
+
+
+def intern_instance[T](obj: T, /) -> T:
+    """The live instance of the ``intern=True`` class of ``obj`` whose frozen fields equal those of ``obj``, or ``obj``
+    itself, which is then interned, if there is none.
+
+    Construction is interned, but `replace`, copies and unpickled instances are not, so this is how they are swapped
+    for the shared instance, e.g. ``intern_instance(replace(obj, key="y"))``. It counts as a hit or a miss, like
+    construction.
+    """
+    return _interner(obj.__class__).intern(obj)
+
+
+def _interner(cls: type) -> _Interner:
+    interner: _Interner | None = vars(cls).get("__semimutable_interner__")
+    if interner is None:
+        raise TypeError(f"{cls.__qualname__} is not a dataclass with intern=True")
+    return interner
+
+
+def changed_fields(obj: Any, /) -> tuple[str, ...]:
+    """The mutable fields of ``obj``, an instance of a ``track_changes=True`` class, assigned since it was created or
+    `clear_changes` was last called on it, in the order of the fields."""
+    change_bits = _tracked_change_bits(obj)
+    changes: int = getattr(obj, _CHANGES, 0)
+    return tuple(name for name, bit in change_bits.items() if changes & bit)
+
+
+def clear_changes(obj: Any, /) -> tuple[str, ...]:
+    """Forget the changes of ``obj``, an instance of a ``track_changes=True`` class, and return what `changed_fields`
+    returned just before.
+
+    Both happen at once, so an assignment from another thread is either among the fields returned or still recorded.
+    """
+    change_bits = _tracked_change_bits(obj)
+    with _write_lock(obj):
+        changes: int = getattr(obj, _CHANGES, 0)
+        object.__setattr__(obj, _CHANGES, 0)
+    return tuple(name for name, bit in change_bits.items() if changes & bit)
+
+
+def _tracked_change_bits(obj: object) -> dict[str, int]:
+    cls = type(obj)
+    change_bits = _change_bits(cls)
+    if change_bits is None:
+        raise TypeError(f"{cls.__qualname__} is not a dataclass with track_changes=True")
+    if "__semimutable_change_bits__" not in vars(cls):
+        # Not decorated by @semimutable.dataclass, e.g. by the stdlib, so the bits of the parent are all it has.
+        untracked = [
+            f.name
+            for f in fields(cls)  # pyright: ignore[reportArgumentType]
+            if f.name not in change_bits and "frozen" not in f.metadata
+        ]
+        if untracked:
+            raise TypeError(
+                f"{cls.__qualname__} adds the mutable fields {untracked}, which track_changes can't record unless it "
+                "is decorated with @semimutable.dataclass"
+            )
+    return change_bits
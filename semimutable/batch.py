@@ -0,0 +1,193 @@
+"""Columnar storage for many instances of one semimutable dataclass.
+
+A `Batch` holds one column per field instead of one object per instance. Fields annotated as ``int`` or ``float`` are
+stored in an :class:`array.array` of machine integers or doubles when every value fits, everything else in a plain
+sequence. Frozen fields stay frozen: their columns are read-only, and so are they on the row views.
+"""
+
+import functools
+import itertools
+import operator
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import Field, fields
+from typing import Any, Final, override
+
+from semimutable import (
+    _STATE_VERSION,  # pyright: ignore[reportPrivateUsage]
+    FrozenFieldError,
+    _field_storage,  # pyright: ignore[reportPrivateUsage]
+    _setstate_fn,  # pyright: ignore[reportPrivateUsage]
+)
+
+__all__ = ["Batch"]
+
+# Typecodes of the array columns. Annotations may also be strings, with `from __future__ import annotations`.
+_TYPECODES: Final[dict[object, tuple[str, type]]] = {
+    int: ("q", int),
+    "int": ("q", int),
+    float: ("d", float),
+    "float": ("d", float),
+}
+
+type _Column = array[Any] | list[Any] | tuple[Any, ...]
+
+
+class Batch[T]:
+    """A struct-of-arrays container for instances of the semimutable dataclass ``cls``.
+
+    Build one from instances with `Batch(cls, objs)`, or from columns with `Batch.from_columns`, and turn it back into
+    instances with `to_instances`. ``batch[i]`` and iteration return row views that read and write the columns in
+    place and, like the instances, raise `FrozenFieldError` on assignment to a frozen field.
+
+    `column` returns a column without copying it. Numeric columns are returned as a :class:`memoryview` of their array,
+    which ``numpy.asarray`` wraps without a copy as well. Frozen columns are read-only. A numeric column only accepts
+    values of its type, and a batch has a fixed length, so columns must not be resized.
+    """
+
+    __slots__ = ("cls", "_columns", "_names", "_len", "_row")
+
+    cls: type[T]
+    _columns: tuple[_Column, ...]
+    _names: dict[str, int]
+    _len: int
+    _row: type
+
+    def __init__(self, cls: type[T], objs: Iterable[T] = (), /) -> None:
+        """Store the fields of ``objs``, which must all be instances of ``cls`` itself, column by column."""
+        objs = objs if isinstance(objs, Sequence) else list(objs)
+        storage = _batch_storage(cls)
+        if not all(type(obj) is cls for obj in objs):
+            raise TypeError(f"Batch({cls.__qualname__}) only holds instances of {cls.__qualname__} itself")
+        self._init(cls, [list(map(operator.attrgetter(name), objs)) for name in storage])
+
+    @classmethod
+    def from_columns(cls, dataclass: type[T], /, **columns: Iterable[Any]) -> "Batch[T]":
+        """Build a batch from one iterable of values per field, keyed by field name. Values are not validated."""
+        _batch_storage(dataclass)
+        names = [f.name for f in fields(dataclass)]  # pyright: ignore[reportArgumentType]
+        if columns.keys() != set(names):
+            raise TypeError(f"from_columns() expected the columns {names}, got {list(columns)}")
+        values = [list(columns[name]) for name in names]
+        if len({len(column) for column in values}) > 1:
+            raise ValueError("from_columns() got columns of different lengths")
+        batch = object.__new__(cls)
+        batch._init(dataclass, values)
+        return batch
+
+    def _init(self, cls: type[T], values: list[list[Any]]) -> None:
+        # fields() leaves out ClassVar and InitVar pseudo-fields, just like _field_storage.
+        cls_fields = fields(cls)  # pyright: ignore[reportArgumentType]
+        names = [f.name for f in cls_fields]
+        self.cls = cls
+        self._names = {name: i for i, name in enumerate(names)}
+        self._columns = tuple(_to_column(f, column, _is_frozen(cls, f.name)) for f, column in zip(cls_fields, values))
+        self._len = len(values[0]) if values else 0
+        self._row = _row_class(cls, names)
+
+    def to_instances(self) -> list[T]:
+        """Create one instance per row, without running ``__init__``, as unpickling would."""
+        setstate = _setstate_fn(self.cls)
+        new = functools.partial(self.cls.__new__, self.cls)
+        instances: list[T] = []
+        append = instances.append
+        for row in zip(itertools.repeat(_STATE_VERSION), *self._columns):
+            obj = new()
+            setstate(obj, row)
+            append(obj)
+        return instances
+
+    def column(self, name: str) -> memoryview | list[Any] | tuple[Any, ...]:
+        """The column of the field ``name``, not copied: a memoryview for numeric columns, a tuple or list otherwise.
+
+        Frozen columns are a read-only memoryview or a tuple.
+        """
+        try:
+            column = self._columns[self._names[name]]
+        except KeyError:
+            raise KeyError(f"{self.cls.__qualname__} has no field {name!r}") from None
+        if isinstance(column, array):
+            view = memoryview(column)
+            return view.toreadonly() if _is_frozen(self.cls, name) else view
+        return column
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index: int, /) -> Any:
+        index = operator.index(index)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("Batch index out of range")
+        return self._row(self._columns, index)
+
+    def __iter__(self) -> Iterator[Any]:
+        row = self._row
+        columns = self._columns
+        return (row(columns, index) for index in range(self._len))
+
+    @override
+    def __repr__(self) -> str:
+        return f"Batch({self.cls.__qualname__}, <{self._len} rows>)"
+
+
+def _batch_storage(cls: type) -> tuple[str, ...]:
+    """The backing attributes of the fields of ``cls``, or a TypeError if it cannot be stored in a batch."""
+    storage = _field_storage(cls) if "__frozen_dataclass_descriptors__" in cls.__dict__ else None
+    if storage is None:
+        raise TypeError(
+            f"{cls.__qualname__} is not a non-frozen semimutable dataclass whose instances hold nothing but their fields"
+        )
+    return storage
+
+
+def _is_frozen(cls: type, name: str) -> bool:
+    frozen_names: set[str] = getattr(cls, "__frozen_dataclass_descriptors__")
+    return name in frozen_names
+
+
+def _to_column(f: Field[Any], values: list[Any], frozen: bool) -> _Column:
+    """A typed array for ``int`` and ``float`` fields holding only values of that type, else the values themselves."""
+    typecode, value_type = _TYPECODES.get(f.type, (None, None))
+    if typecode is not None and set(map(type, values)) <= {value_type}:
+        try:
+            return array(typecode, values)
+        except OverflowError:
+            pass
+    return tuple(values) if frozen else values
+
+
+def _row_class(cls: type, names: list[str]) -> type:
+    """The class of the row views of a batch, with one property per field reading its column at the row index."""
+
+    def column_property(i: int, name: str) -> property:
+        def fget(row: Any) -> Any:
+            return row._columns[i][row._index]
+
+        def fset(row: Any, value: Any) -> None:
+            row._columns[i][row._index] = value
+
+        def fset_frozen(row: Any, value: Any) -> None:
+            raise FrozenFieldError(name)
+
+        return property(fget, fset_frozen if _is_frozen(cls, name) else fset)
+
+    def __init__(self: Any, columns: tuple[_Column, ...], index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    def __repr__(self: Any) -> str:
+        values = ", ".join(f"{name}={column[self._index]!r}" for name, column in zip(names, self._columns))
+        return f"{cls.__qualname__}.Row({values})"
+
+    namespace: dict[str, Any] = {
+        "__slots__": ("_columns", "_index"),
+        "__init__": __init__,
+        "__repr__": __repr__,
+        "__module__": cls.__module__,
+        "__qualname__": f"{cls.__qualname__}.Row",
+    }
+    for i, name in enumerate(names):
+        namespace[name] = column_property(i, name)
+    return type("Row", (), namespace)
@@ -0,0 +1,195 @@
+"""A collection of instances of a semimutable dataclass, indexed by some of their frozen fields.
+
+The value of a frozen field can't change once the instance is built, so an index on it stays valid for as long as the
+instance is in the collection, and only adding and removing instances has to update it. Indexes on mutable fields are
+refused, since nothing would tell the collection that the value changed.
+"""
+
+import operator
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import fields, is_dataclass
+from typing import Any, override
+
+__all__ = ["IndexedCollection"]
+
+
+class IndexedCollection[T]:
+    """Instances of the semimutable dataclass ``cls`` or its subclasses, with indexes on frozen fields.
+
+    Subclasses that declare an indexed field again as a mutable field are refused.
+
+    Instances are members by identity, in the order they were added, so they don't need to be hashable. Their values of
+    the indexed fields do: `lookup` finds the instances with a given value in the hash index of a field in constant
+    time. `range` finds those with values in an interval in the sorted index of a field in logarithmic time, the
+    values of which must be orderable. Adding or removing an instance updates every index: in constant time for hash
+    indexes, and in linear time for sorted indexes, though with the small constant of moving the items of a list.
+    """
+
+    __slots__ = ("cls", "_members", "_hashed", "_sorted", "_types")
+
+    cls: type[T]
+    _members: dict[int, T]
+    _hashed: dict[str, dict[Any, dict[int, T]]]
+    # The sorted values of a field, and the instances with those values at the same positions.
+    _sorted: dict[str, tuple[list[Any], list[T]]]
+    # The classes of the members, in which every indexed field is known to be frozen.
+    _types: set[type]
+
+    def __init__(
+        self, cls: type[T], objs: Iterable[T] = (), /, *, index: Iterable[str] = (), sorted_index: Iterable[str] = ()
+    ) -> None:
+        """Index ``objs`` by the frozen fields in ``index`` with hash indexes, and those in ``sorted_index`` with
+        sorted ones. A field may be in both."""
+        index, sorted_index = tuple(index), tuple(sorted_index)
+        frozen_names = _frozen_names(cls)
+        names = {f.name for f in fields(cls)}  # pyright: ignore[reportArgumentType]
+        for name in (*index, *sorted_index):
+            if name not in names:
+                raise TypeError(f"{cls.__qualname__} has no field {name!r}")
+            if name not in frozen_names:
+                raise TypeError(f"the mutable field {name!r} of {cls.__qualname__} can't be indexed")
+        self.cls = cls
+        self._members = {}
+        self._hashed = {name: {} for name in index}
+        self._sorted = {name: ([], []) for name in sorted_index}
+        self._types = {cls}
+        self.update(objs)
+
+    def add(self, obj: T, /) -> None:
+        """Add ``obj`` to the collection and its indexes, unless it is already a member."""
+        self._check_type(obj)
+        if id(obj) in self._members:
+            return
+        # Read every value and find every position first, so that a value that can't be indexed leaves no trace.
+        hashed = [(values, getattr(obj, name)) for name, values in self._hashed.items()]
+        for _, value in hashed:
+            hash(value)
+        positions: list[tuple[list[Any], list[T], int, Any]] = []
+        for name, (keys, members) in self._sorted.items():
+            value = getattr(obj, name)
+            positions.append((keys, members, bisect_right(keys, value), value))
+        self._members[id(obj)] = obj
+        for values, value in hashed:
+            values.setdefault(value, {})[id(obj)] = obj
+        for keys, members, position, value in positions:
+            keys.insert(position, value)
+            members.insert(position, obj)
+
+    def update(self, objs: Iterable[T], /) -> None:
+        """Add each of ``objs`` like `add`, but sorting each sorted index once instead of inserting into it."""
+        new: dict[int, T] = {}
+        for obj in objs:
+            self._check_type(obj)
+            if id(obj) not in self._members:
+                new[id(obj)] = obj
+        added = list(new.values())
+        # As in add(), everything that can fail comes before the first change.
+        hashed = [(values, list(map(operator.attrgetter(name), added))) for name, values in self._hashed.items()]
+        for _, keys in hashed:
+            for key in keys:
+                hash(key)
+        # Sorting is stable, so members with equal values stay in the order they were added, as with add().
+        resorted: list[tuple[list[Any], list[T], list[tuple[Any, T]]]] = []
+        for name, (keys, members) in self._sorted.items():
+            pairs = [*zip(keys, members), *zip(map(operator.attrgetter(name), added), added)]
+            resorted.append((keys, members, sorted(pairs, key=operator.itemgetter(0))))
+        self._members |= new
+        for values, keys in hashed:
+            for key, obj in zip(keys, added):
+                values.setdefault(key, {})[id(obj)] = obj
+        for keys, members, pairs in resorted:
+            keys[:] = [key for key, _ in pairs]
+            members[:] = [member for _, member in pairs]
+
+    def remove(self, obj: T, /) -> None:
+        """Remove ``obj`` from the collection and its indexes, or raise a KeyError if it is not a member."""
+        if id(obj) not in self._members:
+            raise KeyError(obj)
+        # As in add(), find obj in every index before removing it from any, so that a failed lookup changes nothing.
+        buckets: list[tuple[dict[Any, dict[int, T]], Any, dict[int, T]]] = []
+        for name, values in self._hashed.items():
+            value = getattr(obj, name)
+            bucket = values.get(value)
+            if bucket is None or id(obj) not in bucket:
+                raise KeyError(f"{obj!r} is not in the index on {name}, its hash changed since it was added")
+            buckets.append((values, value, bucket))
+        positions: list[tuple[list[Any], list[T], int]] = []
+        for name, (keys, members) in self._sorted.items():
+            position = bisect_left(keys, getattr(obj, name))
+            while position < len(members) and members[position] is not obj:
+                position += 1
+            if position == len(members):
+                raise KeyError(f"{obj!r} is not in the index on {name}, its ordering changed since it was added")
+            positions.append((keys, members, position))
+        del self._members[id(obj)]
+        for values, value, bucket in buckets:
+            del bucket[id(obj)]
+            if not bucket:
+                del values[value]
+        for keys, members, position in positions:
+            del keys[position], members[position]
+
+    def discard(self, obj: T, /) -> None:
+        """Remove ``obj`` if it is a member."""
+        if id(obj) in self._members:
+            self.remove(obj)
+
+    def lookup(self, name: str, value: Any, /) -> list[T]:
+        """The members whose field ``name`` equals ``value``, using its hash index, or else its sorted index."""
+        values = self._hashed.get(name)
+        if values is not None:
+            bucket = values.get(value)
+            return [] if bucket is None else list(bucket.values())
+        keys, members = self._sorted_index(name)
+        return members[bisect_left(keys, value) : bisect_right(keys, value)]
+
+    def range(self, name: str, /, start: Any = None, stop: Any = None) -> list[T]:
+        """The members whose field ``name`` is at least ``start`` and less than ``stop``, in the order of their values.
+
+        A bound that is None is left out, and the values must be orderable with the bounds, as in the sorted index.
+        """
+        keys, members = self._sorted_index(name)
+        low = 0 if start is None else bisect_left(keys, start)
+        high = len(keys) if stop is None else bisect_left(keys, stop)
+        return members[low:high]
+
+    def _check_type(self, obj: T) -> None:
+        """Raise a TypeError unless ``obj`` is an instance of ``cls`` in whose class every indexed field is frozen."""
+        obj_type = type(obj)
+        if obj_type in self._types:
+            return
+        if not isinstance(obj, self.cls):
+            raise TypeError(f"{obj_type.__qualname__} is not a subclass of {self.cls.__qualname__}")
+        frozen_names = _frozen_names(obj_type)
+        for name in (*self._hashed, *self._sorted):
+            if name not in frozen_names:
+                raise TypeError(f"{obj_type.__qualname__} declares the indexed field {name!r} as mutable")
+        self._types.add(obj_type)
+
+    def _sorted_index(self, name: str) -> tuple[list[Any], list[T]]:
+        try:
+            return self._sorted[name]
+        except KeyError:
+            raise KeyError(f"the collection has no index on {self.cls.__qualname__}.{name}") from None
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._members.values())
+
+    def __contains__(self, obj: object, /) -> bool:
+        return id(obj) in self._members
+
+    @override
+    def __repr__(self) -> str:
+        return f"IndexedCollection({self.cls.__qualname__}, <{len(self)} members>)"
+
+
+def _frozen_names(cls: type) -> set[str]:
+    """The frozen fields of the dataclass ``cls``, whether or not enforcement is on, or a TypeError if it is not one."""
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__qualname__} is not a dataclass")
+    frozen: bool = getattr(cls, "__dataclass_params__").frozen
+    return {f.name for f in fields(cls) if frozen or "frozen" in f.metadata}
@@ -0,0 +1,514 @@
+"""Instances of a dataclass laid out in one flat buffer, which other processes can read without copying it.
+
+The layout is derived from the fields of the class and their annotations, one column per field. ``int``, ``float`` and
+``bool`` fields whose values all fit are arrays of machine values, and ``bytes`` fields whose values all have the same
+length a fixed-width column. Other fields are an offset table into the values one after the other: encoded in UTF-8 for
+``str`` fields, as is for ``bytes`` fields and pickled otherwise.
+
+A `Records` sequence reads such a buffer. Its items are proxies, like the rows of `semimutable.batch.Batch`: a frozen
+field is read from the buffer on every access, and can't be assigned. A mutable field can: the value is kept by the
+`Records` object, for the index of the record, and every proxy of that record reads it from then on. The buffer itself
+never changes, so values assigned in one process are not seen by the others.
+
+Reading a pickled column runs the code the pickles refer to, so `Records` refuse buffers with such columns unless
+``allow_pickle=True`` is passed, which must only be done for buffers and files from a trusted source.
+
+`SharedRecords` keeps the buffer in a :mod:`multiprocessing.shared_memory` block. Pickling it, e.g. as an argument of
+a task submitted to a ``ProcessPoolExecutor``, sends the name of the block only, and each process maps it once.
+
+`dump` writes the buffer to a file, and `open` maps such a file as `MappedRecords`, so that loading it reads nothing
+until records are accessed.
+"""
+
+import atexit
+import builtins
+import json
+import mmap
+import operator
+import os
+import pickle
+import sys
+import threading
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import Field, fields, is_dataclass
+from itertools import accumulate
+from multiprocessing import shared_memory
+from types import TracebackType
+from typing import Any, Final, Self, override
+
+from semimutable import FrozenFieldError
+
+__all__ = ["MappedRecords", "Records", "SharedRecords", "dump", "open", "pack"]
+
+_MAGIC: Final = b"SMREC\x00\x00\x01"
+# The magic, then the length of the JSON header as 8 little-endian bytes, then the header.
+_HEADER_START: Final = 16
+# Columns start at multiples of 8, so that the machine values memoryview.cast reads are aligned.
+_ALIGN: Final = 8
+
+# Column kinds of the annotations that have one. Annotations may also be strings, with `from __future__ import
+# annotations`. Single letters are the struct formats of fixed-width columns.
+_KINDS: Final[dict[object, str]] = {
+    int: "q",
+    "int": "q",
+    float: "d",
+    "float": "d",
+    bool: "?",
+    "bool": "?",
+    str: "str",
+    "str": "str",
+    bytes: "bytes",
+    "bytes": "bytes",
+}
+# The type every value of a column of that kind must have, exactly.
+_VALUE_TYPES: Final[dict[str, type]] = {"q": int, "d": float, "?": bool, "str": str, "bytes": bytes}
+
+# The keys of the header of a column of each kind, other than its name, kind and offset.
+_COLUMN_KEYS: Final[dict[str, tuple[str, ...]]] = {
+    "q": (),
+    "d": (),
+    "?": (),
+    "s": ("width",),
+    "str": ("data",),
+    "bytes": ("data",),
+    "pickle": ("data",),
+}
+
+type _Chunk = bytes | array[Any]
+
+
+class Records[T]:
+    """A read-only sequence of proxies for the instances of the dataclass ``cls`` laid out in a buffer.
+
+    ``records[i]`` and iteration return proxies whose frozen fields read the buffer, see the module docstring. `column`
+    returns a column without copying it, as a read-only :class:`memoryview` for ``int``, ``float`` and ``bool`` fields.
+    Those views, like the buffer, must be released before the memory behind them is.
+    """
+
+    __slots__ = ("cls", "_views", "_readers", "_writes", "_names", "_len", "_record")
+
+    cls: type[T]
+    _views: "dict[str, memoryview[Any]]"
+    _readers: tuple[Callable[[int], Any], ...]
+    # The values assigned to each mutable field through the proxies, by index.
+    _writes: dict[str, dict[int, Any]]
+    _names: dict[str, int]
+    _len: int
+    _record: type
+
+    def __init__(self, cls: type[T], buffer: Any, /, *, allow_pickle: bool = False) -> None:
+        """Read the instances of ``cls`` that `pack` laid out in ``buffer``, which must not change while in use.
+
+        Unless ``allow_pickle`` is True, a ValueError is raised if the buffer has pickled columns, see the module
+        docstring.
+        """
+        self._read(cls, buffer, allow_pickle)
+
+    def _read(self, cls: type[T], buffer: Any, allow_pickle: bool) -> None:
+        frozen_names = _frozen_names(cls)
+        # The view is released on the way out, so a rejected mmap can still be closed; the column views stay valid.
+        with memoryview(buffer).toreadonly().cast("B") as buffer:
+            if bytes(buffer[: len(_MAGIC)]) != _MAGIC or len(buffer) < _HEADER_START:
+                raise ValueError("not a buffer of semimutable records")
+            header_end = _HEADER_START + int.from_bytes(buffer[len(_MAGIC) : _HEADER_START], "little")
+            if header_end > len(buffer):
+                raise ValueError("not a buffer of semimutable records, or a truncated one: the header is cut off")
+            try:
+                header: dict[str, Any] = json.loads(bytes(buffer[_HEADER_START:header_end]))
+                _check_header(header)
+            except (ValueError, KeyError, TypeError) as exc:
+                raise ValueError("not a buffer of semimutable records, or a corrupt one: invalid header") from exc
+            names = [f.name for f in fields(cls)]  # pyright: ignore[reportArgumentType]
+            if [column["name"] for column in header["columns"]] != names:
+                raise ValueError(f"the records do not have the fields of {cls.__qualname__}, {names}")
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"the records were written on a {header['byteorder']}-endian machine")
+            pickled = [column["name"] for column in header["columns"] if column["kind"] == "pickle"]
+            if pickled and not allow_pickle:
+                raise ValueError(
+                    f"the records have pickled columns {pickled}, which can run arbitrary code when read. Pass "
+                    "allow_pickle=True if they come from a trusted source"
+                )
+            base = _aligned(header_end)
+            count: int = header["count"]
+            self.cls = cls
+            self._views = {}
+            try:
+                self._readers = tuple(_reader(self._views, buffer, base, count, column) for column in header["columns"])
+            except BaseException:
+                # The views of the columns read so far must not keep the buffer exported.
+                self._release()
+                raise
+            self._writes = {name: {} for name in names if name not in frozen_names}
+            self._names = {name: i for i, name in enumerate(names)}
+            self._len = count
+            self._record = _record_class(cls, names, self._readers, self._writes)
+
+    def column(self, name: str) -> "memoryview[Any] | list[Any]":
+        """The values of the field ``name``: a read-only memoryview for numeric columns, a new list otherwise.
+
+        Mutable fields that were assigned through a proxy are returned as a list holding the assigned values.
+        """
+        try:
+            read = self._readers[self._names[name]]
+        except KeyError:
+            raise KeyError(f"{self.cls.__qualname__} has no field {name!r}") from None
+        writes = self._writes.get(name)
+        if writes:
+            return [writes[index] if index in writes else read(index) for index in range(self._len)]
+        view = self._views.get(name)
+        return view if view is not None else list(map(read, range(self._len)))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index: int, /) -> Any:
+        index = operator.index(index)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("Records index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._record, range(self._len))
+
+    def _release(self) -> None:
+        """Release the views of the buffer, after which the records and their proxies can't be read anymore."""
+        for view in self._views.values():
+            view.release()
+
+    @override
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.cls.__qualname__}, <{self._len} records>)"
+
+
+class SharedRecords[T](Records[T]):
+    """`Records` in a :mod:`multiprocessing.shared_memory` block, which other processes attach to when unpickling them.
+
+    ``SharedRecords(cls, objs)`` creates the block, and the process that created it should `unlink` it once every
+    process is done with it, which leaving a ``with`` block does. Other processes map the block once, however often
+    they unpickle the records, and unmap it when they exit, or on `close`. Values assigned to mutable fields stay in
+    the process that assigned them. Pickled columns are read without ``allow_pickle``, since the block can only have
+    been laid out by this class.
+    """
+
+    __slots__ = ("_shm",)
+
+    _shm: shared_memory.SharedMemory
+
+    def __init__(self, cls: type[T], objs: Iterable[T] = (), /) -> None:
+        """Lay out ``objs``, which must all be instances of ``cls`` itself, in a new shared memory block."""
+        objs = objs if isinstance(objs, Sequence) else list(objs)
+        size, chunks = _pack(cls, objs)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            _write(self._shm.buf, chunks)
+            self._read(cls, self._shm.buf, True)
+        except BaseException:
+            self._shm.close()
+            self._shm.unlink()
+            raise
+        with _ATTACHED_LOCK:
+            _ATTACHED[self._shm.name] = self
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory block."""
+        return self._shm.name
+
+    def close(self) -> None:
+        """Unmap the block from this process. The records and their proxies can't be read anymore."""
+        with _ATTACHED_LOCK:
+            if _ATTACHED.get(self._shm.name) is self:
+                del _ATTACHED[self._shm.name]
+        self._release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Close the records and destroy the block, once no process needs it anymore."""
+        self.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.unlink()
+
+    @override
+    def __reduce__(self) -> tuple[Any, ...]:
+        return SharedRecords._attach, (self._shm.name, self.cls)
+
+    @classmethod
+    def _attach(cls, name: str, dataclass: type[T]) -> "SharedRecords[T]":
+        """The records in the block ``name`` in this process, mapping it if it isn't yet."""
+        with _ATTACHED_LOCK:
+            records = _ATTACHED.get(name)
+            if records is None:
+                records = object.__new__(cls)
+                # Python 3.13+ can leave the block to the process that created it. On 3.12 the resource tracker of a
+                # process started by multiprocessing is that of its parent, which already tracks the block.
+                track: dict[str, Any] = {"track": False} if sys.version_info >= (3, 13) else {}
+                records._shm = shared_memory.SharedMemory(name, **track)
+                # The block was laid out by SharedRecords, in the process that pickled the records or in a parent of it.
+                records._read(dataclass, records._shm.buf, True)
+                _ATTACHED[name] = records
+            return records
+
+
+class MappedRecords[T](Records[T]):
+    """`Records` in a file that `open` mapped read-only. The operating system reads the pages of the file as needed.
+
+    The file must not change while it is mapped. `close`, or leaving a ``with`` block, unmaps it.
+    """
+
+    __slots__ = ("_mmap",)
+
+    _mmap: mmap.mmap
+
+    def __init__(self, cls: type[T], path: "str | os.PathLike[str]", /, *, allow_pickle: bool = False) -> None:
+        """Map the records of ``cls`` that `dump` wrote to the file at ``path``, see `Records` for ``allow_pickle``."""
+        with builtins.open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read(cls, self._mmap, allow_pickle)
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    @override
+    def __iter__(self) -> Iterator[Any]:
+        # Scans read the file from start to end, so the operating system can read ahead and drop the pages behind.
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        return super().__iter__()
+
+    def close(self) -> None:
+        """Unmap the file. The records and their proxies can't be read anymore."""
+        self._release()
+        self._mmap.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+# The records each process has mapped, by block name. A forked process inherits those of its parent, mapping included.
+_ATTACHED: Final[dict[str, SharedRecords[Any]]] = {}
+_ATTACHED_LOCK: Final = threading.Lock()
+
+
+@atexit.register
+def _close_attached() -> None:
+    # Otherwise SharedMemory.__del__ may run first when the interpreter shuts down, and fail as the views still exist.
+    # Forked worker processes skip this and everything else on exit.
+    for records in list(_ATTACHED.values()):
+        records.close()
+
+
+def pack[T](cls: type[T], objs: Iterable[T], /) -> bytearray:
+    """Lay out ``objs``, which must all be instances of the dataclass ``cls`` itself, in a new buffer for `Records`."""
+    size, chunks = _pack(cls, objs if isinstance(objs, Sequence) else list(objs))
+    buffer = bytearray(size)
+    _write(buffer, chunks)
+    return buffer
+
+
+def dump[T](cls: type[T], objs: Iterable[T], path: "str | os.PathLike[str]", /) -> None:
+    """Write ``objs``, which must all be instances of the dataclass ``cls`` itself, to a new file for `open`."""
+    size, chunks = _pack(cls, objs if isinstance(objs, Sequence) else list(objs))
+    with builtins.open(path, "wb") as file:
+        for offset, chunk in chunks:
+            file.write(bytes(offset - file.tell()))
+            file.write(chunk)
+        file.write(bytes(size - file.tell()))
+
+
+def open[T](cls: type[T], path: "str | os.PathLike[str]", /, *, allow_pickle: bool = False) -> MappedRecords[T]:
+    """Map the records of ``cls`` that `dump` wrote to the file at ``path``, see `MappedRecords`.
+
+    Unless ``allow_pickle`` is True, a ValueError is raised if the file has pickled columns, whose reading could run
+    arbitrary code. Only pass it for files from a trusted source.
+    """
+    return MappedRecords(cls, path, allow_pickle=allow_pickle)
+
+
+def _frozen_names(cls: type) -> set[str]:
+    """The frozen fields of the dataclass ``cls``, or a TypeError if it is not one."""
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__qualname__} is not a dataclass")
+    if getattr(cls, "__dataclass_params__").frozen:
+        return {f.name for f in fields(cls)}
+    return set(getattr(cls, "__frozen_dataclass_descriptors__", ()))
+
+
+def _pack(cls: type, objs: Sequence[Any]) -> tuple[int, list[tuple[int, _Chunk]]]:
+    """The size of a buffer laying out ``objs``, and the chunks to write into it, by offset."""
+    _frozen_names(cls)
+    if not all(type(obj) is cls for obj in objs):
+        raise TypeError(f"only instances of {cls.__qualname__} itself can be laid out as its records")
+    columns: list[dict[str, Any]] = []
+    data: list[tuple[int, _Chunk]] = []
+    end = 0
+    for f in fields(cls):  # pyright: ignore[reportArgumentType]
+        column, chunks = _column(f, list(map(operator.attrgetter(f.name), objs)))
+        columns.append(column)
+        # Offsets are relative to the first column, so that they don't depend on the length of the header.
+        for key, chunk in chunks:
+            end = _aligned(end)
+            column[key] = end
+            data.append((end, chunk))
+            end += len(chunk) * _itemsize(chunk)
+    header = {"count": len(objs), "byteorder": sys.byteorder, "columns": columns}
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    base = _aligned(_HEADER_START + len(encoded))
+    chunks = [(0, _MAGIC + len(encoded).to_bytes(8, "little") + encoded)]
+    chunks += [(base + offset, chunk) for offset, chunk in data]
+    # A shared memory block can't be empty.
+    return max(base + end, 1), chunks
+
+
+def _column(f: Field[Any], values: list[Any]) -> tuple[dict[str, Any], list[tuple[str, _Chunk]]]:
+    """The header entry of the column of ``f`` holding ``values``, and its chunks by the key of their offset."""
+    kind = _KINDS.get(f.type)
+    if kind is not None and not set(map(type, values)) <= {_VALUE_TYPES[kind]}:
+        kind = None
+    if kind in ("q", "d"):
+        try:
+            return {"name": f.name, "kind": kind}, [("offset", array(kind, values))]
+        except OverflowError:
+            kind = None
+    if kind == "?":
+        return {"name": f.name, "kind": kind}, [("offset", bytes(values))]
+    if kind == "bytes" and len(widths := set(map(len, values))) == 1 and (width := widths.pop()):
+        return {"name": f.name, "kind": "s", "width": width}, [("offset", b"".join(values))]
+    if kind == "str":
+        encoded = [value.encode("utf-8", "surrogatepass") for value in values]
+    elif kind == "bytes":
+        encoded = values
+    else:
+        kind = "pickle"
+        encoded = [pickle.dumps(value, pickle.HIGHEST_PROTOCOL) for value in values]
+    offsets = array("Q", accumulate(map(len, encoded), initial=0))
+    return {"name": f.name, "kind": kind}, [("offset", offsets), ("data", b"".join(encoded))]
+
+
+def _reader(
+    views: "dict[str, memoryview[Any]]", buffer: memoryview, base: int, count: int, column: dict[str, Any]
+) -> Callable[[int], Any]:
+    """The function reading the value of ``column`` at an index. The views of ``buffer`` it keeps go into ``views``.
+
+    A ValueError is raised if the column doesn't fit in ``buffer``, as in a truncated file.
+    """
+    kind: str = column["kind"]
+    start = base + column["offset"]
+    if kind in ("q", "d", "?"):
+        view = _section(buffer, column, start, count * _itemsize(kind)).cast(kind)
+        views[column["name"]] = view
+        return view.__getitem__
+    if kind == "s":
+        width: int = column["width"]
+        values = _section(buffer, column, start, count * width)
+        views[f"{column['name']}.values"] = values
+        return lambda index: bytes(values[index * width : (index + 1) * width])
+    offsets = views[f"{column['name']}.offsets"] = _section(buffer, column, start, (count + 1) * 8).cast("Q")
+    data = views[f"{column['name']}.data"] = _section(buffer, column, base + column["data"], offsets[count])
+    if kind == "str":
+        # Copying the slice into bytes first decodes faster than decoding the view.
+        return lambda index: data[offsets[index] : offsets[index + 1]].tobytes().decode("utf-8", "surrogatepass")
+    if kind == "bytes":
+        return lambda index: bytes(data[offsets[index] : offsets[index + 1]])
+    return lambda index: pickle.loads(data[offsets[index] : offsets[index + 1]])
+
+
+def _section(buffer: memoryview, column: dict[str, Any], start: int, length: int) -> memoryview:
+    """The ``length`` bytes of ``buffer`` from ``start`` on, or a ValueError if they go past its end."""
+    if start + length > len(buffer):
+        raise ValueError(f"the records are truncated, the column {column['name']!r} goes past the end of the buffer")
+    return buffer[start : start + length]
+
+
+def _check_header(header: Any) -> None:
+    """Raise a ValueError, KeyError or TypeError unless ``header`` has the keys and types `pack` writes."""
+    if not isinstance(header["count"], int) or header["count"] < 0 or not isinstance(header["byteorder"], str):
+        raise ValueError("invalid count or byteorder")
+    for column in header["columns"]:
+        kind = column["kind"]
+        if not isinstance(column["name"], str) or kind not in _COLUMN_KEYS or column["offset"] < 0:
+            raise ValueError("invalid column")
+        for key in _COLUMN_KEYS[kind]:
+            if not isinstance(column[key], int) or column[key] < 0:
+                raise ValueError(f"invalid column {key}")
+
+
+def _record_class(
+    cls: type, names: list[str], readers: Sequence[Callable[[int], Any]], writes: dict[str, dict[int, Any]]
+) -> type:
+    """The class of the proxies of `Records`, with a property per field, reading the record at the index of the proxy.
+
+    Frozen fields read the buffer and can't be assigned. Mutable fields read the value assigned to them in ``writes``,
+    if any, and the buffer otherwise, and assignments go to ``writes``.
+    """
+
+    def frozen_property(name: str, read: Callable[[int], Any]) -> property:
+        def fget(record: Any) -> Any:
+            return read(record._index)
+
+        def fset(record: Any, value: Any) -> None:
+            raise FrozenFieldError(name)
+
+        return property(fget, fset)
+
+    def mutable_property(read: Callable[[int], Any], written: dict[int, Any]) -> property:
+        def fget(record: Any) -> Any:
+            index = record._index
+            return written[index] if index in written else read(index)
+
+        def fset(record: Any, value: Any) -> None:
+            written[record._index] = value
+
+        return property(fget, fset)
+
+    def __init__(self: Any, index: int) -> None:
+        self._index = index
+
+    def __repr__(self: Any) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in names)
+        return f"{cls.__qualname__}.Record({values})"
+
+    namespace: dict[str, Any] = {
+        "__slots__": ("_index",),
+        "__init__": __init__,
+        "__repr__": __repr__,
+        "__module__": cls.__module__,
+        "__qualname__": f"{cls.__qualname__}.Record",
+    }
+    for name, read in zip(names, readers):
+        written = writes.get(name)
+        namespace[name] = frozen_property(name, read) if written is None else mutable_property(read, written)
+    return type("Record", (), namespace)
+
+
+def _write(buffer: Any, chunks: list[tuple[int, _Chunk]]) -> None:
+    target = memoryview(buffer).cast("B")
+    for offset, chunk in chunks:
+        raw = memoryview(chunk).cast("B")
+        target[offset : offset + len(raw)] = raw
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _itemsize(chunk: _Chunk | str) -> int:
+    if isinstance(chunk, str):
+        return array("b" if chunk == "?" else chunk).itemsize
+    return chunk.itemsize if isinstance(chunk, array) else 1
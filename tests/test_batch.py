@@ -0,0 +1,90 @@
+import pytest
+
+from semimutable import FrozenFieldError, dataclass, field
+from semimutable.batch import Batch
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_batch_round_trip(slots: bool):
+    @dataclass(slots=slots)
+    class Item:
+        id: int = field(frozen=True)
+        price: float = 0.0
+        tags: list[str] = field(frozen=True, default_factory=list[str])
+        note: str = ""
+
+    objs = [Item(i, i / 2, [str(i)], "n") for i in range(5)]
+    batch = Batch(Item, objs)
+    assert len(batch) == 5
+    assert batch.to_instances() == objs
+    assert [row.id for row in batch] == [0, 1, 2, 3, 4]
+    assert repr(batch[-1]).endswith(".Item.Row(id=4, price=2.0, tags=['4'], note='n')")
+    with pytest.raises(IndexError):
+        batch[5]
+
+    new = batch.to_instances()[0]
+    with pytest.raises(FrozenFieldError):
+        new.id = 1
+
+
+def test_batch_columns():
+    @dataclass
+    class Row:
+        id: int = field(frozen=True)
+        price: float = 0.0
+        name: str = field(frozen=True, default="")
+        big: int = 0
+
+    batch = Batch(Row, [Row(1, 1.5, "a", 2**70), Row(2, 2.5, "b", 1)])
+    ids = batch.column("id")
+    assert isinstance(ids, memoryview) and ids.readonly and ids.tolist() == [1, 2]
+    with pytest.raises(TypeError):
+        ids[0] = 3
+    assert batch.column("name") == ("a", "b")
+    # Too large for a machine integer, so kept as Python ints.
+    assert batch.column("big") == [2**70, 1]
+
+    prices = batch.column("price")
+    assert isinstance(prices, memoryview) and not prices.readonly
+    prices[0] = 9.5  # pyright: ignore[reportCallIssue, reportArgumentType]
+    assert batch[0].price == 9.5
+    batch[1].price = 7.5
+    assert prices[1] == 7.5
+    with pytest.raises(FrozenFieldError):
+        batch[0].id = 5
+    with pytest.raises(FrozenFieldError):
+        batch[0].name = "c"
+    with pytest.raises(KeyError):
+        batch.column("missing")
+
+
+def test_batch_from_columns():
+    @dataclass(slots=True)
+    class Row:
+        id: int = field(frozen=True)
+        name: str = ""
+
+    batch = Batch.from_columns(Row, id=range(3), name="abc")
+    assert batch.to_instances() == [Row(0, "a"), Row(1, "b"), Row(2, "c")]
+    with pytest.raises(TypeError):
+        Batch.from_columns(Row, id=range(3))
+    with pytest.raises(ValueError):
+        Batch.from_columns(Row, id=range(3), name="ab")
+
+
+def test_batch_refuses_other_classes():
+    @dataclass
+    class Row:
+        id: int = field(frozen=True)
+
+    class Sub(Row):
+        pass
+
+    @dataclass(frozen=True)
+    class Frozen:
+        id: int
+
+    with pytest.raises(TypeError):
+        Batch(Row, [Row(1), Sub(2)])
+    with pytest.raises(TypeError):
+        Batch(Frozen, [])
@@ -1,5 +1,7 @@
 # pyright: reportMissingParameterType = false
 import dataclasses
+import inspect
+import typing
 import weakref
 from typing import override
 
@@ -8,6 +10,14 @@
 import semimutable
 
 
+@pytest.fixture(autouse=True, params=[True, False], ids=["enforced", "not-enforced"])
+def enforce(request: pytest.FixtureRequest) -> typing.Iterator[bool]:
+    """Run every test with frozen fields enforced, and with enforcement turned off by `semimutable.configure`."""
+    previous = semimutable.configure(enforce=request.param)
+    yield request.param
+    semimutable.configure(**previous)
+
+
 def test_already_frozen_class_raises_frozen_instance_error():
     """We raise dataclasses.FrozenInstanceError for frozen=True fields even in semimutable dataclasses for maximum
     compatibility with existing code.
@@ -170,3 +180,164 @@ class Sm:
         Sm(1, 2)  # type: ignore
     Std(x=1, y=2)
     Sm(x=1, y=2)
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_init_signature_and_docstring(slots):
+    @dataclasses.dataclass(slots=slots)
+    class Std:
+        a: int
+        b: list[int] = dataclasses.field(default_factory=list)
+        c: dataclasses.InitVar[int] = 5
+        _: dataclasses.KW_ONLY
+        d: str = "d"
+
+        def __post_init__(self, c):
+            pass
+
+    @semimutable.dataclass(slots=slots)
+    class Sm:
+        a: int = semimutable.field(frozen=True)
+        b: list[int] = semimutable.field(default_factory=list)
+        c: dataclasses.InitVar[int] = 5
+        _: dataclasses.KW_ONLY
+        d: str = semimutable.field(frozen=True, default="d")
+
+        def __post_init__(self, c):
+            pass
+
+    assert str(inspect.signature(Std)) == str(inspect.signature(Sm))
+    assert Std.__doc__ == Sm.__doc__.replace("Sm", "Std")  # pyright: ignore[reportOptionalMemberAccess]
+    assert str(typing.get_type_hints(Std.__init__)) == str(typing.get_type_hints(Sm.__init__))
+    assert Sm.__init__.__qualname__ == f"{Sm.__qualname__}.__init__"
+
+
+@pytest.mark.parametrize(("slots", "weakref_slot"), [(False, False), (True, False), (True, True)])
+def test_dataclass_params(slots, weakref_slot):
+    @dataclasses.dataclass(slots=slots, weakref_slot=weakref_slot)
+    class Std:
+        x: int = dataclasses.field()
+
+    @semimutable.dataclass(slots=slots, weakref_slot=weakref_slot)
+    class Sm:
+        x: int = semimutable.field(frozen=True)
+
+    assert repr(Std.__dataclass_params__) == repr(Sm.__dataclass_params__)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_instance_dict_and_weakref_without_slots():
+    @dataclasses.dataclass
+    class Std:
+        x: int = dataclasses.field()
+
+    @semimutable.dataclass
+    class Sm:
+        x: int = semimutable.field(frozen=True)
+
+    for cls in (Std, Sm):
+        inst = cls(x=1)
+        assert 1 in vars(inst).values()
+        assert weakref.ref(inst)() is inst
+
+
+def test_invalid_slots_options():
+    for decorator in (dataclasses.dataclass, semimutable.dataclass):
+        with pytest.raises(TypeError, match="weakref_slot is True but slots is False"):
+
+            @decorator(weakref_slot=True)
+            class _A:
+                x: int
+
+        with pytest.raises(TypeError, match="already specifies __slots__"):
+
+            @decorator(slots=True)
+            class _B:
+                __slots__ = ("x",)
+                x: int
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_replace(slots):
+    @dataclasses.dataclass(slots=slots)
+    class Std:
+        x: int = dataclasses.field()
+        y: list[int] = dataclasses.field(default_factory=list)
+        z: int = dataclasses.field(default=0, init=False)
+
+    @semimutable.dataclass(slots=slots)
+    class Sm:
+        x: int = semimutable.field(frozen=True)
+        y: list[int] = semimutable.field(default_factory=list)
+        z: int = semimutable.field(default=0, init=False)
+
+    for cls, replace in ((Std, dataclasses.replace), (Sm, semimutable.replace)):
+        obj = cls(x=1, y=[2])
+        obj.z = 3
+        new = replace(obj, x=4)
+        assert (new.x, new.y, new.z) == (4, [2], 0)
+        assert new.y is obj.y
+        with pytest.raises((TypeError, ValueError), match="init=False"):
+            replace(obj, z=1)
+        with pytest.raises(TypeError, match=r"\.__init__\(\) got an unexpected keyword argument 'w'"):
+            replace(obj, w=1)
+        with pytest.raises(TypeError, match="should be called on dataclass instances"):
+            replace(cls, x=1)  # pyright: ignore[reportArgumentType]
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_replace_runs_post_init(slots):
+    @dataclasses.dataclass(slots=slots)
+    class Std:
+        x: int = dataclasses.field()
+        scale: dataclasses.InitVar[int] = 1
+        y: int = dataclasses.field(init=False)
+
+        def __post_init__(self, scale: int) -> None:
+            self.y = self.x * scale
+
+    @semimutable.dataclass(slots=slots)
+    class Sm:
+        x: int = semimutable.field(frozen=True)
+        scale: dataclasses.InitVar[int] = 1
+        y: int = semimutable.field(init=False)
+
+        def __post_init__(self, scale: int) -> None:
+            self.y = self.x * scale
+
+    for cls, replace in ((Std, dataclasses.replace), (Sm, semimutable.replace)):
+        assert replace(cls(x=2, scale=3), x=5, scale=2).y == 10
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_asdict_and_astuple(slots):
+    @dataclasses.dataclass(slots=slots)
+    class StdInner:
+        a: int = dataclasses.field()
+
+    @dataclasses.dataclass(slots=slots)
+    class Std:
+        x: int = dataclasses.field()
+        y: list[object] = dataclasses.field(default_factory=list)
+        z: dict[str, object] = dataclasses.field(default_factory=dict)
+
+    @semimutable.dataclass(slots=slots)
+    class SmInner:
+        a: int = semimutable.field(frozen=True)
+
+    @semimutable.dataclass(slots=slots)
+    class Sm:
+        x: int = semimutable.field(frozen=True)
+        y: list[object] = semimutable.field(default_factory=list)
+        z: dict[str, object] = semimutable.field(default_factory=dict)
+
+    std = Std(x=1, y=[StdInner(2), (3, 4)], z={"k": StdInner(5)})
+    sm = Sm(x=1, y=[SmInner(2), (3, 4)], z={"k": SmInner(5)})
+    assert semimutable.asdict(sm) == dataclasses.asdict(std)
+    assert semimutable.astuple(sm) == dataclasses.astuple(std)
+    assert semimutable.asdict(sm, dict_factory=list) == dataclasses.asdict(std, dict_factory=list)  # pyright: ignore[reportArgumentType]
+    assert semimutable.astuple(sm, tuple_factory=list) == dataclasses.astuple(std, tuple_factory=list)  # pyright: ignore[reportArgumentType]
+    # Values that are not atomic are deep copied.
+    assert semimutable.asdict(sm)["y"] is not sm.y
+    for func in (semimutable.asdict, semimutable.astuple):
+        with pytest.raises(TypeError, match="should be called on dataclass instances"):
+            func(Sm)
@@ -0,0 +1,135 @@
+from typing import override
+
+import pytest
+
+from semimutable import dataclass, field
+from semimutable.indexed import IndexedCollection
+
+
+@dataclass
+class Order:
+    id: int = field(frozen=True)
+    region: str = field(frozen=True)
+    status: str = "new"
+
+
+@dataclass
+class RushOrder(Order):
+    fee: float = 0.0
+
+
+def test_indexed_collection_lookup_and_range():
+    orders = [Order(i, "eu" if i % 2 else "us") for i in range(6)]
+    collection = IndexedCollection(Order, orders, index=["region"], sorted_index=["id"])
+    assert len(collection) == 6 and list(collection) == orders
+    assert collection.lookup("region", "eu") == orders[1::2]
+    assert collection.lookup("region", "asia") == []
+    assert collection.lookup("id", 3) == [orders[3]]
+    assert collection.range("id", 2, 4) == orders[2:4]
+    assert collection.range("id", stop=1) == orders[:1]
+    assert collection.range("id", 4) == orders[4:]
+
+    # Mutable fields change freely, the indexes don't depend on them.
+    orders[1].status = "paid"
+    assert collection.lookup("region", "eu")[0] is orders[1]
+
+    rush = RushOrder(3, "eu", fee=1.0)
+    collection.add(rush)
+    collection.add(rush)
+    assert len(collection) == 7 and rush in collection
+    assert collection.range("id", 3, 4) == [orders[3], rush]
+
+    collection.remove(orders[3])
+    assert orders[3] not in collection
+    assert collection.lookup("id", 3) == [rush]
+    assert collection.lookup("region", "eu") == [orders[1], orders[5], rush]
+    with pytest.raises(KeyError):
+        collection.remove(orders[3])
+    collection.discard(orders[3])
+    with pytest.raises(KeyError, match="no index"):
+        collection.range("region")
+
+
+def test_indexed_collection_members_by_identity():
+    # Equal instances are distinct members, and unhashable ones are fine.
+    first, second = Order(1, "eu"), Order(1, "eu")
+    collection = IndexedCollection(Order, [first, second], index=["id"], sorted_index=["id"])
+    assert collection.lookup("id", 1) == [first, second]
+    collection.remove(second)
+    assert collection.lookup("id", 1)[0] is first and collection.range("id")[0] is first
+
+
+def test_indexed_collection_refuses_mutable_and_unknown_fields():
+    with pytest.raises(TypeError, match="mutable field 'status'"):
+        IndexedCollection(Order, index=["status"])
+    with pytest.raises(TypeError, match="no field"):
+        IndexedCollection(Order, sorted_index=["missing"])
+    with pytest.raises(TypeError, match="not a dataclass"):
+        IndexedCollection(int)
+
+
+def test_indexed_collection_add_is_all_or_nothing():
+    @dataclass
+    class Tagged:
+        id: int = field(frozen=True)
+        tags: list[str] = field(frozen=True, default_factory=list[str])
+
+    collection = IndexedCollection(Tagged, sorted_index=["id"], index=["tags"])
+    with pytest.raises(TypeError, match="unhashable"):
+        collection.add(Tagged(1, ["a"]))
+    assert len(collection) == 0 and collection.range("id") == []
+    with pytest.raises(TypeError, match="not a subclass"):
+        collection.add(Order(1, "eu"))  # pyright: ignore[reportArgumentType]
+
+
+def test_indexed_collection_update():
+    orders = [Order(i % 3, "eu") for i in range(6)]
+    collection = IndexedCollection(Order, orders[:2], sorted_index=["id"])
+    collection.update([*orders[2:], orders[0]])
+    assert list(collection) == orders
+    # Members with equal values are in the order they were added.
+    assert collection.range("id") == [orders[0], orders[3], orders[1], orders[4], orders[2], orders[5]]
+    with pytest.raises(TypeError, match="'<' not supported"):
+        collection.update([Order(None, "eu")])  # pyright: ignore[reportArgumentType]
+    assert len(collection) == 6
+
+
+def test_indexed_collection_remove_is_all_or_nothing():
+    class Key:
+        def __init__(self, value: int) -> None:
+            self.value = value
+
+        @override
+        def __hash__(self) -> int:
+            return self.value
+
+    @dataclass
+    class Keyed:
+        id: int = field(frozen=True)
+        key: Key = field(frozen=True)
+
+    keyed = Keyed(1, Key(1))
+    collection = IndexedCollection(Keyed, [keyed], sorted_index=["id"], index=["key"])
+    keyed.key.value = 2
+    with pytest.raises(KeyError, match="hash changed"):
+        collection.remove(keyed)
+    assert keyed in collection and collection.range("id") == [keyed]
+    keyed.key.value = 1
+    collection.remove(keyed)
+    assert len(collection) == 0 and collection.range("id") == [] and collection.lookup("key", keyed.key) == []
+
+
+def test_indexed_collection_refuses_subclasses_with_mutable_indexed_fields():
+    @dataclass
+    class Unfrozen(Order):
+        region: str = "eu"
+
+    collection = IndexedCollection(Order, index=["region"])
+    with pytest.raises(TypeError, match="declares the indexed field 'region' as mutable"):
+        collection.add(Unfrozen(1))
+    with pytest.raises(TypeError, match="declares the indexed field 'region' as mutable"):
+        collection.update([Order(1, "eu"), Unfrozen(2)])
+    assert len(collection) == 0
+    # Subclasses that keep the field frozen, or don't declare it again, are fine.
+    collection.update([Order(1, "eu"), RushOrder(2, "eu")])
+    assert len(collection) == 2
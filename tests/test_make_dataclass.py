@@ -0,0 +1,69 @@
+import dataclasses
+import inspect
+import pickle
+
+import pytest
+
+import semimutable
+from semimutable import FrozenFieldError, field, make_dataclass, make_dataclasses
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_make_dataclass_frozen_field(slots: bool):
+    Point = make_dataclass("Point", [("x", int, field(frozen=True)), ("y", int, field(default=0))], slots=slots)
+
+    p = Point(1)
+    assert (p.x, p.y) == (1, 0)
+    p.y = 2
+    with pytest.raises(FrozenFieldError):
+        p.x = 2
+
+
+def test_make_dataclass_matches_stdlib():
+    spec = ["a", ("b", int), ("c", list[int], dataclasses.field(default_factory=list))]
+    Std = dataclasses.make_dataclass("C", spec, bases=(object,), namespace={"K": 1}, kw_only=True)
+    Sm = make_dataclass("C", spec, bases=(object,), namespace={"K": 1}, kw_only=True)
+
+    assert Sm.__module__ == Std.__module__ == __name__
+    assert Sm.__doc__ == Std.__doc__
+    assert [f.name for f in dataclasses.fields(Sm)] == [f.name for f in dataclasses.fields(Std)]
+    assert Sm.K == Std.K == 1
+    assert repr(Sm(a=1, b=2)) == repr(Std(a=1, b=2)).replace("Std", "Sm")
+
+
+@pytest.mark.parametrize("bad", [("x", int, None, None), "not an identifier", "class", ["x", "x"]])
+def test_make_dataclass_invalid_fields(bad: object):
+    fields = bad if isinstance(bad, list) else [bad]
+    with pytest.raises(TypeError):
+        make_dataclass("C", fields)  # pyright: ignore[reportArgumentType]
+
+
+def test_make_dataclasses():
+    schemas = {
+        "User": [("id", int, field(frozen=True)), ("name", str)],
+        "Group": [("id", int, field(frozen=True)), ("name", str)],
+        "Tag": [("label", str)],
+    }
+    User, Group, Tag = make_dataclasses(schemas.items(), slots=True)
+
+    assert [cls.__name__ for cls in (User, Group, Tag)] == ["User", "Group", "Tag"]
+    assert User.__module__ == __name__
+    group = Group(1, "admins")
+    with pytest.raises(FrozenFieldError):
+        group.id = 2
+    assert Tag("x").label == "x"
+    # Same field layout, same generated code.
+    assert User.__init__.__code__ is Group.__init__.__code__
+    assert User.__eq__.__code__ is Group.__eq__.__code__
+    assert inspect.unwrap(User.__repr__).__code__ is inspect.unwrap(Group.__repr__).__code__
+    assert repr(group) == "Group(id=1, name='admins')" and group == Group(1, "admins") != User(1, "admins")
+    assert type(User) is type(Group)
+
+
+Pickled = make_dataclass("Pickled", [("x", int, field(frozen=True)), ("y", int)])
+
+
+def test_make_dataclass_pickle():
+    obj = Pickled(1, 2)
+    assert pickle.loads(pickle.dumps(obj)) == obj
+    assert semimutable.is_dataclass(Pickled)
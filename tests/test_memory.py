@@ -0,0 +1,52 @@
+# pyright: reportMissingParameterType = false, reportUnknownParameterType = false, reportUnknownVariableType = false
+"""Per-instance memory of semimutable dataclasses, compared against the equivalent stdlib dataclass."""
+
+import dataclasses
+import sys
+import tracemalloc
+
+import pytest
+
+import semimutable
+
+FIELD_COUNT = 20
+FROZEN_FIELDS = {"f0", "f1"}
+
+
+def make_classes(slots: bool):
+    """A wide record with 20 fields, 2 of which are frozen on the semimutable side."""
+    names = [f"f{i}" for i in range(FIELD_COUNT)]
+    std = dataclasses.make_dataclass("Std", [(name, int) for name in names], slots=slots)
+
+    annotations = dict.fromkeys(names, int)
+    namespace = {name: semimutable.field(frozen=True) for name in FROZEN_FIELDS} | {"__annotations__": annotations}
+    sm = semimutable.dataclass(type("Sm", (), namespace), slots=slots)
+    return std, sm
+
+
+def traced_bytes_per_instance(cls, n: int = 1_000) -> float:
+    args = tuple(range(FIELD_COUNT))  # Small ints are cached, so only the instances themselves are allocated.
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        instances = [cls(*args) for _ in range(n)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(instances) == n
+    return (after - before) / n
+
+
+def test_slots_only_shadow_frozen_fields():
+    _, sm = make_classes(slots=True)
+    expected = {f"f{i}" for i in range(FIELD_COUNT)} - FROZEN_FIELDS
+    expected |= {semimutable.FROZEN_PREFIX + name for name in FROZEN_FIELDS}
+    assert set(sm.__dict__["__slots__"]) == expected
+
+
+@pytest.mark.parametrize("slots", [False, True], ids=["dict", "slots"])
+def test_instance_size_matches_stdlib(slots):
+    std, sm = make_classes(slots)
+    args = tuple(range(FIELD_COUNT))
+    assert sys.getsizeof(sm(*args)) == sys.getsizeof(std(*args))
+    assert traced_bytes_per_instance(sm) == pytest.approx(traced_bytes_per_instance(std), rel=0.01)
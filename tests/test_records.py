@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import pickle
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from semimutable import FrozenFieldError, dataclass, field
+from semimutable import records as sm_records
+from semimutable.records import MappedRecords, Records, SharedRecords, pack
+
+
+# Worker processes look classes and functions up by name, so these have to live at module level.
+@dataclass(slots=True)
+class Item:
+    id: int = field(frozen=True)
+    name: str = field(frozen=True)
+    digest: bytes = field(frozen=True)
+    price: float = 0.0
+    tags: list[str] = field(frozen=True, default_factory=list[str])
+    available: bool = field(frozen=True, default=True)
+
+
+def make_items(n: int) -> list[Item]:
+    return [Item(i, f"item {i}", i.to_bytes(4), i / 2, [str(i)], i % 2 == 0) for i in range(n)]
+
+
+def total_and_local_write(records: SharedRecords[Item]) -> tuple[tuple[int, int], int, float]:
+    record = records[0]
+    record.price = -1.0  # Only changes the records of this process.
+    return (os.getpid(), id(records)), sum(records.column("id")), record.price
+
+
+def test_records_round_trip():
+    records = Records(Item, pack(Item, make_items(4)), allow_pickle=True)
+    assert len(records) == 4
+    assert [record.name for record in records] == ["item 0", "item 1", "item 2", "item 3"]
+    assert repr(records[-1]) == (
+        "Item.Record(id=3, name='item 3', digest=b'\\x00\\x00\\x00\\x03', price=1.5, tags=['3'], available=False)"
+    )
+    with pytest.raises(IndexError):
+        records[4]
+
+    record = records[1]
+    with pytest.raises(FrozenFieldError):
+        record.id = 5
+    ids = records.column("id")
+    assert isinstance(ids, memoryview) and ids.readonly and ids.tolist() == [0, 1, 2, 3]
+    assert records.column("available") == memoryview(b"\x01\x00\x01\x00").cast("?")
+    assert records.column("price") == memoryview(array("d", [0.0, 0.5, 1.0, 1.5]))
+
+    # Mutable fields assigned through one proxy are seen by every later one.
+    record.price = 9.0
+    records[1].price += 1
+    assert (record.price, records[1].price, [r.price for r in records]) == (10.0, 10.0, [0.0, 10.0, 1.0, 1.5])
+    assert records.column("price") == [0.0, 10.0, 1.0, 1.5]
+    assert records.column("tags") == [["0"], ["1"], ["2"], ["3"]]
+    with pytest.raises(KeyError):
+        records.column("missing")
+
+
+def test_records_fall_back_to_pickled_columns():
+    @dataclass
+    class Odd:
+        big: int = field(frozen=True)
+        text: str = field(frozen=True)
+        blob: bytes = b""
+
+    buffer = pack(Odd, [Odd(2**70, "\udc80", b"ab"), Odd(1, "", b"c")])
+    # Reading pickles can run arbitrary code, so it has to be allowed.
+    with pytest.raises(ValueError, match=r"pickled columns \['big'\]"):
+        Records(Odd, buffer)
+    records = Records(Odd, buffer, allow_pickle=True)
+    assert [(r.big, r.text, r.blob) for r in records] == [(2**70, "\udc80", b"ab"), (1, "", b"c")]
+    assert records.column("big") == [2**70, 1]
+
+
+def test_records_refuse_other_buffers():
+    @dataclass
+    class Other:
+        id: int = field(frozen=True)
+
+    with pytest.raises(TypeError):
+        pack(Item, [Other(1)])  # pyright: ignore[reportArgumentType]
+    with pytest.raises(ValueError, match="fields of"):
+        Records(Other, pack(Item, make_items(1)), allow_pickle=True)
+    with pytest.raises(ValueError, match="not a buffer"):
+        Records(Item, b"\x00" * 32)
+
+
+def test_records_refuse_truncated_and_corrupt_buffers(tmp_path: Path):
+    packed = bytes(pack(Item, make_items(3)))
+    header_end = 16 + int.from_bytes(packed[8:16], "little")
+    with pytest.raises(ValueError, match="not a buffer"):
+        Records(Item, packed[:12])
+    with pytest.raises(ValueError, match="header is cut off"):
+        Records(Item, packed[: header_end - 1])
+    with pytest.raises(ValueError, match="invalid header"):
+        Records(Item, packed[:16] + b"{" * (header_end - 16) + packed[header_end:])
+    with pytest.raises(ValueError, match="invalid header"):
+        Records(Item, packed.replace(b'"kind":"q"', b'"kind":"x"'))
+    with pytest.raises(ValueError, match="column 'available' goes past the end"):
+        Records(Item, packed[:-1], allow_pickle=True)
+
+    # A truncated file is refused, and its mapping closed.
+    path = tmp_path / "truncated.bin"
+    path.write_bytes(packed[:-1])
+    with pytest.raises(ValueError, match="goes past the end"):
+        sm_records.open(Item, path, allow_pickle=True)
+
+
+def test_mapped_records_file(tmp_path: Path):
+    path = tmp_path / "items.bin"
+    sm_records.dump(Item, iter(make_items(3)), path)
+    assert path.read_bytes() == pack(Item, make_items(3))
+    with pytest.raises(ValueError, match="allow_pickle=True"):
+        sm_records.open(Item, path)
+    with sm_records.open(Item, path, allow_pickle=True) as records:
+        assert isinstance(records, MappedRecords) and len(records) == 3
+        assert [(record.id, record.name, record.tags) for record in records] == [
+            (0, "item 0", ["0"]),
+            (1, "item 1", ["1"]),
+            (2, "item 2", ["2"]),
+        ]
+        record = records[2]
+        with pytest.raises(FrozenFieldError):
+            record.digest = b""
+        # Assigned values are kept in memory, the file is read-only.
+        record.price = 5.0
+        assert records[2].price == 5.0
+    # The mapping is gone, and with it the views of the records.
+    with pytest.raises(ValueError):
+        record.digest
+    with pytest.raises(TypeError, match="not a dataclass"):
+        sm_records.open(make_items, path)  # pyright: ignore[reportArgumentType]
+
+
+def test_shared_records_in_process_pool():
+    with SharedRecords(Item, make_items(1_000)) as records:
+        # Only the name of the block is pickled, and unpickling in the same process returns the same records.
+        assert len(pickle.dumps(records)) < 200
+        assert pickle.loads(pickle.dumps(records)) is records
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=context) as pool:
+            results = list(pool.map(total_and_local_write, [records] * 4))
+        assert {(total, price) for _, total, price in results} == {(sum(range(1_000)), -1.0)}
+        # Each worker maps the block once, whatever the number of tasks it runs.
+        attached = {attachment for attachment, _, _ in results}
+        assert len(attached) == len({pid for pid, _ in attached})
+        assert records[0].price == 0.0
+    with pytest.raises(FileNotFoundError):
+        SharedRecords.__reduce__(records)[0](records.name, Item)
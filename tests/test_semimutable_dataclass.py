@@ -1,8 +1,40 @@
+import copy
 import dataclasses
+import gc
+import inspect
+import itertools
+import os
+import pickle
+import subprocess
+import sys
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Literal, override
 
 import pytest
 
-from semimutable import FrozenFieldError, dataclass, field
+from semimutable import (
+    FrozenField,
+    FrozenFieldError,
+    changed_fields,
+    clear_changes,
+    configure,
+    dataclass,
+    field,
+    from_records,
+    from_rows,
+    frozen_cached,
+    instrument,
+    intern_clear,
+    intern_info,
+    intern_instance,
+    iter_asdict,
+    iter_astuple,
+    iter_from_records,
+    iter_from_rows,
+    replace,
+    replace_many,
+)
 
 
 def test_frozen_field_is_immutable():
@@ -17,6 +49,17 @@ class Sm:
         sm.x = 99
 
 
+@pytest.mark.parametrize("slots", [False, True])
+def test_frozen_field_is_readable(slots: bool):
+    @dataclass(slots=slots)
+    class Sm:
+        x: int = field(frozen=True)
+
+    assert Sm(x=1).x == 1
+    with pytest.raises(AttributeError):
+        del Sm(x=1).x
+
+
 def test_non_frozen_field_is_mutable():
     @dataclass(slots=True)
     class Sm:
@@ -61,3 +104,1090 @@ class Sm:
 
     with pytest.raises(FrozenFieldError):
         Sm.x = 10
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_frozen_field_init_false_default(slots: bool):
+    @dataclass(slots=slots)
+    class Sm:
+        x: int = field(frozen=True, default=3, init=False)
+
+    sm = Sm()
+    assert sm.x == 3
+    with pytest.raises(FrozenFieldError):
+        sm.x = 4
+
+
+def test_post_init_sees_frozen_fields():
+    @dataclass
+    class Sm:
+        x: int = field(frozen=True)
+        scale: dataclasses.InitVar[int] = 1
+        y: int = field(init=False)
+
+        def __post_init__(self, scale: int) -> None:
+            self.y = self.x * scale
+
+    sm = Sm(x=2, scale=3)
+    assert sm.y == 6
+    with pytest.raises(FrozenFieldError):
+        sm.x = 4
+
+
+def test_replace_mode_with_slots():
+    @dataclass(slots=True, classvar_frozen_assignment="replace")
+    class Sm:
+        x: int = field(frozen=True)
+
+    sm = Sm(x=1)
+    assert sm.x == 1
+    with pytest.raises(FrozenFieldError):
+        sm.x = 2
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_classvar_assignment_descriptor_keeps_instances_frozen(slots: bool):
+    @dataclass(slots=slots, classvar_frozen_assignment="descriptor")
+    class Sm:
+        x: int = field(frozen=True)
+
+    # Without a class variable, the class reads the field itself, as with "patch".
+    assert isinstance(Sm.x, FrozenField)
+
+    Sm.x = 10
+    assert Sm.x == 10
+    sm = Sm(x=1)
+    assert sm.x == 1
+    with pytest.raises(FrozenFieldError):
+        sm.x = 5
+
+    class Sub(Sm):
+        pass
+
+    assert Sub.x == 10
+    assert Sub(x=2).x == 2
+
+    del Sm.x
+    assert isinstance(Sm.x, FrozenField) and isinstance(Sub.x, FrozenField)
+
+
+@pytest.mark.parametrize("mode", ["patch", "descriptor"])
+def test_subclass_default_for_frozen_field(mode: Literal["patch", "descriptor"]):
+    @dataclass(classvar_frozen_assignment=mode)
+    class Base:
+        x: int = field(frozen=True)
+
+    @dataclass(classvar_frozen_assignment=mode)
+    class Sub(Base):
+        x: int = 7
+
+    assert Sub.x == 7
+    sub = Sub()
+    assert sub.x == 7
+    sub.x = 8
+    assert sub.x == 8
+
+
+def test_classvar_assignment_descriptor_shares_metaclass():
+    @dataclass(classvar_frozen_assignment="descriptor")
+    class A:
+        x: int = field(frozen=True)
+
+    @dataclass(classvar_frozen_assignment="descriptor")
+    class B:
+        x: int = field(frozen=True)
+        y: int = 0
+
+    assert type(A) is type(B)
+
+
+@pytest.mark.parametrize("mode", ["patch", "error", "descriptor"])
+def test_metaclass_is_shared_across_inheritance(mode: Literal["patch", "error", "descriptor"]):
+    @dataclass(classvar_frozen_assignment=mode)
+    class Base:
+        x: int = field(frozen=True)
+
+    @dataclass(classvar_frozen_assignment=mode)
+    class Child(Base):
+        y: int = 0
+
+    @dataclass(classvar_frozen_assignment=mode)
+    class GrandChild(Child):
+        z: int = 0
+
+    @dataclass(classvar_frozen_assignment=mode)
+    class Unrelated:
+        x: int = field(frozen=True)
+
+    assert type(GrandChild) is type(Child) is type(Base) is type(Unrelated)
+    with pytest.raises(FrozenFieldError):
+        GrandChild(x=1).x = 2
+
+
+def test_subclass_can_switch_classvar_frozen_assignment():
+    @dataclass(classvar_frozen_assignment="error")
+    class Base:
+        x: int = field(frozen=True)
+
+    @dataclass(classvar_frozen_assignment="patch")
+    class Child(Base):
+        pass
+
+    Child.x = 4
+    assert Child.x == 4
+    with pytest.raises(FrozenFieldError):
+        Base.x = 4
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_replace_keeps_frozen_fields_frozen(slots: bool):
+    @dataclass(slots=slots)
+    class Sm:
+        x: int = field(frozen=True)
+        y: int = 0
+
+    sm = Sm(x=1, y=2)
+    new = replace(sm, y=3)
+    assert (new.x, new.y) == (1, 3)
+    assert replace(sm, x=4).x == 4
+    with pytest.raises(FrozenFieldError):
+        new.x = 5
+
+    class Sub(Sm):
+        def __init__(self, x: int, y: int = 0) -> None:
+            super().__init__(x, y * 10)
+
+    # A subclass with its own __init__ must go through it.
+    assert replace(Sub(1), y=2).y == 20
+
+
+def test_replace_many():
+    @dataclass
+    class A:
+        x: int = field(frozen=True)
+        y: int = 0
+
+    @dataclass
+    class B:
+        y: int = 0
+
+    objs = [A(1), A(2), B(), A(3)]
+    assert replace_many(objs, y=9) == [A(1, 9), A(2, 9), B(9), A(3, 9)]
+    assert replace_many([], y=9) == []
+
+
+def test_iter_asdict_and_iter_astuple():
+    @dataclass
+    class A:
+        x: int = field(frozen=True)
+        y: int = 0
+
+    class Sub(A):
+        extra = 1
+
+    @dataclasses.dataclass
+    class B:
+        y: int = 0
+
+    rows = iter_asdict(iter([A(1), A(2, 3), B(4), Sub(5)]))
+    assert next(rows) == {"x": 1, "y": 0}
+    assert list(rows) == [{"x": 2, "y": 3}, {"y": 4}, {"x": 5, "y": 0}]
+    assert list(iter_astuple([A(1), A(2, 3)], tuple_factory=list)) == [[1, 0], [2, 3]]
+    with pytest.raises(TypeError):
+        list(iter_astuple([A(1), object()]))
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_from_rows_and_from_records(slots: bool):
+    @dataclass(slots=slots)
+    class Sm:
+        y: str
+        x: int = field(frozen=True)
+        items: list[int] = dataclasses.field(default_factory=list[int])
+        scale: dataclasses.InitVar[int] = 1
+        scaled: int = field(init=False, default=0)
+        _: dataclasses.KW_ONLY
+        tag: str = field(frozen=True, default="t")
+
+        def __post_init__(self, scale: int) -> None:
+            self.scaled = self.x * scale
+
+    rows = [("a", 1), ("b", 2, [3], 4)]
+    expected = [Sm("a", 1), Sm("b", 2, [3], 4)]
+    assert from_rows(Sm, rows) == list(iter_from_rows(Sm, iter(rows))) == expected
+    first, second = from_rows(Sm, [("a", 1), ("a", 1)])
+    assert first.items is not second.items
+    with pytest.raises(FrozenFieldError):
+        first.x = 2  # pyright: ignore[reportAttributeAccessIssue]
+
+    records = [{"x": 1, "y": "a"}, {"x": 2, "y": "b", "items": [3], "scale": 4, "tag": "u"}]
+    expected = [Sm("a", 1), Sm("b", 2, [3], 4, tag="u")]
+    assert from_records(Sm, records) == list(iter_from_records(Sm, iter(records))) == expected
+
+    # Bad rows and records fail exactly like calling the class.
+    with pytest.raises(TypeError, match="missing 1 required positional argument: 'x'"):
+        from_rows(Sm, [("a",)])
+    with pytest.raises(TypeError, match="unexpected keyword argument 'z'"):
+        from_records(Sm, [{"x": 1, "y": "a", "z": 0}])
+    with pytest.raises(TypeError, match="got an unexpected keyword argument 'scaled'"):
+        from_records(Sm, [{"x": 1, "y": "a", "scaled": 0}])
+
+
+def test_iter_from_rows_is_lazy():
+    @dataclass
+    class Sm:
+        x: int = field(frozen=True)
+
+    def rows():
+        yield (1,)
+        raise AssertionError("read too far")
+
+    assert next(iter_from_rows(Sm, rows())) == Sm(1)
+    assert next(iter_from_records(Sm, ({"x": x} for x in itertools.count()))) == Sm(0)
+    assert gc.isenabled()
+
+
+def test_from_rows_pauses_gc_on_request():
+    @dataclass
+    class Sm:
+        x: int = field(frozen=True)
+
+    def rows():
+        yield (gc.isenabled(),)
+
+    def records():
+        yield {"x": gc.isenabled()}
+
+    assert from_rows(Sm, rows()) == from_records(Sm, records()) == [Sm(True)]
+    assert from_rows(Sm, rows(), pause_gc=True) == from_records(Sm, records(), pause_gc=True) == [Sm(False)]
+    assert gc.isenabled()
+    # A collector that was already disabled is left disabled.
+    gc.disable()
+    try:
+        from_rows(Sm, rows(), pause_gc=True)
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_from_rows_falls_back_to_calling_the_class():
+    @dataclass
+    class Sm:
+        x: int = field(frozen=True)
+        _: dataclasses.KW_ONLY
+        y: int
+
+    class Sub(Sm):
+        def __init__(self, x: int) -> None:
+            super().__init__(x, y=x)
+
+    @dataclass(intern=True, weakref_slot=True, slots=True)
+    class Interned:
+        x: int = field(frozen=True)
+
+    @dataclasses.dataclass
+    class Std:
+        x: int
+
+    assert from_records(Sm, [{"x": 1, "y": 2}]) == [Sm(1, y=2)]
+    with pytest.raises(TypeError, match="missing 1 required keyword-only argument: 'y'"):
+        from_rows(Sm, [(1,)])
+    assert from_rows(Sub, [(1,)]) == [Sub(1)]
+    first, second = from_rows(Interned, [(1,), (1,)])
+    assert first is second
+    assert list(iter_from_records(Std, [{"x": 1}])) == [Std(1)]
+    assert gc.isenabled()
+
+
+def test_from_rows_falls_back_without_losing_values_of_one_shot_rows():
+    @dataclass
+    class Point:
+        x: int = field(frozen=True)
+        y: int = 0
+        z: int = 0
+
+    def rows() -> Iterator[Iterable[int]]:
+        # Rows of another length than the 3 positional parameters go through Point(*row).
+        yield (1, 2, 3)
+        yield iter((4, 5))
+        yield (value for value in (6,))
+        yield [7, 8]
+        yield iter((9, 10, 11))
+
+    expected = [Point(1, 2, 3), Point(4, 5), Point(6), Point(7, 8), Point(9, 10, 11)]
+    assert from_rows(Point, rows()) == expected  # pyright: ignore[reportArgumentType]
+    assert list(iter_from_rows(Point, rows())) == expected  # pyright: ignore[reportArgumentType]
+
+
+# Pickle looks classes up by name, so these have to live at module level.
+@dataclass
+class PickledDict:
+    x: int = field(frozen=True)
+    items: list[int] = dataclasses.field(default_factory=list[int])
+
+
+@dataclass(slots=True)
+class PickledSlots:
+    x: int = field(frozen=True)
+    items: list[int] = dataclasses.field(default_factory=list[int])
+
+
+class PickledSub(PickledDict):
+    pass
+
+
+@dataclass
+class PickledChild(PickledSlots):
+    y: int = 0
+
+
+@dataclass(frozen_hash=True)
+class PickledHashed:
+    x: str = field(frozen=True)
+    n: int = 0
+
+
+@dataclass(track_changes=True)
+class PickledTracked:
+    x: int = field(frozen=True)
+    items: list[int] = dataclasses.field(default_factory=list[int])
+
+
+@dataclass(slots=True, track_changes=True)
+class PickledTrackedSlots:
+    x: int = field(frozen=True)
+    items: list[int] = dataclasses.field(default_factory=list[int])
+
+
+@dataclass
+class PickledCustom:
+    x: int = field(frozen=True)
+
+    @override
+    def __reduce__(self):
+        return PickledCustom, (self.x + 1,)
+
+
+COPIES = [
+    *(lambda obj, protocol=protocol: pickle.loads(pickle.dumps(obj, protocol)) for protocol in range(6)),
+    copy.copy,
+    copy.deepcopy,
+]
+
+
+@pytest.mark.parametrize("copier", COPIES)
+@pytest.mark.parametrize("cls", [PickledDict, PickledSlots, PickledChild, PickledTracked, PickledTrackedSlots])
+def test_pickle_and_copy_keep_frozen_fields_frozen(cls: type[PickledDict], copier: object):
+    obj = cls(1, [2])
+    obj.items = [2]
+    new = copier(obj)  # pyright: ignore[reportCallIssue]
+    assert type(new) is cls and new == obj and new is not obj
+    assert (new.items is obj.items) is (copier is copy.copy)
+    with pytest.raises(FrozenFieldError):
+        new.x = 3
+    if cls.__name__.startswith("PickledTracked"):
+        # Like a new instance, the copy has no changes.
+        assert (changed_fields(obj), changed_fields(new)) == (("items",), ())
+
+
+def test_pickle_state_is_compact():
+    assert PickledSlots(1, [2]).__getstate__() == (1, 1, [2])
+    assert PickledDict(1, [2]).__getstate__() == (1, 1, [2])
+    tracked = PickledTracked(1, [2])
+    tracked.items = [2]
+    assert tracked.__getstate__() == PickledTrackedSlots(1, [2]).__getstate__() == (1, 1, [2])
+    # Objects referring back to themselves.
+    obj = PickledSlots(1)
+    obj.items.append(obj)  # pyright: ignore[reportArgumentType]
+    for new in (pickle.loads(pickle.dumps(obj)), copy.deepcopy(obj)):
+        assert new.items[0] is new
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        # PickledSlots(1, [2]) and PickledDict(1, [2]) pickled by the first release, with the default state of a slotted
+        # class, the pair (None, {name: value}), and the instance __dict__.
+        b"\x80\x04\x95a\x00\x00\x00\x00\x00\x00\x00\x8c tests.test_semimutable_dataclass\x94\x8c\x0cPickledSlots"
+        b"\x94\x93\x94)\x81\x94N}\x94(\x8c\x01x\x94K\x01\x8c\x05items\x94]\x94K\x02a\x8c\t_frozen_x\x94K\x01u\x86\x94b.",
+        b"\x80\x04\x95W\x00\x00\x00\x00\x00\x00\x00\x8c tests.test_semimutable_dataclass\x94\x8c\x0bPickledDict"
+        b"\x94\x93\x94)\x81\x94}\x94(\x8c\t_frozen_x\x94K\x01\x8c\x05items\x94]\x94K\x02aub.",
+    ],
+)
+def test_unpickle_earlier_state_format(data: bytes):
+    obj = pickle.loads(data)
+    assert (obj.x, obj.items) == (1, [2])
+    with pytest.raises(FrozenFieldError):
+        obj.x = 3
+
+
+@pytest.mark.parametrize("copier", COPIES)
+def test_pickle_and_copy_of_unusual_instances(copier: object):
+    with_extra = PickledDict(1)
+    with_extra.extra = 2  # pyright: ignore[reportAttributeAccessIssue]
+    missing = PickledSlots(1)
+    del missing.items
+    sub = PickledSub(1, [2])
+    sub.extra = 3  # pyright: ignore[reportAttributeAccessIssue]
+
+    assert copier(with_extra).extra == 2  # pyright: ignore[reportCallIssue]
+    assert not hasattr(copier(missing), "items")  # pyright: ignore[reportCallIssue]
+    new_sub = copier(sub)  # pyright: ignore[reportCallIssue]
+    assert type(new_sub) is PickledSub and new_sub == sub and new_sub.extra == 3  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_custom_reduce_is_respected():
+    assert "__getstate__" not in PickledCustom.__dict__
+    assert pickle.loads(pickle.dumps(PickledCustom(1))).x == 2
+    assert copy.copy(PickledCustom(1)).x == 2
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_frozen_cached(slots: bool):
+    calls: list[int] = []
+
+    @dataclass(slots=slots)
+    class Key:
+        a: str = field(frozen=True)
+        b: int = field(frozen=True)
+        note: str = ""
+
+        @frozen_cached
+        def key(self) -> str:
+            calls.append(1)
+            return f"{self.a}:{self.b}"
+
+    obj = Key("x", 1)
+    assert (obj.key, obj.key, len(calls)) == ("x:1", "x:1", 1)
+    with pytest.raises(FrozenFieldError):
+        obj.key = "y"
+    with pytest.raises(AttributeError, match="'Key' object has no attribute 'missing'"):
+        obj.missing  # pyright: ignore[reportAttributeAccessIssue]
+    # The copy has a frozen field changed, so it must not see the cached value of the original.
+    assert replace(obj, b=2).key == "x:2"
+    assert copy.copy(obj).key == copy.deepcopy(obj).key == "x:1"
+    if slots:
+        assert "_cached_key" in Key.__slots__  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_frozen_cached_inheritance():
+    @dataclass(slots=True)
+    class Base:
+        a: int = field(frozen=True)
+
+        @frozen_cached
+        def double(self) -> int:
+            return self.a * 2
+
+        def __getattr__(self, name: str) -> str:
+            return "fallback"
+
+    @dataclass(slots=True)
+    class Child(Base):
+        b: int = field(frozen=True, default=1)
+
+        @frozen_cached
+        def total(self) -> int:
+            return self.double + self.b
+
+    child = Child(2)
+    assert (child.total, child.double) == (5, 4)
+    assert child.other == "fallback"  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_frozen_cached_refuses_mutable_fields():
+    with pytest.raises(TypeError, match="reads the mutable field 'm'"):
+
+        @dataclass
+        class Bad:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+            m: int = 0
+
+            @frozen_cached
+            def total(self) -> int:
+                return sum(self.m for _ in range(2))
+
+    with pytest.raises(TypeError, match="reads the mutable field 'm'"):
+
+        @dataclass
+        class Paired:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+            m: int = 0
+
+            @frozen_cached
+            def total(self) -> int:
+                offset = 1
+                return offset + self.m  # self is loaded together with offset since 3.13
+
+    with pytest.raises(TypeError, match="cached_property"):
+
+        @dataclass(frozen=True)
+        class Frozen:  # pyright: ignore[reportUnusedClass]
+            a: int
+
+            @frozen_cached
+            def double(self) -> int:
+                return self.a * 2
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_lazy_field(slots: bool):
+    reads: list[int] = []
+
+    def double(self: "Lazy") -> int:
+        reads.append(self.a)
+        return self.a * 2
+
+    @dataclass(slots=slots)
+    class Lazy:
+        a: int = field(frozen=True)
+        doubled: int = field(frozen=True, lazy=double)
+        n: int = 0
+
+    obj = Lazy(2, 1)
+    assert reads == []
+    assert obj.doubled == obj.doubled == 4 and reads == [2]
+    with pytest.raises(FrozenFieldError):
+        obj.doubled = 0
+    # Assigning to a lazy field that was never read raises just the same.
+    with pytest.raises(FrozenFieldError):
+        Lazy(3).doubled = 0
+    assert [f.name for f in dataclasses.fields(Lazy) if f.init] == ["a", "n"]
+    assert replace(obj, a=5).doubled == 10
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_track_changes(slots: bool):
+    @dataclass(slots=slots, track_changes=True)
+    class Sm:
+        x: int = field(frozen=True)
+        y: int = 0
+        z: str = ""
+        total: int = field(init=False, default=0)
+
+        def __post_init__(self):
+            self.total = self.x + self.y
+
+    if slots:
+        assert vars(Sm)["__slots__"] == ("_frozen_x", "y", "z", "total", "__semimutable_changes__")
+    obj = Sm(1, 2)
+    assert changed_fields(obj) == ()
+    obj.z = "a"
+    obj.y = 3
+    obj.y = 4
+    with pytest.raises(FrozenFieldError):
+        obj.x = 5
+    assert changed_fields(obj) == ("y", "z")
+    assert clear_changes(obj) == ("y", "z")
+    assert changed_fields(obj) == () == clear_changes(obj)
+    assert changed_fields(replace(obj, z="b")) == ()
+    assert [changed_fields(new) for new in from_rows(Sm, [(1, 2), (3, 4)])] == [(), ()]
+
+    # Subclasses are tracked with the fields they add, whether they ask for it or not.
+    @dataclass(slots=slots, track_changes=True)
+    class Tracked(Sm):
+        w: int = 0
+
+    @dataclass(slots=slots)
+    class Inherited(Sm):
+        w: int = 0
+
+    class Undecorated(Sm):
+        pass
+
+    tracked, inherited, undecorated = Tracked(1), Inherited(1), Undecorated(1)
+    tracked.w = tracked.y = inherited.w = inherited.y = 1
+    undecorated.z = "b"
+    assert (changed_fields(tracked), changed_fields(inherited)) == (("y", "w"), ("y", "w"))
+    assert changed_fields(undecorated) == ("z",)
+
+    # A subclass made by the stdlib decorator inherits a __setattr__ that can't record the fields it adds.
+    @dataclasses.dataclass
+    class Std(Sm):
+        w: int = 0
+
+    std = Std(1)
+    std.w = 1
+    with pytest.raises(TypeError, match=r"Std adds the mutable fields \['w'\]"):
+        changed_fields(std)
+    with pytest.raises(TypeError, match="track_changes=True"):
+        changed_fields(dataclasses.make_dataclass("Other", ["a"])(1))
+
+    # With enforcement off, frozen fields are plain ones, but they are still not tracked.
+    previous = configure(enforce=False)
+    try:
+
+        @dataclass(slots=slots, track_changes=True)
+        class Plain:
+            x: int = field(frozen=True)
+            y: int = 0
+
+    finally:
+        configure(**previous)
+    plain = Plain(1)
+    plain.x = plain.y = 2
+    assert changed_fields(plain) == ("y",)
+
+
+def test_track_changes_from_threads():
+    @dataclass(slots=True, track_changes=True)
+    class Sm:
+        a: int = 0
+        b: int = 0
+
+    objs = [Sm() for _ in range(2_000)]
+
+    def assign(name: str) -> None:
+        for obj in objs:
+            setattr(obj, name, 1)
+
+    threads = [threading.Thread(target=assign, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert {changed_fields(obj) for obj in objs} == {("a", "b")}
+
+
+def test_track_changes_invalid_options():
+    with pytest.raises(TypeError, match="frozen=True"):
+
+        @dataclass(frozen=True, track_changes=True)
+        class Frozen:  # pyright: ignore[reportUnusedClass]
+            x: int
+
+    with pytest.raises(TypeError, match="__setattr__"):
+
+        @dataclass(track_changes=True)
+        class OwnSetattr:  # pyright: ignore[reportUnusedClass]
+            x: int
+
+            @override
+            def __setattr__(self, name: str, value: object) -> None:
+                super().__setattr__(name, value)
+
+
+def test_lazy_field_inheritance():
+    @dataclass
+    class Base:
+        a: int = field(frozen=True)
+        doubled: int = field(frozen=True, lazy=lambda self: self.a * 2)
+
+    @dataclass(slots=True)
+    class Child(Base):
+        b: int = field(frozen=True, default=1)
+        total: int = field(frozen=True, lazy=lambda self: self.doubled + self.b)
+
+        @frozen_cached
+        def halved(self) -> float:
+            return self.a / 2
+
+    child = Child(3)
+    assert (child.total, child.doubled, child.halved) == (7, 6, 1.5)
+
+
+def test_lazy_field_invalid_options():
+    with pytest.raises(ValueError, match="lazy requires frozen=True"):
+        field(lazy=len)  # pyright: ignore[reportCallIssue]
+    with pytest.raises(ValueError, match="both lazy and a default"):
+        field(frozen=True, lazy=len, default=0)  # pyright: ignore[reportArgumentType]
+    with pytest.raises(TypeError, match="cached_property"):
+
+        @dataclass(frozen=True)
+        class Frozen:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True, lazy=len)
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_frozen_hash(slots: bool):
+    @dataclass(slots=slots, frozen_hash=True)
+    class Key:
+        a: str = field(frozen=True)
+        b: int = field(frozen=True)
+        skipped: int = field(frozen=True, default=0, hash=False)
+        n: int = 0
+
+    key = Key("x", 1)
+    index = {key: "found"}  # pyright: ignore[reportUnhashable]
+    key.n = 5
+    assert hash(key) == hash(("x", 1))
+    assert index[key] == "found"
+    # Equality still compares every field.
+    assert key != Key("x", 1) and key == Key("x", 1, n=5)
+    assert Key("x", 1) in {Key("x", 1)}  # pyright: ignore[reportUnhashable]
+    if slots:
+        assert "_cached___hash__" in Key.__slots__  # pyright: ignore[reportAttributeAccessIssue]
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_frozen_eq(slots: bool):
+    @dataclass(slots=slots, frozen_hash=True, frozen_eq=True)
+    class Key:
+        a: str = field(frozen=True)
+        n: int = 0
+
+    assert Key("x", 1) == Key("x", 2) and Key("x") != Key("y")
+    assert Key("x").__eq__(object()) is NotImplemented
+    assert {Key("x", 1): "found"}[Key("x", 2)] == "found"  # pyright: ignore[reportUnhashable]
+
+
+def test_frozen_hash_is_not_pickled():
+    obj = PickledHashed("x")
+    hash(obj)
+    obj.extra = 1  # pyright: ignore[reportAttributeAccessIssue]
+    # Not the compact state because of the extra attribute, the hash is left out of the dict state as well.
+    assert "_cached___hash__" not in obj.__getstate__()  # pyright: ignore[reportOperatorIssue]
+    # As if the instance was pickled by another process, whose hash of the same str differs.
+    new = copy.copy(PickledHashed("x"))
+    new.__setstate__({"_frozen_x": "x", "n": 0, "_cached___hash__": 42})  # pyright: ignore[reportAttributeAccessIssue]
+    assert hash(new) == hash(("x",))
+
+
+def test_frozen_hash_and_eq_invalid_options():
+    with pytest.raises(TypeError, match="frozen=True"):
+
+        @dataclass(frozen=True, frozen_hash=True)
+        class Frozen:  # pyright: ignore[reportUnusedClass]
+            a: int
+
+    with pytest.raises(ValueError, match="eq must be true"):
+
+        @dataclass(eq=False, frozen_eq=True)
+        class NoEq:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+
+    with pytest.raises(ValueError, match="unsafe_hash"):
+
+        @dataclass(unsafe_hash=True, frozen_hash=True)
+        class Unsafe:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+
+    with pytest.raises(TypeError, match="Cannot overwrite attribute __hash__"):
+
+        @dataclass(frozen_hash=True)
+        class OwnHash:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+
+            @override
+            def __hash__(self) -> int:
+                return 1
+
+    with pytest.raises(TypeError, match="no frozen field"):
+
+        @dataclass(frozen_hash=True)
+        class NoFrozen:  # pyright: ignore[reportUnusedClass]
+            a: int
+
+
+@pytest.mark.parametrize("slots", [False, True])
+@pytest.mark.parametrize("mode", ["patch", "replace", "error", "descriptor"])
+def test_intern(slots: bool, mode: Literal["patch", "replace", "error", "descriptor"]):
+    @dataclass(slots=slots, weakref_slot=slots, classvar_frozen_assignment=mode, intern=True)
+    class Record:
+        key: str = field(frozen=True)
+        tags: tuple[str, ...] = field(frozen=True, default_factory=tuple)
+        price: float = 0.0
+        _: dataclasses.KW_ONLY
+        source: str = field(frozen=True, default="wire")
+
+    first = Record("x", price=1.0)
+    # The existing instance is returned as is, the arguments of its mutable fields are ignored.
+    assert Record("x", (), 2.0) is first and first.price == 1.0
+    assert Record("x", source="file") is not first
+    # replace() only returns `first` itself without changes, its copies are not interned until asked to.
+    assert replace(first) is first
+    copied = replace(first, price=3.0)
+    assert copied is not first and (first.price, copied.price) == (1.0, 3.0)
+    assert intern_instance(copied) is first
+    y = Record("y")
+    moved = replace(first, key="y")
+    assert moved is not y and intern_instance(moved) is y
+    del copied, y, moved
+    # Only `first` is still alive, the other instances were dropped from the cache when they were freed.
+    assert intern_info(Record) == (3, 3, 0, 1)
+    with pytest.raises(TypeError, match=r"Record\.__init__\(\) missing 1 required positional argument: 'key'"):
+        Record()  # pyright: ignore[reportCallIssue]
+    with pytest.raises(TypeError, match="unhashable"):
+        Record("x", [])  # pyright: ignore[reportArgumentType]
+
+    del first
+    gc.collect()
+    assert intern_info(Record).currsize == 0
+    intern_clear(Record)
+    assert intern_info(Record) == (0, 0, 0, 0)
+
+
+def test_intern_maxsize():
+    @dataclass(intern=True, intern_maxsize=2)
+    class Record:
+        key: int = field(frozen=True)
+
+    ids = [id(Record(key)) for key in (1, 2, 1, 3)]
+    gc.collect()
+    # 1 and 3 are kept alive by the cache, 2 was evicted as the least recently used.
+    assert id(Record(1)) == ids[0] and id(Record(3)) == ids[3]
+    assert intern_info(Record) == (3, 3, 2, 2)
+
+
+def test_intern_subclasses_and_custom_init():
+    @dataclass(intern=True)
+    class Base:
+        key: str = field(frozen=True)
+
+    class Undecorated(Base):
+        pass
+
+    @dataclass(intern=True)
+    class Child(Base):
+        n: int = field(frozen=True, default=0)
+
+        def __init__(self, key: str, n: int = 0) -> None:
+            self.key = key.lower()
+            self.n = n
+
+    # Only classes that asked for interning are interned, each with their own cache.
+    assert Undecorated("x") is not Undecorated("x")
+    child = Child("X")
+    assert Child("x") is child is not Base("x")
+    # With a custom __init__, the key is only known once the instance is constructed.
+    assert intern_info(Child) == (1, 1, 0, 1)
+    assert replace(child) is child and replace(child, n=0) is not child
+    with pytest.raises(TypeError, match="not a dataclass with intern=True"):
+        intern_info(Undecorated)
+    with pytest.raises(TypeError, match="not a dataclass with intern=True"):
+        intern_instance(Undecorated("x"))
+
+
+def test_intern_is_thread_safe():
+    @dataclass(slots=True, weakref_slot=True, intern=True)
+    class Record:
+        key: int = field(frozen=True)
+
+    barrier = threading.Barrier(8)
+    results: list[list[Record]] = []
+
+    def construct() -> None:
+        barrier.wait()
+        results.append([Record(key % 50) for key in range(2_000)])
+
+    threads = [threading.Thread(target=construct) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, itertools.chain.from_iterable(results)))) == 50
+    assert intern_info(Record).misses == 50
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_write_once_is_thread_safe(slots: bool):
+    @dataclass(slots=slots)
+    class Sm:
+        x: int = field(frozen=True, init=False)
+        lazy: object = field(frozen=True, lazy=lambda self: object())
+
+        @frozen_cached
+        def cached(self) -> object:
+            return object()
+
+    def race(obj: Sm, i: int) -> tuple[bool, object, object]:
+        barrier.wait()
+        seen = (obj.lazy, obj.cached)
+        try:
+            obj.x = i  # pyright: ignore[reportAttributeAccessIssue]
+        except FrozenFieldError:
+            return (False, *seen)
+        return (True, *seen)
+
+    # Switching threads as often as possible makes races likely even with the GIL.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(200):
+            obj = Sm()
+            barrier = threading.Barrier(4)
+            results: list[tuple[bool, object, object]] = [(False, None, None)] * 4
+
+            def run(i: int, obj: Sm = obj) -> None:
+                results[i] = race(obj, i)
+
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            winners = [i for i, (won, _, _) in enumerate(results) if won]
+            assert winners == [obj.x]
+            assert {id(lazy) for _, lazy, _ in results} == {id(obj.lazy)}
+            assert {id(cached) for _, _, cached in results} == {id(obj.cached)}
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+
+def test_concurrent_decoration_shares_metaclasses():
+    class Meta(type):
+        pass
+
+    barrier = threading.Barrier(8)
+    classes: list[type] = []
+
+    def decorate() -> None:
+        barrier.wait()
+
+        @dataclass
+        class Sm(metaclass=Meta):
+            x: int = field(frozen=True)
+
+        classes.append(Sm)
+
+    threads = [threading.Thread(target=decorate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({type(cls) for cls in classes}) == 1
+    # A metaclass conflict would make this fail if the metaclasses were generated twice.
+    type("Both", tuple(classes[:2]), {})
+
+
+def test_intern_invalid_options():
+    with pytest.raises(TypeError, match="frozen=True"):
+
+        @dataclass(frozen=True, intern=True)
+        class Frozen:  # pyright: ignore[reportUnusedClass]
+            a: int
+
+    with pytest.raises(ValueError, match="intern must be true"):
+
+        @dataclass(intern_maxsize=10)
+        class NoIntern:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+
+    with pytest.raises(TypeError, match="weakref_slot=True"):
+
+        @dataclass(slots=True, intern=True)
+        class NoWeakref:  # pyright: ignore[reportUnusedClass]
+            a: int = field(frozen=True)
+
+    with pytest.raises(TypeError, match="no frozen field"):
+
+        @dataclass(intern=True)
+        class NoFrozen:  # pyright: ignore[reportUnusedClass]
+            a: int
+
+
+def test_instrument():
+    @dataclass(slots=True)
+    class Sm:
+        x: int = field(frozen=True)
+
+        @frozen_cached
+        def double(self) -> int:
+            return self.x * 2
+
+    @dataclass(classvar_frozen_assignment="error")
+    class Error:
+        x: int = field(frozen=True)
+
+    getter = vars(Sm)["x"].fget
+    meta_hooks = vars(type(Error)).copy()
+    sm = Sm(1)
+    with instrument() as instrumentation:
+        assert sm.x + sm.double == 3
+        for obj, name in ((sm, "x"), (sm, "double"), (Error, "x")):
+            with pytest.raises(FrozenFieldError):
+                setattr(obj, name, 2)
+        with pytest.raises(RuntimeError, match="already instrumented"):
+            instrument().start()
+
+        @dataclass
+        class Late:
+            x: int = field(frozen=True)
+
+        Late(1).x  # pyright: ignore[reportUnusedExpression]
+        thread = threading.Thread(target=lambda: sm.x)
+        thread.start()
+        thread.join()
+    sm.x  # pyright: ignore[reportUnusedExpression]
+
+    stats = instrumentation.snapshot()
+    assert {event: (calls, seconds) for event, (calls, seconds) in stats[Sm].items()} == {
+        "get": (3, 0.0),
+        "set": (1, 0.0),
+        "error": (2, 0.0),
+    }
+    assert stats[Error]["class_set"].calls == stats[Error]["error"].calls == 1
+    assert stats[Late]["get"].calls == 1
+    # Stopping restores the uninstrumented getters and metaclass hooks.
+    assert vars(Sm)["x"].fget is getter
+    assert vars(Late)["x"].fget.__class__.__name__ == "attrgetter"
+    assert vars(type(Error)) == meta_hooks
+
+
+def test_instrument_timing():
+    @dataclass
+    class Sm:
+        x: int = field(frozen=True)
+
+    with instrument(timing=True) as instrumentation:
+        Sm(1).x  # pyright: ignore[reportUnusedExpression]
+    calls, seconds = instrumentation.snapshot()[Sm]["get"]
+    assert calls == 1
+    assert seconds > 0
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_enforcement_off(slots: bool):
+    previous = configure(enforce=False)
+    try:
+
+        @dataclass(slots=slots, weakref_slot=slots, frozen_hash=True, intern=True)
+        class Sm:
+            x: int = field(frozen=True)
+            y: int = 0
+            label: str = field(frozen=True, lazy=lambda self: f"#{self.x}")
+
+            @frozen_cached
+            def double(self) -> int:
+                return self.x * 2
+
+    finally:
+        configure(**previous)
+
+    @dataclasses.dataclass(slots=slots, weakref_slot=slots)
+    class Std:
+        x: int
+        y: int = 0
+
+    # A plain dataclass, apart from what the options ask for.
+    assert type(Sm) is not type and type(Sm).__call__ is not type.__call__  # intern=True still needs its metaclass
+    assert not any(isinstance(value, FrozenField) for value in vars(Sm).values())
+    if slots:
+        assert set(vars(Sm)["__slots__"]) == {"x", "y", "label", "_cached_double", "_cached___hash__", "__weakref__"}
+    assert Sm.__frozen_dataclass_descriptors__ == {"x", "label"}  # pyright: ignore[reportAttributeAccessIssue]
+    assert dataclasses.fields(Sm)[0].metadata["frozen"] is True
+    assert inspect.signature(Sm.__init__) == inspect.signature(Std.__init__)
+
+    sm = Sm(1)
+    assert Sm(1) is sm
+    assert (sm.label, sm.double, hash(sm)) == ("#1", 2, hash((1, "#1")))
+    sm.x = 5  # pyright: ignore[reportAttributeAccessIssue]
+    assert sm.x == 5
+    assert replace(sm, y=3).y == 3
+    assert from_rows(Sm, [(2, 4)])[0].y == 4
+    assert copy.deepcopy(sm).x == 5
+    assert next(iter_asdict([sm])) == {"x": 5, "y": 0, "label": "#1"}
+
+
+def test_enforcement_off_from_environment():
+    code = (
+        "import semimutable\n"
+        "@semimutable.dataclass\n"
+        "class Sm:\n"
+        "    x: int = semimutable.field(frozen=True)\n"
+        "Sm(1).x = 2\n"
+        "print(semimutable.configure())"
+    )
+    env = {**os.environ, "SEMIMUTABLE_ENFORCE": "0"}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "{'enforce': False}"